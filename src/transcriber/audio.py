@@ -0,0 +1,321 @@
+"""
+Decode the audio track of video files into the 16kHz mono float32 samples Whisper expects.
+
+The preferred decoder asks **ffmpeg** for raw 16kHz mono float32 PCM (with any video, subtitle
+and data streams disabled) and reads its output pipe straight into a single preallocated numpy
+buffer. When ffmpeg isn't on our PATH we fall back to decoding with **pydub**.
+
+**Requirements:** *(see pyproject.toml for versions)*:
+
+- numpy
+- AudioSegment (pydub)
+- ffmpeg and ffprobe (must be installed separately into the Operating System)
+"""
+
+import io
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+import numpy as np
+
+# Whisper models expect 16kHz mono audio.
+SAMPLE_RATE = 16000
+# Each float32 sample is 4 bytes.
+BYTES_PER_SAMPLE = 4
+# How much audio to allow for when ffprobe can't tell us the duration up front.
+DEFAULT_CAPACITY_SECONDS = 60
+# How much of the end of ffmpeg's stderr output we keep to explain a failure.
+STDERR_TAIL_BYTES = 8192
+
+
+class AudioDecodeError(ValueError):
+    """
+    Raised when ffmpeg fails to decode an input file.
+
+    Args:
+        input_file (Path): The file we failed to decode.
+        reason (str): ffmpeg's own explanation (its stderr output).
+    """
+
+    def __init__(self, input_file: Path, reason: str):
+        super().__init__(f"ffmpeg could not decode [{input_file}]: {reason.strip() or 'unknown error'}")
+
+
+def ffmpeg_available() -> bool:
+    """
+    Is the ffmpeg executable on our PATH?
+    """
+    return shutil.which("ffmpeg") is not None
+
+
+def probe_duration(input_file: Path) -> float | None:
+    """
+    Use ffprobe to find the duration, in seconds, of the given media file.
+
+    Args:
+        input_file: The media file to probe.
+
+    Returns:
+        The duration in seconds, or None if ffprobe isn't available or can't tell us.
+    """
+    if shutil.which("ffprobe") is None:
+        return None
+    command = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        str(input_file),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True, check=False)  # noqa: S603
+    try:
+        return float(completed.stdout.strip())
+    except ValueError:
+        return None
+
+
+def ffmpeg_command(input_file: Path, start_seconds: float = 0.0) -> list[str]:
+    """
+    Build the ffmpeg command line which writes the input's audio to stdout as 16kHz mono float32 PCM.
+
+    Args:
+        input_file: The media file to decode.
+        start_seconds: Where in the input to start decoding from (defaults to the beginning).
+
+    Returns:
+        The ffmpeg command as an argument list.
+    """
+    seek = ["-ss", f"{start_seconds:.3f}"] if start_seconds else []
+    # fmt: off
+    return [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        *seek, "-i", str(input_file),
+        # Disable video, subtitle and data streams, we only want the audio decoded.
+        "-vn", "-sn", "-dn",
+        "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le", "-",
+    ]
+    # fmt: on
+
+
+class _StderrDrain(threading.Thread):
+    """
+    Reads a process's stderr pipe in the background, so a chatty ffmpeg never blocks on a full pipe
+    while we're reading its stdout, keeping the last STDERR_TAIL_BYTES of what it said.
+
+    Args:
+        stream (Optional[IO[bytes]]): The process's stderr pipe.
+    """
+
+    def __init__(self, stream: Any) -> None:
+        super().__init__(name="ffmpeg-stderr", daemon=True)
+        self.stream = stream
+        self._tail = b""
+
+    def run(self) -> None:
+        if self.stream is None:
+            return
+        while chunk := self.stream.read(65536):
+            self._tail = (self._tail + chunk)[-STDERR_TAIL_BYTES:]
+
+    def output(self) -> str:
+        """
+        Wait for the process to close its stderr, returning the tail of what it wrote.
+        """
+        self.join()
+        return self._tail.decode(errors="replace")
+
+
+def _fill(stream: io.BufferedIOBase, view: memoryview, offset: int) -> int:
+    """
+    Read from the stream into the byte view, starting at offset, until the view is full or the stream ends.
+
+    Returns:
+        The new offset i.e. the number of bytes of the view now filled.
+    """
+    while offset < len(view):
+        count = stream.readinto(view[offset:])
+        if not count:
+            break
+        offset += count
+    return offset
+
+
+def load_audio_ffmpeg(input_file: Path) -> np.ndarray:
+    """
+    Decode the audio of the given input file with ffmpeg, reading its output pipe directly into
+    one preallocated float32 buffer (sized using ffprobe's idea of the duration) with no
+    intermediate copies.
+
+    Args:
+        input_file: The media file to decode.
+
+    Returns:
+        A 1-D float32 numpy array of 16kHz mono samples in the range [-1.0, 1.0].
+
+    Raises:
+        AudioDecodeError: If ffmpeg fails to decode the file.
+        FileNotFoundError: If the ffmpeg executable doesn't exist.
+    """
+    duration = probe_duration(input_file) or DEFAULT_CAPACITY_SECONDS
+    # Allow a second of slack since the container's duration is only an estimate.
+    buffer = np.empty(int((duration + 1) * SAMPLE_RATE), dtype=np.float32)
+    offset = 0
+    command = ffmpeg_command(input_file)
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:  # noqa: S603
+        stderr = _StderrDrain(process.stderr)
+        stderr.start()
+        stdout: Any = process.stdout
+        while True:
+            with buffer.data.cast("B") as view:
+                offset = _fill(stdout, view, offset)
+            if offset < buffer.nbytes:
+                break
+            # The estimate was short, grow the buffer in place (by half again) and keep reading.
+            buffer.resize(buffer.size + buffer.size // 2 + SAMPLE_RATE, refcheck=False)
+        returncode = process.wait()
+        reason = stderr.output()
+    if returncode != 0:
+        raise AudioDecodeError(input_file, reason)
+    return buffer[: offset // BYTES_PER_SAMPLE]
+
+
+class AudioWindowReader:
+    """
+    Reads the audio of an input file from an ffmpeg pipe in fixed size windows, reusing one window
+    sized buffer throughout, so memory use stays constant however long the recording is.
+    The caller may ask for the unconsumed tail of one window (e.g. a sentence cut off by the
+    window's edge) to be carried forward to the front of the next.
+
+    Examples:
+        >>> with AudioWindowReader(Path("town-hall.mp4"), window_seconds=600) as reader:
+        ...     window = reader.next_window()
+        ...     while window is not None:
+        ...         consumed = transcribe_some_of(window, reader.start_seconds)
+        ...         window = reader.next_window(keep_from=consumed)
+
+    Args:
+        input_file (Path): The media file to decode.
+        window_seconds (float): The length of each window in seconds.
+        start_seconds (float): Where in the input to start decoding from (defaults to the beginning).
+    """
+
+    def __init__(self, input_file: Path, window_seconds: float, start_seconds: float = 0.0) -> None:
+        self.input_file = input_file
+        self.buffer = np.empty(int(window_seconds * SAMPLE_RATE), dtype=np.float32)
+        # The absolute sample number (in the input) of the first sample in our buffer.
+        self.start_sample = round(start_seconds * SAMPLE_RATE)
+        # How many samples of our buffer hold audio.
+        self.filled = 0
+        # Has ffmpeg finished writing audio to its pipe?
+        self.exhausted = False
+        self._process: subprocess.Popen[bytes] | None = None
+        self._stderr: _StderrDrain | None = None
+
+    @property
+    def start_seconds(self) -> float:
+        """
+        The position, in seconds, of the current window within the input.
+        """
+        return self.start_sample / SAMPLE_RATE
+
+    def __enter__(self) -> "AudioWindowReader":
+        command = ffmpeg_command(self.input_file, self.start_seconds)
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)  # noqa: S603
+        self._stderr = _StderrDrain(self._process.stderr)
+        self._stderr.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        process: Any = self._process
+        process.stdout.close()
+        returncode = process.wait()
+        stderr = self._stderr.output() if self._stderr else ""
+        process.stderr.close()
+        # Closing the pipe early kills ffmpeg, so only a failure after reading everything counts.
+        if exc_type is None and self.exhausted and returncode != 0:
+            raise AudioDecodeError(self.input_file, stderr)
+
+    def next_window(self, keep_from: int | None = None) -> np.ndarray | None:
+        """
+        Return the next window of audio, carrying forward the previous window's samples from
+        keep_from onwards to the front of the new window.
+
+        Args:
+            keep_from: The sample offset (within the previous window) of the first unconsumed sample,
+                None means the whole of the previous window was consumed.
+
+        Returns:
+            A float32 view of our buffer holding the window's samples, or None when there's no more audio.
+        """
+        if keep_from is None:
+            keep_from = self.filled
+        tail = self.filled - keep_from
+        # Slide the unconsumed tail of the previous window to the front of the buffer.
+        self.buffer[:tail] = self.buffer[keep_from : self.filled]
+        self.start_sample += keep_from
+        self.filled = tail
+        if not self.exhausted:
+            stdout: Any = self._process.stdout if self._process else None
+            with self.buffer.data.cast("B") as view:
+                offset = _fill(stdout, view, tail * BYTES_PER_SAMPLE)
+            self.exhausted = offset < self.buffer.nbytes
+            self.filled = offset // BYTES_PER_SAMPLE
+        if not self.filled:
+            return None
+        return self.buffer[: self.filled]
+
+
+def load_audio_pydub(input_file: Path) -> np.ndarray:
+    """
+    Decode the audio of the given input file with pydub, our fallback when ffmpeg isn't on our PATH.
+
+    Args:
+        input_file: The media file to decode.
+
+    Returns:
+        A 1-D float32 numpy array of 16kHz mono samples in the range [-1.0, 1.0].
+    """
+    from pydub import AudioSegment
+
+    # pydub will internally use ffmpeg if it's available
+    # It will try to decode the MP4 directly.
+    # You might need to specify the format if pydub can't guess from the extension.
+    audio_segment: Any = AudioSegment.from_file(str(input_file))
+
+    # Crucially, ensure the audio is 16kHz, mono
+    # Whisper typically expects 16kHz mono float32
+    audio_segment = audio_segment.set_frame_rate(SAMPLE_RATE).set_channels(1)
+
+    audio_data: np.ndarray = np.frombuffer(audio_segment.get_array_of_samples(), dtype=np.int16)
+
+    # Convert to float32 and normalize
+    return audio_data.astype(np.float32) / 32768.0
+
+
+def load_audio(input_file: Path, decoder: str = "auto") -> np.ndarray:
+    """
+    Decode the audio of the given input file using the requested decoder.
+
+    Args:
+        input_file: The media file to decode.
+        decoder: One of "ffmpeg", "pydub" or "auto" (ffmpeg if it's on our PATH, otherwise pydub).
+
+    Returns:
+        A 1-D float32 numpy array of 16kHz mono samples in the range [-1.0, 1.0].
+    """
+    if decoder == "ffmpeg" or (decoder == "auto" and ffmpeg_available()):
+        return load_audio_ffmpeg(input_file)
+    return load_audio_pydub(input_file)
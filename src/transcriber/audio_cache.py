@@ -0,0 +1,138 @@
+"""
+Content-addressed, on-disk caching of decoded audio and its log-mel spectrograms.
+
+Decoding a video's soundtrack to the 16kHz mono float32 samples Whisper expects is a large
+share of the time it takes to transcribe with the smaller models, and it's the same whichever
+model we use. Decoded audio is kept as .npy files keyed by a hash of the input file's content
+(and the decoder used), so re-running a tree with a different model or after a crash skips
+decoding altogether. Cached audio is memory mapped (read only) rather than read, so reusing it
+costs no copy, and the cache is kept within a size budget by evicting the least recently used
+entries.
+
+The log-mel spectrograms our batched inference feeds the model (see transcriber.mel) can be cached
+the same way, keyed by a hash of the audio itself and the number of mel bins, which every model
+but the large-v3 family shares.
+
+**Requirements:** *(see pyproject.toml for versions)*:
+
+- numpy
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from transcriber.audio import SAMPLE_RATE, ffmpeg_available
+from transcriber.cache import DiskCache
+from transcriber.mel import MEL_VERSION
+
+
+class ArrayCache(DiskCache):
+    """
+    An on-disk cache of float32 arrays stored in .npy format, named after their key, within a total
+    size budget. Hits are memory mapped (read only) and refresh an entry's modification time so that
+    eviction removes the least recently used entries first.
+
+    Args:
+        cache_dir (Path): The directory to keep the arrays in (created if need be).
+        max_bytes (int): The total size the cached arrays may grow to before we evict entries.
+    """
+
+    def get(self, key: str) -> np.ndarray | None:
+        """
+        Return the cached array for the given key, memory mapped read only, or None if we don't have it.
+        """
+        path = self._path(key)
+        try:
+            array: np.ndarray = np.load(path, mmap_mode="r", allow_pickle=False)
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+        # Mark the entry as recently used.
+        os.utime(path)
+        self.hits += 1
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """
+        Cache the array under the given key, evicting old entries if we're over budget.
+        """
+        self._store(key, lambda stream: np.save(stream, np.asarray(array, dtype=np.float32), allow_pickle=False))
+
+
+class AudioCache(ArrayCache):
+    """
+    An on-disk cache of decoded audio (16kHz mono float32 samples) stored as .npy files named after
+    their key, within a total size budget.
+
+    Examples:
+        >>> cache = AudioCache(Path("~/.cache/transcriber-audio").expanduser(), max_bytes=10 * 1024**3)
+        >>> key = cache.key(file_digest(Path("video.mp4")), "auto")
+        >>> audio = cache.get(key)
+        >>> if audio is None:
+        ...     audio = load_audio(Path("video.mp4"))
+        ...     cache.put(key, audio)
+
+    Args:
+        cache_dir (Path): The directory to keep decoded audio in (created if need be).
+        max_bytes (int): The total size the cached audio may grow to before we evict entries.
+    """
+
+    suffix = ".npy"
+
+    @staticmethod
+    def key(content_hash: str, decoder: str) -> str:
+        """
+        Build the cache key for the decoded audio of the given content. Our decoders resample slightly
+        differently, so the decoder actually used (resolving "auto") is part of the key.
+
+        Args:
+            content_hash: The hash of the input file's content (see file_digest()).
+            decoder: The decoder we were asked to use, "auto", "ffmpeg" or "pydub".
+
+        Returns:
+            The cache key (a SHA-256 hex digest).
+        """
+        if decoder == "auto":
+            decoder = "ffmpeg" if ffmpeg_available() else "pydub"
+        identity = json.dumps({"content": content_hash, "decoder": decoder, "sample_rate": SAMPLE_RATE}, sort_keys=True)
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+
+class MelCache(ArrayCache):
+    """
+    An on-disk cache of the log-mel spectrograms of each 30 second window of some audio (see
+    log_mel_windows()), within a total size budget. Entries are stored in .npy format, with a .mel
+    suffix so they can share a directory with an AudioCache.
+
+    Examples:
+        >>> cache = MelCache(Path("~/.cache/transcriber-mel").expanduser(), max_bytes=10 * 1024**3)
+        >>> key = cache.key(audio_hash(audio), n_mels=80)
+        >>> mels = cache.get(key)
+        >>> if mels is None:
+        ...     mels = log_mel_windows(audio, n_mels=80)
+        ...     cache.put(key, mels)
+
+    Args:
+        cache_dir (Path): The directory to keep spectrograms in (created if need be).
+        max_bytes (int): The total size the cached spectrograms may grow to before we evict entries.
+    """
+
+    suffix = ".mel"
+
+    @staticmethod
+    def key(audio_hash: str, n_mels: int) -> str:
+        """
+        Build the cache key for the log-mel spectrograms of the given audio.
+
+        Args:
+            audio_hash: The hash of the audio's samples (see audio_hash()).
+            n_mels: The number of mel bins, 80 for most models, 128 for the large-v3 family.
+
+        Returns:
+            The cache key (a SHA-256 hex digest).
+        """
+        identity = json.dumps({"audio": audio_hash, "n_mels": n_mels, "version": MEL_VERSION}, sort_keys=True)
+        return hashlib.sha256(identity.encode()).hexdigest()
@@ -0,0 +1,252 @@
+"""
+Batched inference across files, for folders full of short clips.
+
+Calling the model's transcribe() once per file runs the model with a batch size of one and
+pays the fixed cost of its decoding loop for every clip. Instead, each file's audio is cut
+into Whisper's 30 second windows and windows from several files are packed into a single
+batch of log-mel spectrograms, decoded together, and the resulting segments routed back to
+the file they came from.
+
+Windows are decoded independently (without the previous window's text as a prompt), so this
+suits short clips best. Each window's spectrogram may be computed ahead of time (and cached, see
+transcriber.mel), otherwise it's computed as the window's batch is decoded.
+
+**Requirements:** *(see pyproject.toml for versions)*:
+
+- whisper (openai/whisper)
+- torch
+- numpy
+"""
+
+import math
+import time
+from collections.abc import Callable, Hashable
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from transcriber.audio import SAMPLE_RATE
+
+# Whisper works on 30 second windows of audio.
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+# The resolution of Whisper's timestamp tokens, in seconds.
+TIME_PRECISION = 0.02
+# Like whisper's transcribe(), treat windows the model is confident hold no speech as silent.
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+
+
+class BatchStats(NamedTuple):
+    """
+    How a batch went, see WindowBatcher's on_batch callback.
+    """
+
+    windows: int
+    files: int
+    audio_seconds: float
+    seconds: float
+    # The seconds of audio each file contributed to the batch, e.g. to share out the time it took.
+    file_audio_seconds: dict[Hashable, float]
+
+
+def segments_from_tokens(
+    tokens: list[int], timestamp_begin: int, decode: Callable[[list[int]], str], duration: float
+) -> list[dict[str, Any]]:
+    """
+    Split the tokens Whisper decoded for a window into timed segments. Timestamp tokens (those from
+    timestamp_begin upwards) mark where each run of text tokens starts and ends.
+
+    Args:
+        tokens: The decoded tokens, without the start of transcript sequence or end of text token.
+        timestamp_begin: The first timestamp token, <|0.00|>.
+        decode: Turns a run of text tokens into text.
+        duration: How many seconds of audio the window holds, the end of any final unterminated segment.
+
+    Returns:
+        The window's segments, with times relative to the start of the window.
+    """
+    segments: list[dict[str, Any]] = []
+    start = 0.0
+    text_tokens: list[int] = []
+    for token in tokens:
+        if token < timestamp_begin:
+            text_tokens.append(token)
+            continue
+        time_stamp = (token - timestamp_begin) * TIME_PRECISION
+        if text_tokens:
+            segments.append({"start": start, "end": time_stamp, "text": decode(text_tokens), "tokens": text_tokens})
+            text_tokens = []
+        start = time_stamp
+    if text_tokens:
+        segments.append({
+            "start": start,
+            "end": max(start, duration),
+            "text": decode(text_tokens),
+            "tokens": text_tokens,
+        })
+    return segments
+
+
+def window_segments(
+    result: Any, timestamp_begin: int, decode: Callable[[list[int]], str], duration: float
+) -> list[dict[str, Any]]:
+    """
+    The timed segments of a window from whisper's DecodingResult for it, none if the model is confident
+    the window holds no speech. Like the segments of whisper's transcribe(), each segment carries the
+    decoding statistics of the window it came from.
+
+    Args:
+        result: whisper's DecodingResult for the window.
+        timestamp_begin: The first timestamp token, <|0.00|>.
+        decode: Turns a run of text tokens into text.
+        duration: How many seconds of audio the window holds.
+
+    Returns:
+        The window's segments, with times relative to the start of the window.
+    """
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return []
+    statistics = {
+        "temperature": result.temperature,
+        "avg_logprob": result.avg_logprob,
+        "compression_ratio": result.compression_ratio,
+        "no_speech_prob": result.no_speech_prob,
+    }
+    return [
+        {**segment, **statistics} for segment in segments_from_tokens(result.tokens, timestamp_begin, decode, duration)
+    ]
+
+
+def _decode_windows(model: Any, windows: list[np.ndarray], mels: list[np.ndarray | None]) -> list[list[dict[str, Any]]]:
+    """
+    Decode a batch of (up to 30 second) windows of audio in one pass through the model, using each
+    window's precomputed log-mel spectrogram where we have one.
+
+    Returns:
+        The segments of each window, with times relative to the start of the window.
+    """
+    import torch
+    import whisper
+    from whisper.tokenizer import get_tokenizer
+
+    # Each window's spectrogram is computed (and normalised) on its own, then they're stacked into a batch.
+    # Precomputed spectrograms may be read only memory maps, which torch wants copying.
+    batch = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(window), model.dims.n_mels)
+        if mel is None
+        else torch.from_numpy(np.array(mel))
+        for window, mel in zip(windows, mels, strict=True)
+    ]).to(model.device)
+    language = None if model.is_multilingual else "en"
+    results = whisper.decode(model, batch, whisper.DecodingOptions(language=language, fp16=False))
+    tokenizer = get_tokenizer(
+        model.is_multilingual, num_languages=model.num_languages, language=language, task="transcribe"
+    )
+    return [
+        window_segments(result, tokenizer.timestamp_begin, tokenizer.decode, len(window) / SAMPLE_RATE)
+        for window, result in zip(windows, results, strict=True)
+    ]
+
+
+class WindowBatcher:
+    """
+    Collects 30 second windows of audio from many files, decodes them batch_size windows at a time
+    and hands back each file's transcription result once all of its windows have been decoded.
+
+    Examples:
+        >>> batcher = WindowBatcher(model, batch_size=16)
+        >>> for path in clips:
+        ...     for done, result in batcher.add(path, load_audio(path)):
+        ...         save(done, result)
+        >>> for done, result in batcher.flush():
+        ...     save(done, result)
+
+    Args:
+        model: The Whisper model.
+        batch_size (int): How many windows to decode at once.
+        on_batch (Callable[[BatchStats], None] | None): Called after each batch is decoded.
+    """
+
+    def __init__(self, model: Any, batch_size: int, on_batch: Callable[[BatchStats], None] | None = None) -> None:
+        self.model = model
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        # The windows waiting for a batch, as (file key, window number, samples, log-mel spectrogram if precomputed).
+        self._windows: list[tuple[Hashable, int, np.ndarray, np.ndarray | None]] = []
+        # The decoded segments of each file's windows (None until decoded), in the order the files were added.
+        self._files: dict[Hashable, list[list[dict[str, Any]] | None]] = {}
+
+    def add(
+        self, key: Hashable, audio: np.ndarray, mels: np.ndarray | None = None
+    ) -> list[tuple[Hashable, dict[str, Any]]]:
+        """
+        Queue up the windows of the given file's audio, decoding any batches this fills.
+
+        Args:
+            key: Identifies the file (e.g. its path) in our results.
+            audio: The file's 16kHz mono float32 samples.
+            mels: The log-mel spectrogram of each of the audio's windows (see log_mel_windows()), if
+                computed ahead of time.
+
+        Returns:
+            The (key, transcription result) of each file completed by the batches we decoded.
+        """
+        count = math.ceil(len(audio) / WINDOW_SAMPLES)
+        self._files[key] = [None] * count
+        for number in range(count):
+            samples = audio[number * WINDOW_SAMPLES : (number + 1) * WINDOW_SAMPLES]
+            self._windows.append((key, number, samples, None if mels is None else mels[number]))
+        while len(self._windows) >= self.batch_size:
+            self._decode_batch()
+        return self._completed()
+
+    def flush(self) -> list[tuple[Hashable, dict[str, Any]]]:
+        """
+        Decode whatever windows are left, however few, returning the (key, transcription result) of the remaining files.
+        """
+        while self._windows:
+            self._decode_batch()
+        return self._completed()
+
+    def _decode_batch(self) -> None:
+        batch, self._windows = self._windows[: self.batch_size], self._windows[self.batch_size :]
+        started = time.perf_counter()
+        decoded = _decode_windows(self.model, [samples for _, _, samples, _ in batch], [mel for *_, mel in batch])
+        seconds = time.perf_counter() - started
+        file_audio_seconds: dict[Hashable, float] = {}
+        for (key, number, samples, _), segments in zip(batch, decoded, strict=True):
+            self._files[key][number] = segments
+            file_audio_seconds[key] = file_audio_seconds.get(key, 0.0) + len(samples) / SAMPLE_RATE
+        if self.on_batch:
+            self.on_batch(
+                BatchStats(
+                    windows=len(batch),
+                    files=len(file_audio_seconds),
+                    audio_seconds=sum(file_audio_seconds.values()),
+                    seconds=seconds,
+                    file_audio_seconds=file_audio_seconds,
+                )
+            )
+
+    def _completed(self) -> list[tuple[Hashable, dict[str, Any]]]:
+        completed = []
+        for key, windows in list(self._files.items()):
+            if any(segments is None for segments in windows):
+                continue
+            del self._files[key]
+            segments: list[dict[str, Any]] = []
+            for number, window_segments in enumerate(windows):
+                # Make the window's segment times relative to the start of the file.
+                offset = number * WINDOW_SAMPLES / SAMPLE_RATE
+                for segment in window_segments or []:
+                    segments.append({
+                        **segment,
+                        "id": len(segments),
+                        "seek": number * WINDOW_SAMPLES,
+                        "start": segment["start"] + offset,
+                        "end": segment["end"] + offset,
+                    })
+            text = "".join(segment["text"] for segment in segments)
+            language = None if self.model.is_multilingual else "en"
+            completed.append((key, {"text": text, "segments": segments, "language": language}))
+        return completed
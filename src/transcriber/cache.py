@@ -0,0 +1,161 @@
+"""
+Content-addressed, on-disk caching of transcription results.
+
+Results are keyed by a hash of the input file's content combined with the model name and the
+decoding options used, so renaming, moving or copying a video (or deleting its SRT file by
+mistake) no longer means transcribing it all over again. The cache is kept within a size
+budget by evicting the least recently used entries.
+
+**Requirements:** *(none beyond the Python standard library)*
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO, Any
+
+
+def file_digest(path: Path) -> str:
+    """
+    Return the SHA-256 hex digest of the given file's content.
+
+    Args:
+        path: The file to hash.
+
+    Returns:
+        The file's SHA-256 hex digest.
+    """
+    with open(path, "rb") as stream:
+        return hashlib.file_digest(stream, "sha256").hexdigest()
+
+
+def json_default(value: Any) -> Any:
+    """
+    Help json serialize the numpy scalars and arrays which can turn up in whisper's results.
+    """
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")  # noqa: TRY003
+
+
+class DiskCache:
+    """
+    The on-disk storage behind our caches: one file per entry, named after its key and fanned out over
+    256 sub-directories, within a total size budget. Entries are written atomically and eviction removes
+    the least recently used entries (by modification time, which reading an entry refreshes) first.
+
+    Args:
+        cache_dir (Path): The directory to keep entries in (created if need be).
+        max_bytes (int): The total size the entries may grow to before we evict some.
+    """
+
+    # The suffix of our entries' files.
+    suffix = ""
+
+    def __init__(self, cache_dir: Path, max_bytes: int) -> None:
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _path(self, key: str) -> Path:
+        # Fan the entries out over 256 sub-directories to keep directory listings short.
+        return self.cache_dir / key[:2] / f"{key}{self.suffix}"
+
+    def _entries(self) -> list[Path]:
+        return list(self.cache_dir.glob(f"??/*{self.suffix}"))
+
+    def _store(self, key: str, write: Callable[[IO[bytes]], object]) -> None:
+        """
+        Store an entry under the given key with the given function, which writes it to a binary stream,
+        evicting old entries if we're over budget.
+        """
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write atomically so concurrent readers (and workers) never see a half written entry.
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as stream:
+            write(stream)
+        size = os.stat(stream.name).st_size
+        previous_size = path.stat().st_size if path.exists() else 0
+        os.replace(stream.name, path)
+        self._size += size - previous_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits within max_bytes.
+        """
+        entries = sorted(((entry.stat(), entry) for entry in self._entries()), key=lambda item: item[0].st_mtime_ns)
+        self._size = sum(stat.st_size for stat, _ in entries)
+        for stat, entry in entries:
+            if self._size <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            self._size -= stat.st_size
+
+
+class TranscriptionCache(DiskCache):
+    """
+    An on-disk cache of raw transcription results (the dictionaries whisper's transcribe() returns)
+    stored as JSON files named after their key, within a total size budget. Hits refresh an
+    entry's modification time so that eviction removes the least recently used entries first.
+
+    Examples:
+        >>> cache = TranscriptionCache(Path("~/.cache/transcriber").expanduser(), max_bytes=1024**3)
+        >>> key = cache.key(file_digest(Path("video.mp4")), "base.en", {"fp16": False})
+        >>> result = cache.get(key)
+        >>> if result is None:
+        ...     result = model.transcribe(audio)
+        ...     cache.put(key, result)
+
+    Args:
+        cache_dir (Path): The directory to keep cached results in (created if need be).
+        max_bytes (int): The total size the cached results may grow to before we evict entries.
+    """
+
+    suffix = ".json"
+
+    @staticmethod
+    def key(content_hash: str, model: str, options: dict[str, Any]) -> str:
+        """
+        Build the cache key for a transcription of the given content, with the given model and decoding options.
+
+        Args:
+            content_hash: The hash of the input file's content (see file_digest()).
+            model: The Whisper model name.
+            options: Any decoding options which affect the transcription result.
+
+        Returns:
+            The cache key (a SHA-256 hex digest).
+        """
+        identity = json.dumps({"content": content_hash, "model": model, "options": options}, sort_keys=True)
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """
+        Return the cached transcription result for the given key, or None if we don't have one.
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as stream:
+                result: dict[str, Any] = json.load(stream)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        # Mark the entry as recently used.
+        os.utime(path)
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        """
+        Cache the transcription result under the given key, evicting old entries if we're over budget.
+        """
+        data = json.dumps(result, default=json_default).encode()
+        self._store(key, lambda stream: stream.write(data))
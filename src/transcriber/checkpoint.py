@@ -0,0 +1,117 @@
+"""
+Checkpoints of long, windowed transcriptions.
+
+A recording transcribed window by window (see Transcriber.transcribe_windowed()) can take hours,
+and if we're killed part way through its segments would otherwise be lost with us. Instead, the
+segments transcribed so far and where the next window starts are periodically saved to a hidden
+sidecar file next to the input. A restarted run picks up from there, seeking ffmpeg to the next
+window, and produces the same transcript as an uninterrupted run would have. Checkpoints are only
+resumed by runs with the same model and decoding options, of the same (unchanged) input file, and
+are removed once the transcript has been saved.
+
+**Requirements:** *(none beyond the Python standard library)*
+"""
+
+import json
+import math
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from transcriber.cache import json_default
+
+# Bump this whenever the checkpoint layout changes, older checkpoints are then ignored.
+CHECKPOINT_VERSION = 2
+
+
+def checkpoint_path(input_file: Path) -> Path:
+    """
+    The sidecar file the given input file's checkpoints are kept in.
+
+    Examples:
+        >>> checkpoint_path(Path("talks/town-hall.mp4"))
+        PosixPath('talks/.town-hall.mp4.checkpoint.json')
+    """
+    return input_file.with_name(f".{input_file.name}.checkpoint.json")
+
+
+class Progress(NamedTuple):
+    """
+    How far a windowed transcription has got.
+    """
+
+    # The sample (in the input) the next window starts at.
+    next_sample: int
+    language: str | None
+    # How many samples of silence voice activity detection kept from the model.
+    skipped: int
+    segments: list[dict[str, Any]]
+
+
+class Checkpoint:
+    """
+    The sidecar file a windowed transcription of an input file saves its progress to, at most once
+    every interval_seconds.
+
+    Examples:
+        >>> checkpoint = Checkpoint(Path("town-hall.mp4"), {"model": "base.en"}, interval_seconds=60)
+        >>> progress = checkpoint.load() or Progress(0, None, 0, [])
+        >>> ... # Transcribe a window.
+        >>> checkpoint.save(progress._replace(next_sample=9600000, segments=segments))
+
+    Args:
+        input_file (Path): The file being transcribed.
+        identity (dict[str, Any]): What (besides the input file's size and modification time) a run must share
+            with ours to resume from our checkpoint, e.g. the model and decoding options.
+        interval_seconds (float): How long to wait between checkpoints.
+        clock (Callable[[], float]): Where to get the time from, time.monotonic() by default.
+    """
+
+    def __init__(
+        self,
+        input_file: Path,
+        identity: dict[str, Any],
+        interval_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = checkpoint_path(input_file)
+        stat = input_file.stat()
+        self.identity = {**identity, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        self.interval_seconds = interval_seconds
+        self.clock = clock
+        # Our first checkpoint is saved as soon as there's anything to save.
+        self._saved = -math.inf
+
+    def load(self) -> Progress | None:
+        """
+        The progress saved by an earlier run, or None if there's no (usable) checkpoint.
+        """
+        try:
+            checkpoint = json.loads(self.path.read_text(encoding="utf-8"))
+            if checkpoint.get("version") != CHECKPOINT_VERSION or checkpoint.get("identity") != self.identity:
+                return None
+            return Progress(**checkpoint["progress"])
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return None
+
+    def save(self, progress: Progress) -> bool:
+        """
+        Save the given progress, replacing the sidecar file atomically, unless we saved a checkpoint too recently.
+
+        Returns:
+            Whether we saved a checkpoint.
+        """
+        now = self.clock()
+        if now - self._saved < self.interval_seconds:
+            return False
+        checkpoint = {"version": CHECKPOINT_VERSION, "identity": self.identity, "progress": progress._asdict()}
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.path.parent, prefix=f"{self.path.name}.", suffix=".tmp", delete=False, encoding="utf-8"
+        ) as stream:
+            json.dump(checkpoint, stream, default=json_default)
+        os.replace(stream.name, self.path)
+        self._saved = now
+        return True
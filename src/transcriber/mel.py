@@ -0,0 +1,97 @@
+"""
+Log-mel spectrograms of whole files, computed in one vectorized pass.
+
+Every Whisper model starts from a log-mel spectrogram of each 30 second window of audio (80 mel
+bins, or 128 for the large-v3 family), and recomputes it every time it sees the audio. Our batched
+inference can instead be fed spectrograms computed here once per file, with numpy, for all of the
+file's windows at a time, and cached (see transcriber.audio_cache.MelCache) keyed by a hash of the
+audio, so comparing or escalating between models on the same corpus skips them.
+
+The spectrograms match whisper's log_mel_spectrogram() of each window padded to 30 seconds: a
+periodic Hann windowed STFT, whisper's mel filter bank, then log scaling normalised per window.
+
+**Requirements:** *(see pyproject.toml for versions)*:
+
+- numpy
+- whisper (openai/whisper), for its mel filter bank
+"""
+
+import functools
+import hashlib
+import math
+from importlib.resources import files
+
+import numpy as np
+
+from transcriber.batch import WINDOW_SAMPLES
+
+# The STFT whisper's spectrograms are built from, 25ms windows every 10ms.
+N_FFT = 400
+HOP_LENGTH = 160
+# The frames in each 30 second window's spectrogram.
+N_FRAMES = WINDOW_SAMPLES // HOP_LENGTH
+# How many windows we transform at once, which bounds our memory use (to around 120MB) for long files.
+CHUNK_WINDOWS = 8
+# Bump this whenever the way we compute spectrograms changes, older cached spectrograms are then ignored.
+MEL_VERSION = 1
+
+
+@functools.cache
+def mel_filters(n_mels: int) -> np.ndarray:
+    """
+    Whisper's mel filter bank, as shipped with it.
+
+    Args:
+        n_mels: The number of mel bins, 80 or 128.
+
+    Returns:
+        The filter bank, an (n_mels, N_FFT // 2 + 1) array.
+    """
+    with (files("whisper") / "assets" / "mel_filters.npz").open("rb") as stream, np.load(stream) as filters:
+        bank: np.ndarray = filters[f"mel_{n_mels}"]
+    return bank
+
+
+def audio_hash(audio: np.ndarray) -> str:
+    """
+    Hash the given audio's samples, identifying it whichever file (or speech regions) it came from.
+    """
+    return hashlib.sha256(np.ascontiguousarray(audio, dtype=np.float32).data).hexdigest()
+
+
+def log_mel_windows(audio: np.ndarray, n_mels: int, filters: np.ndarray | None = None) -> np.ndarray:
+    """
+    Compute the log-mel spectrogram of each 30 second window of the given audio, as whisper would for
+    each window padded (with silence) to 30 seconds.
+
+    Examples:
+        >>> mels = log_mel_windows(load_audio(Path("video.mp4")), n_mels=80)
+        >>> mels.shape
+        (3, 80, 3000)
+
+    Args:
+        audio: 16kHz mono float32 samples.
+        n_mels: The number of mel bins, 80 for most models, 128 for the large-v3 family.
+        filters: The mel filter bank, whisper's by default.
+
+    Returns:
+        A (windows, n_mels, N_FRAMES) float32 array.
+    """
+    filters = mel_filters(n_mels) if filters is None else filters
+    count = math.ceil(len(audio) / WINDOW_SAMPLES)
+    mels = np.empty((count, n_mels, N_FRAMES), dtype=np.float32)
+    # torch.hann_window()'s periodic window.
+    hann = np.hanning(N_FFT + 1)[:-1].astype(np.float32)
+    for first in range(0, count, CHUNK_WINDOWS):
+        windows = np.zeros((min(CHUNK_WINDOWS, count - first), WINDOW_SAMPLES), dtype=np.float32)
+        for number, window in enumerate(windows, start=first):
+            samples = audio[number * WINDOW_SAMPLES : (number + 1) * WINDOW_SAMPLES]
+            window[: len(samples)] = samples
+        # Centre a frame on every HOP_LENGTH'th sample, like torch.stft(center=True), dropping the last like whisper.
+        padded = np.pad(windows, ((0, 0), (N_FFT // 2, N_FFT // 2)), mode="reflect")
+        frames = np.lib.stride_tricks.sliding_window_view(padded, N_FFT, axis=1)[:, ::HOP_LENGTH][:, :N_FRAMES]
+        power = np.abs(np.fft.rfft(frames * hann, axis=-1)) ** 2
+        log_spec = np.log10(np.maximum(filters @ power.transpose(0, 2, 1), 1e-10))
+        log_spec = np.maximum(log_spec, log_spec.max(axis=(1, 2), keepdims=True) - 8.0)
+        mels[first : first + len(windows)] = (log_spec + 4.0) / 4.0
+    return mels
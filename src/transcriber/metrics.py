@@ -0,0 +1,289 @@
+"""
+Structured, per-file and per-stage metrics for transcription runs.
+
+For every file we record its audio duration, the seconds spent in each stage (decoding the
+audio, computing its log-mel spectrograms when we do so ourselves for batched inference,
+loading the model, inference and writing the SRT file), the real time factor of
+inference, the number of segments transcribed and the peak memory use (RSS) of the process
+that transcribed it so far. The operating system only tells us a process' peak over its whole
+life, so this is not the file's own memory use: it never goes down from one file to the next.
+At the end of a run these can be written as JSON Lines (one line per file followed by a
+summary line) and as a Prometheus textfile collector file of aggregate metrics, and a run
+summary (with the aggregate throughput in audio-hours per wall-hour) is printed.
+
+**Requirements:** *(none beyond the Python standard library)*
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+# The stages of transcribing a file, in the order they happen.
+STAGES = ("decode", "features", "load", "infer", "write")
+
+
+def peak_rss_bytes() -> int | None:
+    """
+    Return the peak resident set size of this process (over its whole life) in bytes, or None where we
+    can't tell (e.g. Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+@dataclass
+class FileMetrics:
+    """
+    What it took to transcribe one file, along with the peak memory use of the process which transcribed
+    it, as of when it finished (see peak_rss_bytes()).
+    """
+
+    path: str
+    status: str = ""
+    audio_seconds: float | None = None
+    stages: dict[str, float] = field(default_factory=dict)
+    segments: int = 0
+    seconds: float = 0.0
+    process_peak_rss_bytes: int | None = None
+    started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def realtime_factor(self) -> float | None:
+        """
+        Seconds of inference per second of audio (lower is faster), None if we don't know the audio's duration.
+        """
+        if not self.audio_seconds:
+            return None
+        return self.stages.get("infer", 0.0) / self.audio_seconds
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        The metrics as a JSON friendly dictionary.
+        """
+        metrics = asdict(self)
+        del metrics["started"]
+        return {"type": "file", **metrics, "realtime_factor": self.realtime_factor}
+
+
+class MetricsRecorder:
+    """
+    Collects the FileMetrics of a run. Stages may be timed from any thread.
+
+    Examples:
+        >>> metrics = MetricsRecorder()
+        >>> metrics.start(Path("video.mp4"))
+        >>> with metrics.timer(Path("video.mp4"), "decode"):
+        ...     audio = load_audio(Path("video.mp4"))
+        >>> metrics.finish(Path("video.mp4"), "done", audio_seconds=len(audio) / 16000, segments=12)
+        >>> print(metrics.summary()["audio_hours_per_wall_hour"])
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.files: list[FileMetrics] = []
+        # Stages which belong to the run as a whole rather than any one file (e.g. loading a shared model).
+        self.run_stages: dict[str, float] = {}
+        self._pending: dict[str, FileMetrics] = {}
+        self._lock = threading.Lock()
+
+    def start(self, path: Path) -> FileMetrics:
+        """
+        Start recording the metrics of the given file.
+        """
+        with self._lock:
+            # Keep anything already recorded, e.g. a file decoded ahead of time.
+            return self._pending.setdefault(str(path), FileMetrics(str(path)))
+
+    def add(self, path: Path | None, stage: str, seconds: float) -> None:
+        """
+        Add some seconds to a stage of the given file (or of the run as a whole, when path is None).
+        """
+        with self._lock:
+            if path is None:
+                stages = self.run_stages
+            else:
+                stages = self._pending.setdefault(str(path), FileMetrics(str(path))).stages
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, path: Path | None, stage: str) -> Iterator[None]:
+        """
+        Time the body of a with statement as (part of) a stage of the given file.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(path, stage, time.perf_counter() - started)
+
+    def set_audio_seconds(self, path: Path, seconds: float) -> None:
+        """
+        Record the duration of the given file's audio.
+        """
+        with self._lock:
+            self._pending.setdefault(str(path), FileMetrics(str(path))).audio_seconds = seconds
+
+    def pop(self, path: Path) -> FileMetrics:
+        """
+        Stop recording the given (unfinished) file, handing back its metrics (e.g. to send from a worker process).
+        """
+        with self._lock:
+            metrics = self._pending.pop(str(path), None) or FileMetrics(str(path))
+        metrics.seconds = time.perf_counter() - metrics.started
+        metrics.process_peak_rss_bytes = peak_rss_bytes()
+        return metrics
+
+    def merge(self, metrics: FileMetrics) -> None:
+        """
+        Take over the metrics recorded for a file elsewhere (e.g. in a worker process).
+        """
+        with self._lock:
+            pending = self._pending.setdefault(metrics.path, FileMetrics(metrics.path))
+            for stage, seconds in metrics.stages.items():
+                pending.stages[stage] = pending.stages.get(stage, 0.0) + seconds
+            pending.audio_seconds = metrics.audio_seconds or pending.audio_seconds
+            pending.seconds = metrics.seconds
+            pending.process_peak_rss_bytes = metrics.process_peak_rss_bytes
+
+    def finish(
+        self,
+        path: Path,
+        status: str,
+        audio_seconds: float | None = None,
+        segments: int = 0,
+        seconds: float | None = None,
+    ) -> FileMetrics:
+        """
+        Finish recording the given file's metrics.
+
+        Args:
+            path: The input file.
+            status: How it went, e.g. "done" or "failed".
+            audio_seconds: The duration of the file's audio, if we didn't already know it.
+            segments: How many segments were transcribed.
+            seconds: How long the file took, defaults to the time since we started recording it.
+
+        Returns:
+            The file's metrics.
+        """
+        with self._lock:
+            metrics = self._pending.pop(str(path), None) or FileMetrics(str(path))
+            metrics.status = status
+            metrics.audio_seconds = metrics.audio_seconds or audio_seconds
+            metrics.segments = segments
+            metrics.seconds = seconds if seconds is not None else time.perf_counter() - metrics.started
+            if metrics.process_peak_rss_bytes is None:
+                metrics.process_peak_rss_bytes = peak_rss_bytes()
+            self.files.append(metrics)
+        return metrics
+
+    def summary(self) -> dict[str, Any]:
+        """
+        The aggregate metrics of the run so far.
+        """
+        with self._lock:
+            files = list(self.files)
+            stages = dict(self.run_stages)
+        wall_seconds = time.perf_counter() - self.started
+        for metrics in files:
+            for stage, seconds in metrics.stages.items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+        audio_seconds = sum(metrics.audio_seconds or 0.0 for metrics in files)
+        # The peak of any of our processes (worker processes report theirs with their files).
+        peaks = [metrics.process_peak_rss_bytes for metrics in files if metrics.process_peak_rss_bytes]
+        return {
+            "type": "summary",
+            "files": len(files),
+            "done": sum(metrics.status == "done" for metrics in files),
+            "failed": sum(metrics.status == "failed" for metrics in files),
+            "audio_seconds": audio_seconds,
+            "wall_seconds": wall_seconds,
+            "stages": stages,
+            "segments": sum(metrics.segments for metrics in files),
+            "realtime_factor": stages.get("infer", 0.0) / audio_seconds if audio_seconds else None,
+            # Audio-hours per wall-hour is simply audio seconds per wall second.
+            "audio_hours_per_wall_hour": audio_seconds / wall_seconds if wall_seconds else None,
+            "peak_rss_bytes": max(peaks, default=peak_rss_bytes()),
+        }
+
+    def write_jsonl(self, path: Path) -> None:
+        """
+        Append one JSON line per file, then one for the run summary, to the given file.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as stream:
+            for metrics in self.files:
+                stream.write(json.dumps(metrics.to_dict()) + "\n")
+            stream.write(json.dumps(self.summary()) + "\n")
+
+    def write_prometheus(self, path: Path) -> None:
+        """
+        Write the run's aggregate metrics for Prometheus' node exporter textfile collector. The file is replaced
+        atomically so the collector never reads a half written file.
+        """
+        summary = self.summary()
+        lines = [
+            "# HELP transcriber_files Files processed by the last run, by status.",
+            "# TYPE transcriber_files gauge",
+            f'transcriber_files{{status="done"}} {summary["done"]}',
+            f'transcriber_files{{status="failed"}} {summary["failed"]}',
+            "# HELP transcriber_audio_seconds Seconds of audio transcribed by the last run.",
+            "# TYPE transcriber_audio_seconds gauge",
+            f"transcriber_audio_seconds {summary['audio_seconds']}",
+            "# HELP transcriber_stage_seconds Seconds the last run spent in each stage.",
+            "# TYPE transcriber_stage_seconds gauge",
+            *(f'transcriber_stage_seconds{{stage="{stage}"}} {summary["stages"].get(stage, 0.0)}' for stage in STAGES),
+            "# HELP transcriber_wall_seconds Wall clock seconds the last run took.",
+            "# TYPE transcriber_wall_seconds gauge",
+            f"transcriber_wall_seconds {summary['wall_seconds']}",
+            "# HELP transcriber_segments Segments transcribed by the last run.",
+            "# TYPE transcriber_segments gauge",
+            f"transcriber_segments {summary['segments']}",
+            "# HELP transcriber_realtime_factor Seconds of inference per second of audio in the last run.",
+            "# TYPE transcriber_realtime_factor gauge",
+            f"transcriber_realtime_factor {summary['realtime_factor'] or 0.0}",
+            "# HELP transcriber_audio_hours_per_wall_hour Throughput of the last run.",
+            "# TYPE transcriber_audio_hours_per_wall_hour gauge",
+            f"transcriber_audio_hours_per_wall_hour {summary['audio_hours_per_wall_hour'] or 0.0}",
+            "# HELP transcriber_peak_rss_bytes Peak resident set size of the last run's largest process.",
+            "# TYPE transcriber_peak_rss_bytes gauge",
+            f"transcriber_peak_rss_bytes {summary['peak_rss_bytes'] or 0}",
+            "# HELP transcriber_last_run_timestamp_seconds When the last run finished.",
+            "# TYPE transcriber_last_run_timestamp_seconds gauge",
+            f"transcriber_last_run_timestamp_seconds {time.time()}",
+        ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False, encoding="utf-8"
+        ) as stream:
+            stream.write("\n".join(lines) + "\n")
+        os.replace(stream.name, path)
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    """
+    Describe a run summary (see MetricsRecorder.summary()) in one line.
+    """
+    stages = ", ".join(f"{stage} {summary['stages'].get(stage, 0.0):.1f}s" for stage in STAGES)
+    realtime_factor = summary["realtime_factor"]
+    peak = summary["peak_rss_bytes"]
+    return (
+        f"SUMMARY: {summary['files']} files ({summary['done']} done, {summary['failed']} failed), "
+        f"{summary['audio_seconds'] / 3600:.2f} hours of audio in {summary['wall_seconds'] / 3600:.2f} hours, "
+        f"{summary['audio_hours_per_wall_hour'] or 0.0:.1f} audio-hours per wall-hour ({stages}), "
+        f"real time factor {'n/a' if realtime_factor is None else f'{realtime_factor:.3f}'}, "
+        f"peak RSS {'n/a' if peak is None else f'{peak / 1024**2:.0f} MB'}"
+    )
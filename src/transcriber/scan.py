@@ -0,0 +1,412 @@
+"""
+A single pass directory scanner for FileFilter.
+
+Rather than running a full Path.glob() traversal for every include pattern and another for
+every exclude pattern (calling is_file() on every hit), the tree is walked once with
+os.scandir(). Each path is tested against the include and exclude patterns, precompiled to
+regular expressions. The file type information each DirEntry already holds is reused, so most
+entries cost no extra stat() call. Directories an exclude pattern excludes entirely (e.g.
+"**/.git/**") are pruned without being descended into.
+
+Patterns follow Path.glob(): "*", "?" and "[...]" match within a single path component and a
+"**" component matches any number of directories (including none). Like Path.glob("**"), the
+scan doesn't follow symbolic links to directories.
+
+Files can also be streamed as they're found (see iter_tree()), optionally through a bounded
+reorder buffer (see reorder()) which puts them into nearly sorted order, so transcription can
+start long before a large archive has been enumerated.
+
+Each directory listing also tells us which of its files already have their outputs (e.g. an
+SRT file alongside a video), so re-runs needn't stat() every output to see what's left to do.
+
+Directory listings may be kept between runs in a ScanCache, keyed by each directory's path and
+modification time. Adding, removing or renaming an entry changes its directory's modification
+time, so only the directories which changed since the last run are listed again.
+
+**Requirements:** *(none beyond the Python standard library)*
+"""
+
+import heapq
+import json
+import os
+import re
+import tempfile
+import time
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+# Match case insensitively where the filesystem usually does, as Path.glob() does.
+_FLAGS = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+
+# Bump this whenever the scan cache's layout changes, older caches are then ignored.
+SCAN_CACHE_VERSION = 1
+# Directories modified this recently (in nanoseconds) when we listed them might change again without their
+# modification time moving on (filesystem timestamps can be coarse), so we don't cache their listings.
+RACY_NANOSECONDS = 2_000_000_000
+
+
+def _translate_component(component: str) -> str:
+    """
+    Translate a single glob path component (without any "/") to a regular expression.
+    """
+    regex = []
+    index = 0
+    while index < len(component):
+        char = component[index]
+        index += 1
+        if char == "*":
+            # A run of stars inside a component is just a star.
+            while index < len(component) and component[index] == "*":
+                index += 1
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            # As with fnmatch, a "]" straight after the "[" (or "[!") is part of the set.
+            start = index + 1 if component.startswith("!", index) else index
+            start += 1 if component.startswith("]", start) else 0
+            end = component.find("]", start)
+            if end < 0:
+                regex.append(re.escape(char))
+                continue
+            # Like fnmatch, escape backslashes, "[" and set operations so the regex sees plain characters.
+            chars = re.sub(r"([\\\[&~|])", r"\\\1", component[index:end])
+            index = end + 1
+            if chars.startswith("!"):
+                regex.append(f"[^{chars[1:]}/]")
+            else:
+                # A leading "^" is just another character in a glob's set.
+                regex.append("[" + ("\\" if chars.startswith("^") else "") + chars + "]")
+        else:
+            regex.append(re.escape(char))
+    return "".join(regex)
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translate a Path.glob() style pattern, relative to the directory being scanned, to a regular
+    expression matching the same "/" separated relative paths.
+
+    Examples:
+        >>> re.match(glob_to_regex("**/*.mp4"), "videos/demo.mp4") is not None
+        True
+
+    Args:
+        pattern: The glob pattern, e.g. "**/_Model/*.mkv".
+
+    Returns:
+        The regular expression.
+    """
+    parts = [part for part in pattern.replace(os.sep, "/").split("/") if part not in ("", ".")]
+    regex = []
+    for number, part in enumerate(parts):
+        last = number == len(parts) - 1
+        if part == "**":
+            # Any number of directories or, at the end of the pattern, anything at all.
+            regex.append(".*" if last else "(?:[^/]+/)*")
+        else:
+            regex.append(_translate_component(part) + ("" if last else "/"))
+    return f"(?s:{''.join(regex)})\\Z"
+
+
+def compile_globs(patterns: Iterable[str]) -> re.Pattern[str] | None:
+    """
+    Compile the given glob patterns into one regular expression matching any of them, None if there are none.
+    """
+    regexes = [glob_to_regex(pattern) for pattern in patterns]
+    return re.compile("|".join(f"(?:{regex})" for regex in regexes), _FLAGS) if regexes else None
+
+
+def _pruned_directories(exclude_patterns: Iterable[str]) -> re.Pattern[str] | None:
+    """
+    Compile the directories whose entire contents the given exclude patterns exclude, those patterns
+    ending in "/**" or "/**/*" (e.g. "**/node_modules/**"), so we needn't look inside them.
+    """
+    prefixes = []
+    for pattern in exclude_patterns:
+        parts = [part for part in pattern.replace(os.sep, "/").split("/") if part not in ("", ".")]
+        if parts[-1:] == ["**"]:
+            prefixes.append("/".join(parts[:-1]))
+        elif parts[-2:] == ["**", "*"]:
+            prefixes.append("/".join(parts[:-2]))
+    # An empty prefix excludes everything.
+    return compile_globs(prefix or "**" for prefix in prefixes)
+
+
+class ScanEntry(NamedTuple):
+    """
+    A file (or entirely excluded directory) found by iter_tree().
+    """
+
+    path: Path
+    # Did an exclude pattern match it?
+    excluded: bool
+    # Were all of its outputs (e.g. video.srt for video.mp4) listed alongside it?
+    done: bool = False
+
+
+class ScanResult(NamedTuple):
+    """
+    What a scan found, see scan_tree().
+    """
+
+    # The files matching an include pattern but no exclude pattern.
+    matching: list[Path]
+    # The files matching an exclude pattern, along with any directories excluded entirely.
+    excluded: list[Path]
+    # The matching files whose outputs all exist already.
+    done: set[Path]
+
+
+class _Matchers(NamedTuple):
+    """
+    Our compiled include, exclude and pruned directory patterns.
+    """
+
+    include: re.Pattern[str] | None
+    exclude: re.Pattern[str] | None
+    pruned: re.Pattern[str] | None
+
+
+class DirectoryListing(NamedTuple):
+    """
+    The names of the regular files and (not symbolically linked) subdirectories within a directory.
+    """
+
+    files: list[str]
+    directories: list[str]
+
+
+def list_directory(directory: str) -> DirectoryListing:
+    """
+    List the given directory with os.scandir(), reusing the file type each DirEntry already holds.
+    Anything else (e.g. sockets, broken links, or entries we can't stat()) is left out.
+    """
+    files: list[str] = []
+    directories: list[str] = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.name)
+                elif entry.is_file():
+                    files.append(entry.name)
+            except OSError:
+                continue
+    return DirectoryListing(files, directories)
+
+
+class ScanCache:
+    """
+    A persistent cache of directory listings, keyed by each directory's path and modification time,
+    kept as a JSON file. A listing is reused while its directory's modification time is unchanged, so
+    re-scanning a large, mostly unchanged tree costs one stat() per directory rather than a listing.
+    Listings of directories which weren't scanned again are dropped when the cache is saved, so each
+    tree scanned should have a cache of its own.
+
+    Examples:
+        >>> cache = ScanCache(Path("scan-cache.json"))
+        >>> result = scan_tree(Path("videos"), ["**/*.mp4"], [], cache=cache)
+        >>> cache.save()
+
+    Args:
+        cache_file (Path): The JSON file to keep the listings in (created when first saved).
+        rescan (bool): Ignore any cached listings, listing every directory again.
+    """
+
+    def __init__(self, cache_file: Path, rescan: bool = False) -> None:
+        self.cache_file = Path(cache_file).expanduser()
+        self._listings: dict[str, tuple[int, DirectoryListing]] = {} if rescan else self._load()
+        self._scanned: dict[str, tuple[int, DirectoryListing]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> dict[str, tuple[int, DirectoryListing]]:
+        """
+        Load our cached listings, starting afresh if there are none or they're unreadable or out of date.
+        """
+        try:
+            cached = json.loads(self.cache_file.read_text(encoding="utf-8"))
+            if cached.get("version") != SCAN_CACHE_VERSION:
+                return {}
+            return {
+                directory: (mtime_ns, DirectoryListing(files, directories))
+                for directory, (mtime_ns, files, directories) in cached["directories"].items()
+            }
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return {}
+
+    def get(self, directory: str) -> DirectoryListing:
+        """
+        List the given directory, reusing its cached listing if it hasn't been modified since.
+        """
+        mtime_ns = os.stat(directory).st_mtime_ns
+        # Prefer what we've listed since we were loaded, when we're scanning the same tree again (e.g. watching it).
+        cached = self._scanned.get(directory) or self._listings.get(directory)
+        if cached is not None and cached[0] == mtime_ns:
+            self.hits += 1
+            self._scanned[directory] = cached
+            return cached[1]
+        self.misses += 1
+        listing = list_directory(directory)
+        if time.time_ns() - mtime_ns > RACY_NANOSECONDS:
+            self._scanned[directory] = (mtime_ns, listing)
+        return listing
+
+    def save(self) -> None:
+        """
+        Save the listings of the directories we've scanned, replacing the cache file atomically.
+        """
+        self._listings = dict(self._scanned)
+        cached = {
+            "version": SCAN_CACHE_VERSION,
+            "directories": {
+                directory: [mtime_ns, listing.files, listing.directories]
+                for directory, (mtime_ns, listing) in self._listings.items()
+            },
+        }
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            dir=self.cache_file.parent,
+            prefix=f".{self.cache_file.name}.",
+            suffix=".tmp",
+            delete=False,
+            encoding="utf-8",
+        ) as stream:
+            json.dump(cached, stream)
+        os.replace(stream.name, self.cache_file)
+
+
+def _scan_directory(
+    directory: str,
+    prefix: str,
+    matchers: _Matchers,
+    output_suffixes: tuple[str, ...],
+    lister: Callable[[str], DirectoryListing],
+) -> tuple[list[ScanEntry], list[tuple[str, str]]]:
+    """
+    List a single directory, returning what we found in it along with the subdirectories still to scan.
+    Whether each file's outputs exist is worked out from the same listing, without a stat() per output.
+    """
+    listing = lister(directory)
+    found: list[ScanEntry] = []
+    subdirectories: list[tuple[str, str]] = []
+    for name in listing.directories:
+        relative = prefix + name
+        if matchers.pruned and matchers.pruned.match(relative):
+            found.append(ScanEntry(Path(directory, name), True))
+        else:
+            subdirectories.append((os.path.join(directory, name), relative + "/"))
+    names = set(listing.files) if output_suffixes else set()
+    for name in listing.files:
+        relative = prefix + name
+        if matchers.exclude and matchers.exclude.match(relative):
+            found.append(ScanEntry(Path(directory, name), True))
+        elif matchers.include and matchers.include.match(relative):
+            path = Path(directory, name)
+            done = bool(output_suffixes) and all(path.with_suffix(suffix).name in names for suffix in output_suffixes)
+            found.append(ScanEntry(path, False, done))
+    return found, subdirectories
+
+
+def iter_tree(
+    root: Path,
+    include_patterns: list[str],
+    exclude_patterns: list[str],
+    output_suffixes: tuple[str, ...] = (),
+    cache: ScanCache | None = None,
+) -> Iterator[ScanEntry]:
+    """
+    Walk the tree under root once, yielding its files directory by directory as we find them, along with
+    whether they're excluded and whether their outputs already exist. Subdirectories are scanned in sorted
+    order, but each directory's files come in whatever order the filesystem lists them (see reorder()).
+    Files matching our exclude patterns (which always take precedence) are excluded and those matching
+    neither our include nor our exclude patterns aren't yielded at all. Directories are ignored, unless an
+    exclude pattern excludes their entire contents, when they're yielded as excluded without being scanned.
+
+    Args:
+        root: The directory to scan.
+        include_patterns: Glob patterns (relative to root) of the files we want.
+        exclude_patterns: Glob patterns (relative to root) of the files we don't.
+        output_suffixes: The suffixes of each file's outputs, e.g. (".srt",) for video.srt alongside video.mp4.
+        cache: Reuse (and update) the directory listings in this cache.
+
+    Yields:
+        What we found.
+    """
+    matchers = _Matchers(
+        compile_globs(include_patterns), compile_globs(exclude_patterns), _pruned_directories(exclude_patterns)
+    )
+    lister = cache.get if cache is not None else list_directory
+    # Directories still to scan, as (path, their path relative to root with a trailing "/").
+    pending = [(str(root), "")]
+    while pending:
+        directory, prefix = pending.pop()
+        try:
+            found, subdirectories = _scan_directory(directory, prefix, matchers, output_suffixes, lister)
+        except OSError:
+            # Like Path.glob(), skip directories we can't read.
+            continue
+        yield from found
+        # Scan the subdirectories depth first in sorted order, so we find files in roughly sorted order.
+        pending.extend(sorted(subdirectories, reverse=True))
+
+
+def scan_tree(
+    root: Path,
+    include_patterns: list[str],
+    exclude_patterns: list[str],
+    output_suffixes: tuple[str, ...] = (),
+    cache: ScanCache | None = None,
+) -> ScanResult:
+    """
+    Walk the tree under root once (see iter_tree()), sorting its files into those matching our
+    include patterns and those matching our exclude patterns, noting which matching files are done.
+
+    Args:
+        root: The directory to scan.
+        include_patterns: Glob patterns (relative to root) of the files we want.
+        exclude_patterns: Glob patterns (relative to root) of the files we don't.
+        output_suffixes: The suffixes of each file's outputs, e.g. (".srt",) for video.srt alongside video.mp4.
+        cache: Reuse (and update) the directory listings in this cache.
+
+    Returns:
+        The sorted matching and excluded paths, and those matching paths whose outputs all exist.
+    """
+    matching: list[Path] = []
+    excluded: list[Path] = []
+    done: set[Path] = set()
+    for entry in iter_tree(root, include_patterns, exclude_patterns, output_suffixes, cache):
+        (excluded if entry.excluded else matching).append(entry.path)
+        if entry.done:
+            done.add(entry.path)
+    return ScanResult(sorted(matching), sorted(excluded), done)
+
+
+def reorder(paths: Iterable[Path], buffer_size: int) -> Iterator[Path]:
+    """
+    Put the given paths into nearly sorted order, holding at most buffer_size of them at a time. Each
+    path we pass on is the smallest of those we hold, so a path arriving within buffer_size places of
+    its sorted position comes out in order.
+
+    Examples:
+        >>> list(reorder(map(Path, ["b", "a", "d", "c"]), 2))
+        [PosixPath('a'), PosixPath('b'), PosixPath('c'), PosixPath('d')]
+
+    Args:
+        paths: The paths, in any order.
+        buffer_size: The most paths to hold back at once (0 passes them straight on).
+
+    Yields:
+        The paths, nearly sorted.
+    """
+    buffer: list[Path] = []
+    for path in paths:
+        if len(buffer) < buffer_size:
+            heapq.heappush(buffer, path)
+        else:
+            yield heapq.heappushpop(buffer, path) if buffer else path
+    while buffer:
+        yield heapq.heappop(buffer)
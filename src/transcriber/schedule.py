@@ -0,0 +1,187 @@
+"""
+Duration aware scheduling of the files we transcribe.
+
+Transcribing files in path order with a pool of workers can leave one very long recording
+running on its own at the end, while interactively short clips wait behind long ones. Each
+candidate's duration is probed up front (with ffprobe) and kept in a MediaIndex, keyed by the
+file's size and modification time so re-runs needn't probe it again, and our work is ordered by
+one of several policies:
+
+- ``path``: in path order, as we've always done.
+- ``longest``: longest processing time first, which keeps the makespan of a batch (the time
+  until the last worker finishes) close to the best possible.
+- ``shortest``: shortest first, which minimises how long each file waits on average.
+
+The expected makespan of a schedule can be estimated for dry runs, see makespan().
+
+**Requirements:** *(none beyond the Python standard library, ffprobe is used when installed)*
+"""
+
+import heapq
+import json
+import os
+import tempfile
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+# Our scheduling policies, see the module's documentation.
+ORDERS = ("path", "longest", "shortest")
+# Bump this whenever the media index's layout changes, older indexes are then ignored.
+MEDIA_INDEX_VERSION = 1
+# How many ffprobe processes we run at once.
+PROBE_THREADS = 8
+
+
+class MediaInfo(NamedTuple):
+    """
+    What we know about a media file, along with the size and modification time it had when we probed it.
+    """
+
+    size: int
+    mtime_ns: int
+    duration: float | None
+
+
+class MediaIndex:
+    """
+    The durations of our media files, probed (in parallel) when first asked for and optionally kept
+    in a JSON file between runs. A file is probed again whenever its size or modification time changes.
+
+    Examples:
+        >>> index = MediaIndex(Path("media-index.json"))
+        >>> durations = index.durations([Path("short.mp4"), Path("long.mp4")])
+        >>> durations[Path("long.mp4")]
+        10800.0
+        >>> index.save()
+
+    Args:
+        index_file (Optional[Path]): The JSON file to keep durations in, None to keep them in memory only.
+        probe (Optional[Callable[[Path], float | None]]): How to find a file's duration, with ffprobe by default.
+    """
+
+    def __init__(self, index_file: Path | None = None, probe: Callable[[Path], float | None] | None = None) -> None:
+        self.index_file = Path(index_file).expanduser() if index_file else None
+        self._probe = probe
+        self._media: dict[str, MediaInfo] = self._load()
+        self.probed = 0
+
+    def _load(self) -> dict[str, MediaInfo]:
+        """
+        Load our index file, starting afresh if there is none or it's unreadable or out of date.
+        """
+        if self.index_file is None:
+            return {}
+        try:
+            index = json.loads(self.index_file.read_text(encoding="utf-8"))
+            if index.get("version") != MEDIA_INDEX_VERSION:
+                return {}
+            return {path: MediaInfo(*info) for path, info in index["files"].items()}
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return {}
+
+    def probe(self, path: Path) -> float | None:
+        """
+        Find the duration of the given file, in seconds, None if we can't tell.
+        """
+        if self._probe is None:
+            # Importing our audio module pulls in numpy, so we only do so when we need to.
+            from transcriber.audio import probe_duration
+
+            self._probe = probe_duration
+        return self._probe(path)
+
+    def durations(self, paths: Iterable[Path]) -> dict[Path, float | None]:
+        """
+        The duration of each of the given files, in seconds (None if we can't tell), probing any we
+        haven't seen before (or which have changed since) in parallel.
+        """
+        stats: dict[Path, os.stat_result] = {}
+        for path in paths:
+            try:
+                stats[path] = path.stat()
+            except OSError:
+                continue
+        stale = [
+            path
+            for path, stat in stats.items()
+            if (info := self._media.get(str(path))) is None
+            or (info.size, info.mtime_ns) != (stat.st_size, stat.st_mtime_ns)
+        ]
+        if stale:
+            with ThreadPoolExecutor(max_workers=PROBE_THREADS, thread_name_prefix="probe") as executor:
+                for path, duration in zip(stale, executor.map(self.probe, stale), strict=True):
+                    self._media[str(path)] = MediaInfo(stats[path].st_size, stats[path].st_mtime_ns, duration)
+            self.probed += len(stale)
+        return {path: self._media[str(path)].duration for path in stats}
+
+    def save(self) -> None:
+        """
+        Save our index, if we have an index file, replacing it atomically.
+        """
+        if self.index_file is None:
+            return
+        index = {"version": MEDIA_INDEX_VERSION, "files": {path: list(info) for path, info in self._media.items()}}
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            dir=self.index_file.parent,
+            prefix=f".{self.index_file.name}.",
+            suffix=".tmp",
+            delete=False,
+            encoding="utf-8",
+        ) as stream:
+            json.dump(index, stream)
+        os.replace(stream.name, self.index_file)
+
+
+def schedule(paths: Iterable[Path], durations: dict[Path, float | None], order: str) -> list[Path]:
+    """
+    Put the given files in the order the given policy (see ORDERS) calls for. Files whose duration we
+    don't know come last, in path order.
+
+    Examples:
+        >>> schedule(map(Path, ["a", "b", "c"]), {Path("a"): 5.0, Path("b"): 60.0, Path("c"): None}, "longest")
+        [PosixPath('b'), PosixPath('a'), PosixPath('c')]
+
+    Args:
+        paths: The files to schedule.
+        durations: The duration of each file in seconds, None when we don't know it.
+        order: The policy, "path", "longest" or "shortest".
+
+    Returns:
+        The files, in the order to transcribe them.
+    """
+    paths = sorted(paths)
+    if order == "path":
+        return paths
+    known = [path for path in paths if durations.get(path) is not None]
+    unknown = [path for path in paths if durations.get(path) is None]
+    # Sorting is stable, so files of the same duration stay in path order.
+    known.sort(key=lambda path: durations[path] or 0.0, reverse=order == "longest")
+    return known + unknown
+
+
+def makespan(durations: Iterable[float], workers: int) -> float:
+    """
+    How long the given jobs (taken in order, each by the first worker to become free) take to finish
+    on the given number of workers, in the same units as their durations.
+
+    Examples:
+        >>> makespan([1, 1, 1, 1, 4], workers=2)
+        6.0
+        >>> makespan([4, 1, 1, 1, 1], workers=2)
+        4.0
+
+    Args:
+        durations: How long each job takes, in the order they're handed out.
+        workers: How many jobs run at once.
+
+    Returns:
+        When the last job finishes.
+    """
+    finishing = [0.0] * max(1, workers)
+    for duration in durations:
+        heapq.heappush(finishing, heapq.heappop(finishing) + duration)
+    return max(finishing)
@@ -0,0 +1,382 @@
+"""
+A local transcription service, so tools wanting subtitles on demand needn't pay the cold start
+of running the command line tool for every file.
+
+A pool of worker threads, each holding its own warm model, transcribes jobs from a queue. Jobs
+name an input file (under the service's --input-path) and are submitted, followed and collected
+over a small JSON API served over HTTP or a Unix domain socket:
+
+- ``POST /jobs`` with ``{"path": "/videos/demo.mp4"}`` queues a job, answering 202 with the job.
+- ``GET /jobs/<id>`` reports a job's status (queued, running, done or failed) and its metrics.
+- ``GET /jobs/<id>/result?format=srt`` returns a finished job's transcript in any of our formats
+  (the full JSON transcription result by default).
+- ``GET /queue`` reports how many jobs are queued and running, and how many workers we have.
+- ``GET /health`` answers as soon as the service is up.
+
+There is no authentication, so the service should only listen on localhost or a Unix socket.
+
+**Requirements:** *(none beyond the Python standard library)*
+"""
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import stat
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from transcriber.state import DONE, FAILED
+from transcriber.subtitles import FORMATS, format_footer, format_header, format_segment
+from transcriber.transcribe import ModelRegistry, Transcriber, _set_torch_threads
+
+QUEUED = "queued"
+RUNNING = "running"
+# How many finished jobs (and their results) we keep for collection before forgetting the oldest.
+MAX_FINISHED_JOBS = 1000
+# What we serve each transcript format as.
+CONTENT_TYPES = {
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+    "txt": "text/plain; charset=utf-8",
+}
+
+
+@dataclass
+class Job:
+    """
+    A request to transcribe one input file, and how it went.
+    """
+
+    id: str
+    path: str
+    status: str = QUEUED
+    submitted: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    error: str | None = None
+    metrics: dict[str, Any] | None = None
+    result: dict[str, Any] | None = field(default=None, repr=False)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        The job as a JSON friendly dictionary, without its (possibly large) result.
+        """
+        job = asdict(self)
+        del job["result"]
+        return job
+
+
+def render(transcription: dict[str, Any], fmt: str) -> str:
+    """
+    Render a transcription result in the given format (see transcriber.subtitles.FORMATS).
+    """
+    segments = "".join(
+        format_segment(fmt, index, segment, "\n") for index, segment in enumerate(transcription["segments"], 1)
+    )
+    return format_header(fmt, "\n") + segments + format_footer(fmt, transcription)
+
+
+class TranscriptionService:
+    """
+    A queue of transcription jobs worked through by a pool of threads, each with a Transcriber (built from
+    our arguments) holding its own warm model. Jobs may only name files under our input path.
+
+    Examples:
+        >>> service = TranscriptionService(args, workers=2)
+        >>> service.start()
+        >>> job = service.submit(Path("/videos/demo.mp4"))
+        >>> service.get(job.id).status
+        'queued'
+        >>> service.stop()
+
+    Args:
+        args (argparse.Namespace): The arguments to build each worker's Transcriber from.
+        workers (int): How many jobs to transcribe at once, each worker with its own model.
+    """
+
+    def __init__(self, args: argparse.Namespace, workers: int = 1) -> None:
+        self.args = args
+        self.workers = workers
+        self.input_path = Path(args.input_path).expanduser().resolve()
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queue: queue.Queue[Job | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        """
+        Load each worker's model and start the workers.
+        """
+        threads_per_job = getattr(self.args, "threads_per_job", None)
+        if threads_per_job:
+            _set_torch_threads(threads_per_job)
+        for number in range(self.workers):
+            transcriber = Transcriber(self.args)
+            # Each worker keeps a model of its own rather than sharing the process wide registry's.
+            transcriber.registry = ModelRegistry(max_size=1)
+            print(f"LOADING: Warming up the {transcriber.model} model for worker {number + 1} of {self.workers}.")
+            transcriber.registry.get(transcriber.model, transcriber.device)
+            thread = threading.Thread(target=self._work, args=(transcriber,), name=f"worker-{number + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """
+        Stop the workers once they've finished their current jobs, abandoning any still queued.
+        """
+        # Take the queued jobs off the queue first, or the workers would only reach our sentinels behind them.
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                self._abandon(job)
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def submit(self, path: Path) -> Job:
+        """
+        Queue a job to transcribe the given file.
+
+        Args:
+            path: The input file, which must be under our input path.
+
+        Returns:
+            The queued job.
+
+        Raises:
+            PermissionError: If the file isn't under our input path.
+            FileNotFoundError: If the file doesn't exist.
+        """
+        path = path.expanduser().resolve()
+        if not path.is_relative_to(self.input_path):
+            raise PermissionError(f"[{path}] is not under [{self.input_path}]")  # noqa: TRY003
+        if not path.is_file():
+            raise FileNotFoundError(f"[{path}] does not exist")  # noqa: TRY003
+        job = Job(uuid.uuid4().hex, str(path))
+        with self._lock:
+            self.jobs[job.id] = job
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """
+        Return the job with the given id, None if there's no such job (or it finished long ago).
+        """
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def queue_depth(self) -> dict[str, int]:
+        """
+        How many jobs are queued and running, and how many workers we have.
+        """
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {"queued": statuses.count(QUEUED), "running": statuses.count(RUNNING), "workers": len(self._threads)}
+
+    def _work(self, transcriber: Transcriber) -> None:
+        """
+        Transcribe queued jobs until we're told to stop.
+        """
+        while (job := self._queue.get()) is not None:
+            self._run(transcriber, job)
+
+    def _run(self, transcriber: Transcriber, job: Job) -> None:
+        """
+        Transcribe a single job with the given worker's Transcriber.
+        """
+        with self._lock:
+            job.status = RUNNING
+            job.started = time.time()
+        path = Path(job.path)
+        transcriber.metrics.start(path)
+        error = None
+        try:
+            transcription = transcriber.transcribe(path)
+        except Exception as err:  # A bad input mustn't take its worker down with it.
+            transcription, error = None, f"{type(err).__name__}: {err}"
+        transcriber._clean_up(path, transcription)
+        segments = transcription["segments"] if transcription else []
+        metrics = transcriber.metrics.finish(path, DONE if transcription else FAILED, segments=len(segments))
+        with self._lock:
+            job.status = DONE if transcription else FAILED
+            job.finished = time.time()
+            job.error = None if transcription else error or "Empty transcribe() result"
+            job.metrics = metrics.to_dict()
+            job.result = transcription
+            self._forget_old_jobs()
+
+    def _abandon(self, job: Job) -> None:
+        """
+        Fail a queued job we'll never get to, as we're stopping.
+        """
+        with self._lock:
+            job.status = FAILED
+            job.finished = time.time()
+            job.error = "Abandoned, the service stopped before the job started"
+            self._forget_old_jobs()
+
+    def _forget_old_jobs(self) -> None:
+        """
+        Forget the oldest finished jobs beyond MAX_FINISHED_JOBS (call with our lock held).
+        """
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in (DONE, FAILED)]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+
+class TranscriptionRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves our JSON API (see the module's documentation) for the server's TranscriptionService.
+    """
+
+    server_version = "transcriber"
+
+    @property
+    def service(self) -> TranscriptionService:
+        """
+        The service we're serving, which make_server() hangs off the server.
+        """
+        service: TranscriptionService = self.server.service  # type: ignore[attr-defined]
+        return service
+
+    def address_string(self) -> str:
+        # Unix domain socket clients have no address.
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def do_GET(self) -> None:
+        """
+        Report on our jobs, our queue and our health.
+        """
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["health"]:
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+        elif parts == ["queue"]:
+            self._send_json(HTTPStatus.OK, self.service.queue_depth())
+        elif len(parts) in (2, 3) and parts[0] == "jobs" and parts[2:] in ([], ["result"]):
+            job = self.service.get(parts[1])
+            if job is None:
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": f"No such job [{parts[1]}]"})
+            elif len(parts) == 2:
+                self._send_json(HTTPStatus.OK, job.to_dict())
+            else:
+                self._send_result(job, parse_qs(url.query).get("format", ["json"])[0])
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"No such endpoint [{url.path}]"})
+
+    def do_POST(self) -> None:
+        """
+        Queue a job.
+        """
+        if urlsplit(self.path).path.rstrip("/") != "/jobs":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"No such endpoint [{self.path}]"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            path = Path(body["path"])
+        except (ValueError, TypeError, KeyError):
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": 'Expected a JSON body like {"path": "/videos/demo.mp4"}'})
+            return
+        try:
+            job = self.service.submit(path)
+        except PermissionError as err:
+            self._send_json(HTTPStatus.FORBIDDEN, {"error": str(err)})
+        except FileNotFoundError as err:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": str(err)})
+        else:
+            self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+
+    def _send_result(self, job: Job, fmt: str) -> None:
+        """
+        Send a finished job's transcript in the given format.
+        """
+        if fmt not in FORMATS:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": f"Unknown format [{fmt}], choose from {FORMATS}"})
+        elif job.result is None:
+            self._send_json(
+                HTTPStatus.CONFLICT, {**job.to_dict(), "error": job.error or f"Job [{job.id}] is {job.status}"}
+            )
+        else:
+            self._send(HTTPStatus.OK, render(job.result, fmt).encode("utf-8"), CONTENT_TYPES[fmt])
+
+    def _send_json(self, status: HTTPStatus, body: dict[str, Any]) -> None:
+        self._send(status, json.dumps(body).encode("utf-8"), CONTENT_TYPES["json"])
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    An HTTP server listening on a Unix domain socket, handling each request in a thread of its own.
+    """
+
+    daemon_threads = True
+    service: TranscriptionService
+
+
+class LocalHTTPServer(ThreadingHTTPServer):
+    """
+    An HTTP server listening on a TCP port, handling each request in a thread of its own.
+    """
+
+    service: TranscriptionService
+
+
+def make_server(address: str, service: TranscriptionService) -> UnixHTTPServer | LocalHTTPServer:
+    """
+    Build a server for the given service, listening on a Unix domain socket (given as "unix:PATH" or a
+    path containing a "/") or on a TCP "HOST:PORT" (port 0 picks a free port).
+    """
+    server: UnixHTTPServer | LocalHTTPServer
+    if address.startswith("unix:") or "/" in address:
+        socket_path = Path(address.removeprefix("unix:")).expanduser()
+        # Replace the socket a previous server left behind.
+        if socket_path.exists() and stat.S_ISSOCK(socket_path.stat().st_mode):
+            socket_path.unlink()
+        server = UnixHTTPServer(str(socket_path), TranscriptionRequestHandler)
+    else:
+        host, _, port = address.rpartition(":")
+        server = LocalHTTPServer((host or "127.0.0.1", int(port)), TranscriptionRequestHandler)
+    server.service = service
+    return server
+
+
+def serve(args: argparse.Namespace) -> None:
+    """
+    Run the transcription service described by our arguments until interrupted.
+    """
+    service = TranscriptionService(args, getattr(args, "jobs", None) or 1)
+    service.start()
+    server = make_server(args.listen, service)
+    print(f"SERVING: Transcribing files under [{service.input_path}] on [{args.listen}], press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        if isinstance(server, UnixHTTPServer):
+            os.unlink(str(server.server_address))
+        print("Stopped serving.")
@@ -0,0 +1,161 @@
+"""
+Deterministic sharding of the files we transcribe across machines.
+
+To spread one archive over several hosts sharing a mount, each host is given a shard ``i/N``
+(numbered from 1) and only transcribes the matching files assigned to it. By default a file's
+shard comes from a stable hash of its path relative to the input path, so every host agrees
+(wherever the archive is mounted) and adding files never moves other files between shards.
+
+Shards may instead be balanced by probed duration: the longest files are dealt out first, each
+to the shard with the least audio so far. Every host must then see the same matching files (and
+durations, e.g. from a shared media index) to agree, and new files may move others between shards.
+Files whose duration is unknown are sharded by hash.
+
+verify_shards() checks that an assignment covers a set of files exactly once, by selecting each
+shard on its own, as each host would.
+
+**Requirements:** *(none beyond the Python standard library)*
+"""
+
+import hashlib
+import heapq
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+
+class Shard(NamedTuple):
+    """
+    Shard number of total shards, numbered from 1.
+    """
+
+    number: int
+    total: int
+
+    def __str__(self) -> str:
+        return f"{self.number}/{self.total}"
+
+
+class ShardCheck(NamedTuple):
+    """
+    The files each shard selected, along with any files no shard selected or more than one did.
+    """
+
+    shards: dict[Shard, list[Path]]
+    missing: list[Path]
+    duplicated: list[Path]
+
+    @property
+    def ok(self) -> bool:
+        """
+        Do the shards cover the files exactly once?
+        """
+        return not (self.missing or self.duplicated)
+
+
+def parse_shard(value: str) -> Shard:
+    """
+    Parse a shard given as "i/N".
+
+    Examples:
+        >>> parse_shard("2/4")
+        Shard(number=2, total=4)
+
+    Raises:
+        ValueError: If the value isn't of the form "i/N" with 1 <= i <= N.
+    """
+    number, separator, total = value.partition("/")
+    if not separator:
+        raise ValueError(value)
+    shard = Shard(int(number), int(total))
+    if not 1 <= shard.number <= shard.total:
+        raise ValueError(value)
+    return shard
+
+
+def _relative_key(path: Path, root: Path) -> str:
+    """
+    The path we shard the given file by, relative to the root so it's the same on every host.
+    """
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def hash_shard(path: Path, root: Path, count: int) -> int:
+    """
+    The shard (numbered from 1) a stable hash of the given file's path, relative to the root, assigns it to.
+    """
+    digest = hashlib.sha256(_relative_key(path, root).encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def balanced_shards(
+    paths: Iterable[Path], root: Path, count: int, durations: dict[Path, float | None]
+) -> dict[Path, int]:
+    """
+    Assign the given files to count shards so each holds about as much audio: longest first, each to the
+    shard with the least audio so far. Ties are broken by relative path, so every host gets the same answer.
+
+    Args:
+        paths: The files to assign.
+        root: The input path the files were found under.
+        count: How many shards there are.
+        durations: The duration of each file in seconds, None when we don't know it (those are hashed).
+
+    Returns:
+        The shard (numbered from 1) of each file.
+    """
+    paths = list(paths)
+    known = sorted(
+        (path for path in paths if durations.get(path) is not None),
+        key=lambda path: (-(durations[path] or 0.0), _relative_key(path, root)),
+    )
+    loads = [(0.0, index) for index in range(1, count + 1)]
+    assignment = {}
+    for path in known:
+        load, index = heapq.heappop(loads)
+        assignment[path] = index
+        heapq.heappush(loads, (load + (durations[path] or 0.0), index))
+    for path in paths:
+        if path not in assignment:
+            assignment[path] = hash_shard(path, root, count)
+    return assignment
+
+
+def select_shard(
+    paths: Iterable[Path], root: Path, shard: Shard, durations: dict[Path, float | None] | None = None
+) -> list[Path]:
+    """
+    The given files which belong to the given shard, by hash or, given durations, balanced by duration.
+
+    Examples:
+        >>> select_shard(files, Path("/mnt/archive"), Shard(2, 4))
+        [PosixPath('/mnt/archive/2023/keynote.mp4'), ...]
+    """
+    paths = list(paths)
+    if durations is None:
+        return [path for path in paths if hash_shard(path, root, shard.total) == shard.number]
+    assignment = balanced_shards(paths, root, shard.total, durations)
+    return [path for path in paths if assignment[path] == shard.number]
+
+
+def verify_shards(
+    paths: Iterable[Path], root: Path, count: int, durations: dict[Path, float | None] | None = None
+) -> ShardCheck:
+    """
+    Select each of count shards of the given files independently, as each host would, and check that
+    every file is selected by exactly one of them.
+    """
+    paths = list(paths)
+    shards = {
+        Shard(index, count): select_shard(paths, root, Shard(index, count), durations) for index in range(1, count + 1)
+    }
+    selected = Counter(path for selection in shards.values() for path in selection)
+    return ShardCheck(
+        shards,
+        missing=[path for path in paths if not selected[path]],
+        duplicated=sorted(path for path, times in selected.items() if times > 1),
+    )
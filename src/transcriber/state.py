@@ -0,0 +1,184 @@
+"""
+A persistent, SQLite backed record of what happened to every input file we've seen.
+
+Each input file's size, modification time, content hash, the model used, the outcome
+(done or failed), the transcribed duration and how long transcription took are recorded so
+that re-runs over large archives can tell a current SRT file from a stale one (the video was
+replaced or a different model was used) and only transcribe new, changed or previously
+failed inputs.
+
+**Requirements:** *(none beyond the Python standard library)*
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import NamedTuple
+
+# Bump this whenever the schema changes, older databases are then rebuilt from scratch.
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT,
+    model TEXT,
+    status TEXT NOT NULL,
+    duration REAL,
+    seconds REAL,
+    error TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+DONE = "done"
+FAILED = "failed"
+
+
+class FileRecord(NamedTuple):
+    """
+    What we last recorded about an input file.
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str | None
+    model: str | None
+    status: str
+    duration: float | None
+    seconds: float | None
+    error: str | None
+    updated_at: float
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """
+        Does the file still have the size and modification time we recorded?
+        """
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+
+class StateStore:
+    """
+    The run-state database, one row per input file keyed by its absolute path.
+    Every update is committed straight away so an interrupted run loses nothing.
+    A StateStore may be shared between threads.
+
+    Examples:
+        >>> with StateStore(Path("transcriber-state.db")) as state:
+        ...     record = state.get(Path("video.mp4"))
+        ...     if record is None or record.status != DONE:
+        ...         state.record(Path("video.mp4"), DONE, model="base.en", duration=61.2, seconds=9.8)
+
+    Args:
+        db_path (Path): The SQLite database file (created if need be).
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Write ahead logging keeps the per file commits cheap.
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            with self._connection:
+                self._connection.execute("DROP TABLE IF EXISTS files")
+                self._connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        with self._connection:
+            self._connection.execute(SCHEMA)
+
+    def get(self, path: Path) -> FileRecord | None:
+        """
+        Return what we last recorded about the given input file, or None if we've never seen it.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM files WHERE path = ?", (str(path),)).fetchone()
+        return FileRecord(*row) if row else None
+
+    def record(
+        self,
+        path: Path,
+        status: str,
+        *,
+        model: str | None,
+        content_hash: str | None = None,
+        duration: float | None = None,
+        seconds: float | None = None,
+        error: str | None = None,
+        stat: os.stat_result | None = None,
+    ) -> None:
+        """
+        Record the outcome of transcribing the given input file, replacing anything recorded before.
+
+        Args:
+            path: The input file.
+            status: DONE or FAILED.
+            model: The Whisper model used (None when we adopted an SRT file we didn't write).
+            content_hash: The SHA-256 of the input file's content, if we know it.
+            duration: How many seconds of audio were transcribed.
+            seconds: How many seconds transcription took.
+            error: Why transcription failed.
+            stat: The input file's stat() result, if we already have it.
+        """
+        stat = stat or path.stat()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(path),
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    content_hash,
+                    model,
+                    status,
+                    duration,
+                    seconds,
+                    error,
+                    time.time(),
+                ),
+            )
+
+    def touch(self, path: Path, stat: os.stat_result) -> None:
+        """
+        Update the recorded size and modification time of an input file whose content hasn't changed.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (stat.st_size, stat.st_mtime_ns, str(path))
+            )
+
+    def realtime_factor(self, model: str) -> float | None:
+        """
+        The seconds taken per second of audio transcribed by the given model so far, None if we've no history.
+        """
+        with self._lock:
+            seconds, duration = self._connection.execute(
+                "SELECT SUM(seconds), SUM(duration) FROM files WHERE status = ? AND model = ? AND duration > 0",
+                (DONE, model),
+            ).fetchone()
+        return seconds / duration if seconds and duration else None
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        self._connection.close()
+
+    def __enter__(self) -> "StateStore":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,136 @@
+"""
+Lightweight, native formatters for the transcripts we write: SRT and WebVTT subtitles, the
+full JSON transcription result and plain text.
+
+Timestamps are formatted arithmetically and each transcription segment goes straight to a
+string, without building pysrt's SubRipTime and SubRipItem objects (and a SubRipFile to hold
+them) for every segment. The SRT output is byte for byte what pysrt writes: each item is its
+number, its start and end times and its text, followed by a blank line, with the platform's
+line endings.
+
+Every format is written as a header, one block per segment and a footer, so subtitles can be
+streamed segment by segment while the JSON result (which needs the whole transcription) is
+written in its footer.
+
+**Requirements:** *(none beyond the Python standard library)*
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from transcriber.cache import json_default
+
+# The transcript formats we can write, each to a file named after its input with the format as its suffix.
+FORMATS = ("srt", "vtt", "json", "txt")
+
+MILLISECONDS_PER_HOUR = 3_600_000
+MILLISECONDS_PER_MINUTE = 60_000
+
+
+def srt_timestamp(seconds: float) -> str:
+    """
+    Format a time as an SRT timestamp, HH:MM:SS,mmm. Like pysrt, any fraction of a millisecond is
+    truncated and negative times are written as zero.
+
+    Examples:
+        >>> srt_timestamp(3725.5)
+        '01:02:05,500'
+
+    Args:
+        seconds: The time in seconds.
+
+    Returns:
+        The SRT timestamp.
+    """
+    milliseconds = max(0, int(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, MILLISECONDS_PER_HOUR)
+    minutes, milliseconds = divmod(milliseconds, MILLISECONDS_PER_MINUTE)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+
+def srt_block(index: int, segment: dict[str, Any], eol: str = os.linesep) -> str:
+    """
+    Format a Whisper transcription segment as a numbered SRT subtitle, including the blank line
+    which separates it from the next one.
+
+    Examples:
+        >>> srt_block(1, {"start": 0.0, "end": 5.0, "text": " Hello."}, eol="\\n")
+        '1\\n00:00:00,000 --> 00:00:05,000\\nHello.\\n\\n'
+
+    Args:
+        index: The (one based) number of the subtitle.
+        segment: The transcription segment, with its start and end times in seconds.
+        eol: The line ending to use, the platform's by default (as pysrt does).
+
+    Returns:
+        The subtitle's text.
+    """
+    text = segment["text"].strip()
+    if eol != "\n":
+        text = text.replace("\n", eol)
+    block = f"{index}{eol}{srt_timestamp(segment['start'])} --> {srt_timestamp(segment['end'])}{eol}{text}{eol}"
+    # Subtitles without text already end with a blank line.
+    return block if block.endswith(2 * eol) else block + eol
+
+
+def vtt_timestamp(seconds: float) -> str:
+    """
+    Format a time as a WebVTT timestamp, HH:MM:SS.mmm, truncated to milliseconds and never negative.
+
+    Examples:
+        >>> vtt_timestamp(3725.5)
+        '01:02:05.500'
+    """
+    return srt_timestamp(seconds).replace(",", ".")
+
+
+def vtt_block(segment: dict[str, Any], eol: str = os.linesep) -> str:
+    """
+    Format a Whisper transcription segment as a WebVTT cue, including the blank line which ends it.
+    Blank lines would end the cue early, so they are dropped from its text.
+    """
+    text = eol.join(line for line in segment["text"].strip().splitlines() if line.strip())
+    return f"{vtt_timestamp(segment['start'])} --> {vtt_timestamp(segment['end'])}{eol}{text}{eol}{eol}"
+
+
+def output_files(input_file: Path, formats: list[str]) -> dict[str, Path]:
+    """
+    The transcript file of each of the given formats for the given input file, e.g. video.srt and video.vtt.
+    """
+    return {fmt: input_file.with_suffix(f".{fmt}") for fmt in formats}
+
+
+def format_header(fmt: str, eol: str = os.linesep) -> str:
+    """
+    What comes before the first segment of a transcript in the given format.
+    """
+    return f"WEBVTT{eol}{eol}" if fmt == "vtt" else ""
+
+
+def format_segment(fmt: str, index: int, segment: dict[str, Any], eol: str = os.linesep) -> str:
+    """
+    Format the given (one based) segment of a transcript in the given format.
+    """
+    if fmt == "srt":
+        return srt_block(index, segment, eol)
+    if fmt == "vtt":
+        return vtt_block(segment, eol)
+    if fmt == "txt":
+        text = segment["text"].strip()
+        return f"{text}{eol}" if text else ""
+    # The JSON transcript is written in one go by format_footer().
+    return ""
+
+
+def format_footer(fmt: str, transcription: dict[str, Any]) -> str:
+    """
+    What comes after the last segment of a transcript in the given format, given the whole transcription
+    result. For JSON this is the entire result, including each segment's avg_logprob, no_speech_prob and
+    compression_ratio.
+    """
+    if fmt == "json":
+        return json.dumps(transcription, ensure_ascii=False, default=json_default) + "\n"
+    return ""
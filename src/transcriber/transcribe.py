@@ -15,30 +15,160 @@ process and turn into SRT subtitle text files.
 **Requirements:** *(see pyproject.toml for versions)*:
 
 - whisper (openai/whisper)
-- pysrt
 - numpy
-- AudioSegment (pydub)
+- AudioSegment (pydub, our fallback audio decoder)
 - ffmpeg (for audio decoding, must be installed separately into the Operating System)
 """
 
 import argparse
+import json
+import multiprocessing
+import os
 import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Collection, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any
-
-import numpy as np
-import pysrt
-import whisper
-from pydub import AudioSegment
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+# Our heavy dependencies (whisper and torch, numpy and pydub) are only imported where they
+# are needed, keeping --version, --help, --dry-run and argument errors fast.
+if TYPE_CHECKING:
+    import numpy as np
+
+    from transcriber.audio_cache import AudioCache, MelCache
+    from transcriber.batch import BatchStats, WindowBatcher
+
+from transcriber.cache import TranscriptionCache, file_digest
+from transcriber.checkpoint import Checkpoint, Progress, checkpoint_path
+from transcriber.metrics import FileMetrics, MetricsRecorder, format_summary
+from transcriber.scan import ScanCache, iter_tree, reorder, scan_tree
+from transcriber.schedule import ORDERS, MediaIndex, makespan, schedule
+from transcriber.shard import Shard, hash_shard, parse_shard, select_shard, verify_shards
+from transcriber.state import DONE, FAILED, StateStore
+from transcriber.subtitles import FORMATS, format_footer, format_header, format_segment, output_files
+from transcriber.watch import StabilityTracker
 
 __VERSION__ = "1.0.0"
 
+# The English-only Whisper models we offer, kept in step with whisper._MODELS by our tests.
+ENGLISH_ONLY_MODELS = ("tiny.en", "base.en", "small.en", "medium.en")
+# The window length used by transcribe_windowed() when no --window-seconds were given.
+DEFAULT_WINDOW_SECONDS = 600
+# How many of the most recently transcribed segments we use to prompt the next window of audio.
+PROMPT_SEGMENTS = 8
+# How often watch mode looks for new files and how long their size must stay the same before we transcribe them.
+DEFAULT_POLL_SECONDS = 10
+DEFAULT_SETTLE_SECONDS = 30
+# Where --serve listens by default, localhost only as the service has no authentication.
+DEFAULT_LISTEN_ADDRESS = "127.0.0.1:8765"
+
+
+class ModelCacheInfo(NamedTuple):
+    """
+    A snapshot of a ModelRegistry's statistics, in the spirit of functools.lru_cache's cache_info().
+    """
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ModelRegistry:
+    """
+    A bounded, least-recently-used cache of loaded Whisper models keyed by model name and device.
+    Models are only loaded (lazily) the first time they are asked for, so transcribing many files
+    with the same model only pays the checkpoint deserialization cost once per process.
+
+    Examples:
+        >>> registry = ModelRegistry(max_size=1)
+        >>> model = registry.get("base.en")  # Loads the model (a miss).
+        >>> model = registry.get("base.en")  # Reuses the warm model (a hit).
+        >>> registry.cache_info()
+        ModelCacheInfo(hits=1, misses=1, maxsize=1, currsize=1)
+
+    Args:
+        max_size (int): The maximum number of models to keep loaded at once (defaults to 2).
+    """
+
+    def __init__(self, max_size: int = 2) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._models: OrderedDict[tuple[str, str | None], Any] = OrderedDict()
+        # Loading is guarded so concurrent callers never deserialize the same checkpoint twice.
+        self._lock = threading.Lock()
+
+    def get(self, name: str, device: str | None = None) -> Any:
+        """
+        Return the loaded Whisper model for the given name and device, loading it on a miss
+        and evicting the least recently used model if we would exceed max_size.
+
+        Args:
+            name: The Whisper model name e.g. "base.en".
+            device: The torch device to load the model onto, None lets whisper decide.
+
+        Returns:
+            The loaded Whisper model.
+        """
+        key = (name, device)
+        with self._lock:
+            if key in self._models:
+                self.hits += 1
+                self._models.move_to_end(key)
+                return self._models[key]
+            self.misses += 1
+            import whisper
+
+            model = whisper.load_model(name, device=device)
+            self._models[key] = model
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+            return model
+
+    def cache_info(self) -> ModelCacheInfo:
+        """
+        Report the registry's hit and miss counts along with its current and maximum size.
+        """
+        with self._lock:
+            return ModelCacheInfo(self.hits, self.misses, self.max_size, len(self._models))
+
+    def clear(self) -> None:
+        """
+        Unload every cached model and reset the hit and miss counts.
+        """
+        with self._lock:
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# The process wide model registry shared by every Transcriber instance (and library callers).
+MODEL_REGISTRY = ModelRegistry()
+
+
+class PreparedInput(NamedTuple):
+    """
+    Everything we can work out about an input file before it reaches the model, see Transcriber.prepare().
+    """
+
+    # The file's transcription cache key (None without a cache).
+    cache_key: str | None
+    # The cached transcription result, if we have one.
+    cached: dict[str, Any] | None
+    # The decoded audio, None when cached or when we'll stream the audio through the model in windows.
+    audio: "np.ndarray | None"
+
 
 class FileFilter:
     """
     A class which recursively searches the given input_path filtering files it finds
     based on a matching filename "suffix" e.g. .mp4 combined with "include" and "exclude"
-    rglob patterns.
+    rglob patterns. The tree is walked once, see transcriber.scan.
 
     Examples:
         >>> # Instantiating our FileFilter instance and obtaining matching files.
@@ -57,6 +187,9 @@ class FileFilter:
         suffix (Optional[str]): The file suffix to filter by (defaults to '.mp4').
         include_patterns (Optional[list[str]]): List of glob patterns to include.
         exclude_patterns (Optional[list[str]]): List of glob patterns to exclude.
+        output_suffixes (Optional[list[str]]): The suffixes of each file's outputs (e.g. ['.srt']), so the
+            scan can note which files are already done from its directory listings, see self.done.
+        scan_cache (Optional[ScanCache]): Reuse the directory listings of earlier scans, see transcriber.scan.
     """
 
     def __init__(
@@ -65,6 +198,8 @@ class FileFilter:
         suffix: str | None = ".mp4",
         include_patterns: list[str] | None = None,
         exclude_patterns: list[str] | None = None,
+        output_suffixes: list[str] | None = None,
+        scan_cache: ScanCache | None = None,
     ):
         self.input_path = input_path.resolve()
         self.suffix = suffix
@@ -77,41 +212,165 @@ class FileFilter:
         self.include_patterns = include_patterns or [f"**/*{self.suffix}"]
         # If no exclude patterns are provided, default to an empty list.
         self.exclude_patterns = exclude_patterns or []
+        self.output_suffixes = tuple(output_suffixes or [])
+        self.scan_cache = scan_cache
+        # The matching files whose outputs were all listed alongside them by our last scan.
+        self.done: set[Path] = set()
 
     def get_matching_files(self) -> list[Path]:
         """
-        Recursively Scans the self.input_path directory using
-        rglob patterns and returns a list of all files that match our
-        FileFilter instance's criteria (suffix, include_patterns and
-        exclude_patterns).
+        Recursively scans the self.input_path directory, in a single pass, and returns a list
+        of all files that match our FileFilter instance's criteria (suffix, include_patterns
+        and exclude_patterns). Directories our exclude patterns exclude entirely are skipped.
 
         Returns:
             A sorted list of Path objects matching the filter criteria.
         """
-        included_files: set[Path] = set()
-        for pattern in self.include_patterns:
-            # Path.glob with '**' handles recursive search automatically.
-            # This correctly interprets patterns like '**/*.mkv'.
-            for file in self.input_path.glob(pattern):
-                if file.is_file():
-                    included_files.add(file)
+        matching_files, excluded_files, self.done = scan_tree(
+            self.input_path, self.include_patterns, self.exclude_patterns, self.output_suffixes, self.scan_cache
+        )
+        self._report(len(matching_files), excluded_files)
+        return matching_files
+
+    def iter_matching_files(self, reorder_buffer: int = 0) -> Iterator[Path]:
+        """
+        Like get_matching_files() but yields each matching file as soon as the scan finds it, so work
+        can start before the scan finishes. Files are found in no particular order, which a reorder
+        buffer turns into nearly sorted order. We report on what we matched once the scan is done.
 
-        excluded_files: set[Path] = set()
-        for pattern in self.exclude_patterns:
-            for file in self.input_path.glob(pattern):
-                if file.is_file():
-                    excluded_files.add(file)
+        Args:
+            reorder_buffer: How many files to hold back to put them in order (0 yields them as found).
 
-        # The final set of files is the difference between the two sets.
-        matching_files = sorted(included_files - excluded_files)
+        Yields:
+            The matching files.
+        """
+        excluded_files: list[Path] = []
+        count = 0
+        self.done = set()
+
+        def matching() -> Iterator[Path]:
+            for entry in iter_tree(
+                self.input_path, self.include_patterns, self.exclude_patterns, self.output_suffixes, self.scan_cache
+            ):
+                if entry.excluded:
+                    excluded_files.append(entry.path)
+                    continue
+                if entry.done:
+                    self.done.add(entry.path)
+                yield entry.path
+
+        for path in reorder(matching(), reorder_buffer):
+            count += 1
+            yield path
+        self._report(count, sorted(excluded_files))
+
+    def poll(self) -> list[Path]:
+        """
+        Like get_matching_files() but without reporting on what we found, for polling the input path
+        over and over again (see Transcriber.watch()).
+
+        Returns:
+            A sorted list of Path objects matching the filter criteria.
+        """
+        matching_files, _, self.done = scan_tree(
+            self.input_path, self.include_patterns, self.exclude_patterns, self.output_suffixes, self.scan_cache
+        )
+        return matching_files
 
-        print(f"We matched {len(matching_files)} files.")
+    def _report(self, count: int, excluded_files: list[Path]) -> None:
+        """
+        Report on how many files we matched and which files our exclude rules excluded, saving our scan cache.
+        """
+        if self.scan_cache is not None:
+            self.scan_cache.save()
+            cache = self.scan_cache
+            print(f"SCAN CACHE: Reused {cache.hits} of {cache.hits + cache.misses} directory listings.")
+        print(f"We matched {count} files.")
         if excluded_files:
             print("The following files were explicitly excluded by your exclude rules:")
-            for excluded_file in sorted(excluded_files):
+            for excluded_file in excluded_files:
                 print(f"  EXCLUDED: [{excluded_file}]")
 
-        return matching_files
+
+class TranscriptWriter:
+    """
+    Writes a transcript in one or more formats (see transcriber.subtitles.FORMATS) one segment at a time,
+    as they are transcribed. Each format is written to a ".partial" file alongside its output file which
+    only replaces the output file once we've finished without error, so an interrupted transcription never
+    leaves a truncated transcript behind.
+
+    Examples:
+        >>> with TranscriptWriter({"srt": Path("video.srt"), "json": Path("video.json")}) as writer:
+        ...     writer.write_segment({"start": 0.0, "end": 5.0, "text": " Hello."})
+        ...     writer.finish(transcription)
+
+    Args:
+        output_files (dict[str, Path]): The file to write each format to.
+    """
+
+    def __init__(self, output_files: dict[str, Path]) -> None:
+        self.output_files = output_files
+        self.partial_files = {fmt: path.with_name(path.name + ".partial") for fmt, path in output_files.items()}
+        self.count = 0
+        self._discarded = False
+        # Like pysrt, write with the platform's line endings but don't let Python translate them again.
+        self._streams = {
+            fmt: open(path, "w", encoding="utf-8", newline="")  # noqa: SIM115
+            for fmt, path in self.partial_files.items()
+        }
+        for fmt, stream in self._streams.items():
+            stream.write(format_header(fmt))
+
+    def write_segment(self, segment: dict[str, Any]) -> None:
+        """
+        Append the given transcription segment to our transcripts.
+        """
+        self._write([segment])
+
+    def write_transcription(self, transcription: dict[str, Any]) -> None:
+        """
+        Write the whole of the given transcription result in one go.
+        """
+        self._write(transcription["segments"])
+        self.finish(transcription)
+
+    def finish(self, transcription: dict[str, Any]) -> None:
+        """
+        Finish our transcripts, given the whole transcription result (which is what our JSON transcript holds).
+        """
+        for fmt, stream in self._streams.items():
+            stream.write(format_footer(fmt, transcription))
+
+    def _write(self, segments: Iterable[dict[str, Any]]) -> None:
+        for segment in segments:
+            self.count += 1
+            for fmt, stream in self._streams.items():
+                stream.write(format_segment(fmt, self.count, segment))
+        for stream in self._streams.values():
+            stream.flush()
+
+    def discard(self) -> None:
+        """
+        Throw away everything written so far, leaving any existing transcripts untouched.
+        """
+        self._discarded = True
+
+    def __enter__(self) -> "TranscriptWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        for stream in self._streams.values():
+            stream.close()
+        for fmt, partial_file in self.partial_files.items():
+            if exc_type is None and not self._discarded:
+                partial_file.replace(self.output_files[fmt])
+            else:
+                partial_file.unlink(missing_ok=True)
 
 
 class Transcriber:
@@ -150,21 +409,109 @@ class Transcriber:
     force: bool
     input_path: Path
     model: Any  # The whisper model type is not explicitly defined.
+    device: str | None
+    registry: ModelRegistry
     suffix: str
+    decoder: str
+    window_seconds: int | None
+    jobs: int
+    threads_per_job: int | None
     filter: FileFilter
 
     def __init__(self, args: argparse.Namespace) -> None:
         self.input_path = Path(args.input_path).expanduser()
         self.force = args.force
         self.model = args.model
+        # Library callers may choose a torch device, otherwise whisper picks one for us.
+        self.device = getattr(args, "device", None)
+        self.registry = MODEL_REGISTRY
         self.suffix = args.suffix
+        # Which audio decoder to use, "auto" prefers ffmpeg and falls back to pydub.
+        self.decoder = getattr(args, "decoder", "auto")
+        # Transcribe in fixed windows of this many seconds (None transcribes everything at once).
+        self.window_seconds = getattr(args, "window_seconds", None)
+        # Checkpoint windowed transcriptions at most this often, so they can be resumed (None, never).
+        self.checkpoint_seconds = getattr(args, "checkpoint_seconds", None)
+        # Only send the speech regions of the audio (found by an energy based detector) to the model.
+        self.vad = getattr(args, "vad", False)
         self.dry_run = args.dry_run
-        self.filter = FileFilter(self.input_path, self.suffix, args.include, args.exclude)
+        # Parallelism is jobs (worker processes) x threads per job (torch threads within each worker).
+        self.jobs = getattr(args, "jobs", 1) or 1
+        self.threads_per_job = getattr(args, "threads_per_job", None)
+        # How many files' audio to decode ahead of the one being transcribed (0 decodes each file in turn).
+        self.prefetch = getattr(args, "prefetch", 0) or 0
+        # Decode 30 second windows from several files together in batches of this many (None, one file at a time).
+        self.batch_size = getattr(args, "batch_size", None)
+        if self.jobs > 1 and not self.threads_per_job:
+            self.threads_per_job = max(1, (os.cpu_count() or 1) // self.jobs)
+        # An optional on-disk cache of transcription results, keyed by content, model and decoding options.
+        self.cache: TranscriptionCache | None = None
+        if getattr(args, "cache_dir", None):
+            self.cache = TranscriptionCache(Path(args.cache_dir), args.cache_size * 1024 * 1024)
+        # An optional on-disk cache of decoded audio, keyed by content and decoder, shared by every model.
+        self.audio_cache: AudioCache | None = None
+        if getattr(args, "audio_cache_dir", None):
+            # Our audio cache imports numpy, so we only do so when we need to.
+            from transcriber import audio_cache
+
+            self.audio_cache = audio_cache.AudioCache(Path(args.audio_cache_dir), args.audio_cache_size * 1024 * 1024)
+        # An optional on-disk cache of the log-mel spectrograms fed to batched inference, shared by every model.
+        self.mel_cache: MelCache | None = None
+        if getattr(args, "mel_cache_dir", None):
+            from transcriber import audio_cache
+
+            self.mel_cache = audio_cache.MelCache(Path(args.mel_cache_dir), args.mel_cache_size * 1024 * 1024)
+        # The content digests prepare() worked out for our caches, kept until each file's outcome is
+        # recorded so our state database needn't read the file again.
+        self._digests: dict[Path, str] = {}
+        # An optional database of what happened to each input file, so re-runs only do what's needed.
+        self.state: StateStore | None = None
+        if getattr(args, "state_db", None):
+            self.state = StateStore(Path(args.state_db))
+        # Per-file and per-stage metrics of the current run, optionally written out when it ends.
+        self.metrics = MetricsRecorder()
+        self.metrics_file = getattr(args, "metrics", None)
+        self.prometheus_file = getattr(args, "prometheus_file", None)
+        # Start on files as soon as they're found, optionally holding a few back to put them in order.
+        self.stream_discovery = getattr(args, "stream_discovery", False)
+        self.reorder_buffer = getattr(args, "reorder_buffer", None) or 0
+        # The transcript formats to write (see transcriber.subtitles.FORMATS), just SRT by default.
+        self.formats: list[str] = getattr(args, "formats", None) or ["srt"]
+        # Optionally order our work by each file's (probed) duration, see transcriber.schedule.
+        self.order: str | None = getattr(args, "order", None)
+        # Only transcribe the matching files in this shard of them (None, all of them), see transcriber.shard.
+        self.shard: Shard | None = getattr(args, "shard", None)
+        # Balance shards by probed duration rather than sharding by a hash of each file's path.
+        self.balance_shards = getattr(args, "balance_shards", False)
+        media_index = getattr(args, "media_index", None)
+        self.media_index = MediaIndex(Path(media_index) if media_index else None)
+        # Keep running, transcribing new files as they land, optionally unloading the model when we're idle.
+        self.poll_seconds = getattr(args, "poll_seconds", None) or DEFAULT_POLL_SECONDS
+        self.settle_seconds = getattr(args, "settle_seconds", None) or DEFAULT_SETTLE_SECONDS
+        self.idle_timeout = getattr(args, "idle_timeout", None)
+        self.stop_watching = threading.Event()
+        # Keep hold of our arguments so worker processes can build their own Transcriber.
+        self.args = args
+        # Our outputs are listed alongside our inputs, so the scan can tell us which are already done.
+        # Optionally keep the scan's directory listings, so re-runs only list the directories which changed.
+        scan_cache = None
+        if getattr(args, "scan_cache", None):
+            scan_cache = ScanCache(Path(args.scan_cache), rescan=getattr(args, "rescan", False))
+        self.filter = FileFilter(
+            self.input_path, self.suffix, args.include, args.exclude, [f".{fmt}" for fmt in self.formats], scan_cache
+        )
 
-    def transcribe(self, input_file: Path) -> dict[str, Any] | None:
+    def transcribe(
+        self,
+        input_file: Path,
+        on_segment: Callable[[dict[str, Any]], None] | None = None,
+        prepared: "Future[PreparedInput] | None" = None,
+    ) -> dict[str, Any] | None:
         """
         Transcribe the audio from the given video input file and returns a dictionary of
         transcribed text and other relevant metadata. We return None if the transcription fails.
+        When a window length was requested (and ffmpeg is available) the audio is streamed
+        through the model one fixed size window at a time, see transcribe_windowed().
 
         Examples:
             >>> # Transcribe our video to our dictionary of subtitle metadata.
@@ -186,27 +533,39 @@ class Transcriber:
 
         Args:
             input_file: The root directory to scan for files.
+            on_segment: An optional callback, called with each segment as soon as it is transcribed.
+            prepared: The (possibly still running) result of prepare() for the input file, when it was
+                decoded ahead of time. We prepare the input file ourselves when this is None.
         Returns:
             A dictionary with a dictionary of transcription results, or None on failure.
         """
         try:
-            # pydub will internally use ffmpeg if it's available
-            # It will try to decode the MP4 directly.
-            # You might need to specify the format if pydub can't guess from the extension.
-            audio_segment: Any = AudioSegment.from_file(str(input_file))
-
-            # Crucially, ensure the audio is 16kHz, mono
-            # Whisper typically expects 16kHz mono float32
-            audio_segment = audio_segment.set_frame_rate(16000).set_channels(1)
-
-            audio_data: np.ndarray = np.frombuffer(audio_segment.get_array_of_samples(), dtype=np.int16)
-
-            # Convert to float32 and normalize
-            audio_data_float: np.ndarray = audio_data.astype(np.float32) / 32768.0
-
-            # Use whisper's transcribe method to get the transcription model.
-            model = whisper.load_model(self.model)
-            result: dict[str, Any] = model.transcribe(audio_data_float, fp16=False)
+            result: dict[str, Any]
+            cache_key, cached, audio_data_float = prepared.result() if prepared else self.prepare(input_file)
+            if cached is not None:
+                # A hit skips decoding and inference completely.
+                print(f"CACHED: Reusing the cached transcription of [{input_file}]")
+                if on_segment:
+                    for segment in cached["segments"]:
+                        on_segment(segment)
+                return cached
+
+            if audio_data_float is None:
+                result = self.transcribe_windowed(input_file, on_segment)
+            else:
+                # Fetch a (warm, if we've seen it before) model from our registry.
+                with self.metrics.timer(input_file, "load"):
+                    model = self.registry.get(self.model, self.device)
+                with self.metrics.timer(input_file, "infer"):
+                    result, skipped = self._infer(model, audio_data_float)
+                if self.vad:
+                    self._report_skipped(input_file, skipped, len(audio_data_float))
+                if on_segment:
+                    for segment in result["segments"]:
+                        on_segment(segment)
+
+            if self.cache and cache_key:
+                self.cache.put(cache_key, result)
         except (FileNotFoundError, ValueError, TypeError) as e:
             # Catch known potential errors.
             print(f"ERROR: skipping [{input_file}]: {e}")
@@ -214,56 +573,833 @@ class Transcriber:
         # Return our transcribe() result.
         return result
 
+    def prepare(self, input_file: Path) -> PreparedInput:
+        """
+        Do everything that comes before inference for the given input file: look its transcription up
+        in our cache and, on a miss, decode its audio (unless we'll stream it through the model in windows).
+        This is safe to run in another thread, so the next file can be prepared during inference.
+
+        Args:
+            input_file: The video file to prepare.
+
+        Returns:
+            The prepared input.
+        """
+        cache_key = None
+        content_hash = file_digest(input_file) if self.cache or self.audio_cache else None
+        if content_hash:
+            self._digests[input_file] = content_hash
+        if self.cache and content_hash:
+            cache_key = self.cache.key(content_hash, self.model, self.decoding_options())
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return PreparedInput(cache_key, cached, None)
+        if self.streams_audio:
+            return PreparedInput(cache_key, None, None)
+
+        from transcriber.audio import SAMPLE_RATE
+
+        audio = self._decode(input_file, content_hash)
+        self.metrics.set_audio_seconds(input_file, len(audio) / SAMPLE_RATE)
+        return PreparedInput(cache_key, None, audio)
+
+    def _decode(self, input_file: Path, content_hash: str | None) -> "np.ndarray":
+        """
+        Decode the given input file's audio as the 16kHz mono float32 samples Whisper expects, reusing (memory
+        mapping) its decoded audio from our audio cache when we have one.
+        """
+        from transcriber.audio import load_audio
+
+        audio_key = None
+        if self.audio_cache and content_hash:
+            audio_key = self.audio_cache.key(content_hash, self.decoder)
+            audio = self.audio_cache.get(audio_key)
+            if audio is not None:
+                print(f"CACHED: Reusing the decoded audio of [{input_file}]")
+                return audio
+        with self.metrics.timer(input_file, "decode"):
+            audio = load_audio(input_file, self.decoder)
+        if self.audio_cache and audio_key:
+            self.audio_cache.put(audio_key, audio)
+        return audio
+
+    def decoding_options(self) -> dict[str, Any]:
+        """
+        The options, beyond the model itself, which affect what a transcription produces.
+        These form part of our transcription cache keys.
+        """
+        return {
+            "fp16": False,
+            "window_seconds": self.window_seconds if self.streams_audio else None,
+            "vad": self.vad,
+            "batched": bool(self.batch_size),
+        }
+
+    def _infer(self, model: Any, audio: "np.ndarray", **options: Any) -> tuple[dict[str, Any], int]:
+        """
+        Run the model over the given audio. With voice activity detection only the audio's speech regions
+        are sent to the model and the resulting segments' times are mapped back onto the audio's timeline.
+
+        Args:
+            model: The Whisper model.
+            audio: 16kHz mono float32 samples.
+            options: Further options for the model's transcribe() method.
+
+        Returns:
+            The transcription result and how many samples of (silent) audio we skipped.
+        """
+        if not self.vad:
+            return model.transcribe(audio, fp16=False, **options), 0
+
+        from transcriber.vad import SpeechTimeline, detect_speech
+
+        timeline = SpeechTimeline(detect_speech(audio))
+        if not timeline.regions:
+            # Nothing but silence, the model needn't bother.
+            return {"text": "", "segments": [], "language": None}, len(audio)
+        result = model.transcribe(timeline.gather(audio), fp16=False, **options)
+        result["segments"] = [timeline.remap_segment(segment) for segment in result["segments"]]
+        return result, len(audio) - timeline.speech_samples
+
+    @staticmethod
+    def _report_skipped(input_file: Path, skipped: int, total: int) -> None:
+        """
+        Report how much silent audio voice activity detection kept from the model.
+        """
+        from transcriber.audio import SAMPLE_RATE
+
+        print(
+            f"VAD: Skipped {skipped / SAMPLE_RATE:.1f}s of {total / SAMPLE_RATE:.1f}s of audio "
+            f"({skipped / max(total, 1):.0%}) as silence in [{input_file}]"
+        )
+
+    @property
+    def streams_audio(self) -> bool:
+        """
+        Will we transcribe in fixed size windows streamed from ffmpeg (rather than all at once)?
+        """
+        from transcriber.audio import ffmpeg_available
+
+        return (
+            bool(self.window_seconds)
+            and not self.batch_size
+            and (self.decoder == "ffmpeg" or (self.decoder == "auto" and ffmpeg_available()))
+        )
+
+    def transcribe_windowed(
+        self, input_file: Path, on_segment: Callable[[dict[str, Any]], None] | None = None
+    ) -> dict[str, Any]:
+        """
+        Transcribe the given input file one fixed size window of audio at a time, so our memory use
+        stays roughly constant regardless of the recording's length. The segment cut off by the
+        edge of a window is carried forward and transcribed again at the start of the next window
+        and the text transcribed so far is passed on as the next window's prompt. With checkpoints
+        our progress is saved after each window (at most every checkpoint_seconds) and an earlier
+        run's progress is resumed, see transcriber.checkpoint.
+
+        Args:
+            input_file: The video file to transcribe.
+            on_segment: An optional callback, called with each segment as soon as it is transcribed.
+
+        Returns:
+            A dictionary of transcription results, in the same form whisper's transcribe() returns.
+        """
+        from transcriber.audio import SAMPLE_RATE, AudioWindowReader
+
+        with self.metrics.timer(input_file, "load"):
+            model = self.registry.get(self.model, self.device)
+        checkpoint, progress = self._resume(input_file, on_segment)
+        segments = list(progress.segments)
+        language = progress.language
+        prompt = "".join(segment["text"] for segment in segments[-PROMPT_SEGMENTS:]) or None
+        skipped = progress.skipped
+        window_seconds = self.window_seconds or DEFAULT_WINDOW_SECONDS
+        with AudioWindowReader(input_file, window_seconds, progress.next_sample / SAMPLE_RATE) as reader:
+            with self.metrics.timer(input_file, "decode"):
+                window = reader.next_window()
+            while window is not None:
+                with self.metrics.timer(input_file, "infer"):
+                    result, window_skipped = self._infer(model, window, initial_prompt=prompt)
+                skipped += window_skipped
+                language = language or result.get("language")
+                window_segments = result["segments"]
+                keep_from = None
+                if not reader.exhausted and len(window_segments) > 1:
+                    # The last segment may have been cut short by the edge of the window,
+                    # so we leave it (and the audio from its start onwards) for the next window.
+                    carried_from = round(window_segments[-1]["start"] * SAMPLE_RATE)
+                    # Only carry a tail that leaves the next window some room for new audio.
+                    if carried_from > 0 and len(window) - carried_from < len(window) // 2:
+                        window_segments = window_segments[:-1]
+                        keep_from = carried_from
+                for window_segment in window_segments:
+                    segment = {
+                        **window_segment,
+                        "id": len(segments),
+                        "seek": reader.start_sample,
+                        "start": window_segment["start"] + reader.start_seconds,
+                        "end": window_segment["end"] + reader.start_seconds,
+                    }
+                    segments.append(segment)
+                    if on_segment:
+                        on_segment(segment)
+                # Condition the next window on the most recent text, as whisper does between its own windows.
+                prompt = "".join(segment["text"] for segment in segments[-PROMPT_SEGMENTS:]) or None
+                if checkpoint:
+                    next_sample = reader.start_sample + (len(window) if keep_from is None else keep_from)
+                    checkpoint.save(Progress(next_sample, language, skipped, segments))
+                with self.metrics.timer(input_file, "decode"):
+                    window = reader.next_window(keep_from)
+        self.metrics.set_audio_seconds(input_file, reader.start_sample / SAMPLE_RATE)
+        if self.vad:
+            self._report_skipped(input_file, skipped, reader.start_sample)
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": language,
+        }
+
+    def _resume(
+        self, input_file: Path, on_segment: Callable[[dict[str, Any]], None] | None
+    ) -> tuple[Checkpoint | None, Progress]:
+        """
+        Find where a windowed transcription of the given file should start: from the beginning or, when
+        checkpointing, wherever an earlier run's checkpoint left off (handing its segments on again).
+
+        Returns:
+            Our checkpoint (None when we're not checkpointing) and the progress to start from.
+        """
+        from transcriber.audio import SAMPLE_RATE
+
+        if not self.checkpoint_seconds:
+            return None, Progress(0, None, 0, [])
+        identity = {"model": self.model, "decoder": self.decoder, "options": self.decoding_options()}
+        checkpoint = Checkpoint(input_file, identity, self.checkpoint_seconds)
+        progress = checkpoint.load()
+        if progress is None:
+            return checkpoint, Progress(0, None, 0, [])
+        print(
+            f"RESUMING: [{input_file}] from {progress.next_sample / SAMPLE_RATE:.1f}s, "
+            f"after {len(progress.segments)} checkpointed segments"
+        )
+        if on_segment:
+            for segment in progress.segments:
+                on_segment(segment)
+        return checkpoint, progress
+
     def videos_to_text(self) -> None:
         """
         Convert video files in the input path to audio and transcribe them to SRT text files
         based on the arguments given when we instantiated our Transcriber class.
+        When more than one job was requested the transcriptions are farmed out to a pool of
+        worker processes, each with its own warm model, while we write the SRT files here.
+        """
+        self.metrics = MetricsRecorder()
+        if self.jobs > 1:
+            self._videos_to_text_in_parallel()
+        elif self.batch_size:
+            self._videos_to_text_batched()
+        elif self.prefetch and not self.streams_audio:
+            self._videos_to_text_pipelined()
+        else:
+            if self.threads_per_job:
+                _set_torch_threads(self.threads_per_job)
+            for input_filename, output_file in self._files_to_transcribe():
+                self._transcribe_file(input_filename, output_file)
+
+        print("Transcription completed for all files.")
+        self._write_metrics()
+
+    def _transcribe_file(self, input_filename: Path, output_file: Path) -> None:
+        """
+        Transcribe a single input file in this process, writing its transcripts and recording the outcome.
+        """
+        print(f"PROCESSING: {input_filename} -> {output_file}...")
+        self.metrics.start(input_filename)
+        transcription: dict[str, Any] | None = None
+        started = time.perf_counter()
+        try:
+            if self.streams_audio:
+                transcription = self._stream_transcription(input_filename)
+                self._record_outcome(input_filename, transcription, time.perf_counter() - started)
+                return
+            transcription = self.transcribe(input_filename)
+        except IndexError as err:
+            print(f"ERROR: Skipping [{input_filename}] due to [{err}]")
+            self._record_outcome(input_filename, None, time.perf_counter() - started, str(err))
+            return
+        with self.metrics.timer(input_filename, "write"):
+            self._save_transcription(input_filename, transcription)
+        self._record_outcome(input_filename, transcription, time.perf_counter() - started)
+
+    def watch(self) -> None:
+        """
+        Keep running, polling our input path for new or changed matching files and transcribing each
+        one as soon as its size has stopped changing (see transcriber.watch), with a warm model. Files
+        already there when we start are treated as new, so any backlog is transcribed first. When an
+        idle timeout was given, the model is unloaded after that long without anything to transcribe
+        (and loaded again for the next file). Files which change after being transcribed are transcribed
+        again, even though their transcripts exist. Files are transcribed one at a time, in this process.
+        We stop on Ctrl+C or once stop_watching is set.
+        """
+        self.metrics = MetricsRecorder()
+        if self.threads_per_job:
+            _set_torch_threads(self.threads_per_job)
+        tracker = StabilityTracker(self.settle_seconds)
+        last_active = time.monotonic()
+        print(
+            f"WATCHING: [{self.input_path}] for new files every {self.poll_seconds} seconds "
+            f"(transcribing them once unchanged for {self.settle_seconds} seconds), press Ctrl+C to stop."
+        )
+        try:
+            while not self.stop_watching.is_set():
+                settled = tracker.update(self.filter.poll())
+                for input_filename, output_file in self._files_to_transcribe(settled, force=tracker.changed):
+                    self._transcribe_file(input_filename, output_file)
+                if settled or self._unload_if_idle(time.monotonic() - last_active):
+                    last_active = time.monotonic()
+                self.stop_watching.wait(self.poll_seconds)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print("Stopped watching for new files.")
+            if self.filter.scan_cache is not None:
+                self.filter.scan_cache.save()
+            self._write_metrics()
+
+    def _unload_if_idle(self, idle_seconds: float) -> bool:
+        """
+        Unload our models if we've been idle for longer than our idle timeout, returning whether we did.
+        """
+        if not self.idle_timeout or idle_seconds < self.idle_timeout or not self.registry.cache_info().currsize:
+            return False
+        self.registry.clear()
+        print(f"IDLE: Unloaded the model after {idle_seconds:.0f} seconds without new files.")
+        return True
+
+    def _write_metrics(self) -> None:
         """
-        # Enumerate our input files.
-        for input_filename in sorted(self.filter.get_matching_files()):
+        Print a summary of the run and write its metrics out, when asked to.
+        """
+        if not (self.metrics_file or self.prometheus_file):
+            return
+        print(format_summary(self.metrics.summary()))
+        if self.metrics_file:
+            self.metrics.write_jsonl(Path(self.metrics_file))
+        if self.prometheus_file:
+            self.metrics.write_prometheus(Path(self.prometheus_file))
+
+    def _files_to_transcribe(
+        self, input_files: Iterable[Path] | None = None, force: Collection[Path] = ()
+    ) -> Iterator[tuple[Path, Path]]:
+        """
+        Enumerate our matching input files (or the given input files), yielding (input file, output SRT file)
+        pairs for the files that actually need transcribing and reporting on those we are skipping. Files in
+        force are transcribed even if they look up to date.
+        """
+        # Balanced shards are only dealt out from the whole of the matching set.
+        balance = input_files is None and self.balance_shards
+        if input_files is None and self.stream_discovery and not (self.order or balance):
+            input_files = self.filter.iter_matching_files(self.reorder_buffer)
+        elif input_files is None:
+            input_files = self.filter.get_matching_files()
+        if self.shard:
+            input_files = self._in_shard(input_files, self.shard, balance)
+        candidates: Iterable[Path] = self._needing_transcription(input_files, force)
+        if self.order:
+            # Scheduling needs every candidate (and its duration) up front.
+            candidates = self._schedule(list(candidates))
+        for input_filename in candidates:
             if self.dry_run:
                 print(f"DRY RUN ENABLED, skipping actual transcription of [{input_filename}]")
                 continue
-            # Are we likely to overwrite an existing .srt file?
-            output_srt_file = input_filename.with_suffix(".srt")
-            if not self.force and output_srt_file.exists():
+            yield input_filename, self.output_files(input_filename)[self.formats[0]]
+
+    def _in_shard(self, input_files: Iterable[Path], shard: Shard, balance: bool) -> Iterable[Path]:
+        """
+        Pass on the given input files which belong to the given shard, by a hash of their path or, when balancing,
+        dealt out by their probed durations (reporting how much of the matching set the shard takes).
+        """
+        root = self.filter.input_path
+        if not balance:
+            return (path for path in input_files if hash_shard(path, root, shard.total) == shard.number)
+        input_files = list(input_files)
+        durations = self.media_index.durations(input_files)
+        self.media_index.save()
+        selected = select_shard(input_files, root, shard, durations)
+        hours = sum(durations.get(path) or 0.0 for path in selected) / 3600
+        total = sum(duration or 0.0 for duration in durations.values()) / 3600
+        print(
+            f"SHARD: {shard} takes {len(selected)} of {len(input_files)} matching files "
+            f"({hours:.2f} of {total:.2f} hours of audio)."
+        )
+        return selected
+
+    def verify_shards(self) -> bool:
+        """
+        Check, without transcribing anything, that our shard count divides the matching files between the
+        shards exactly once over, selecting each shard independently as each host would, and report each
+        shard's share of the files.
+
+        Returns:
+            Whether every matching file belongs to exactly one shard.
+        """
+        if self.shard is None:
+            print("ERROR: --verify-shards needs the shard count, e.g. --shard 1/4")
+            return False
+        input_files = self.filter.get_matching_files()
+        durations = self.media_index.durations(input_files) if self.balance_shards else None
+        if durations is not None:
+            self.media_index.save()
+        check = verify_shards(input_files, self.filter.input_path, self.shard.total, durations)
+        for shard, selected in check.shards.items():
+            hours = sum((durations or {}).get(path) or 0.0 for path in selected) / 3600
+            print(f"SHARD {shard}: {len(selected)} files" + (f", {hours:.2f} hours of audio" if durations else ""))
+        for path in check.missing:
+            print(f"  MISSING: [{path}] is in none of the shards")
+        for path in check.duplicated:
+            print(f"  DUPLICATED: [{path}] is in more than one shard")
+        if not check.ok:
+            print(
+                f"ERROR: The {self.shard.total} shards don't cover the {len(input_files)} matching files exactly once."
+            )
+            return False
+        print(f"VERIFIED: The {self.shard.total} shards cover the {len(input_files)} matching files exactly once.")
+        return True
+
+    def _needing_transcription(self, input_files: Iterable[Path], force: Collection[Path] = ()) -> Iterator[Path]:
+        """
+        Pass on the given input files which need transcribing (all of them on a dry run, and any in force),
+        reporting on those we are skipping.
+        """
+        for input_filename in input_files:
+            if input_filename in force:
+                yield input_filename
+                continue
+            # Are we likely to overwrite an existing transcript? We report on the first of our formats.
+            output_file = self.output_files(input_filename)[self.formats[0]]
+            if not (self.dry_run or self.force) and self._is_up_to_date(input_filename, output_file):
                 print(
                     f"SKIPPING: Transcription for [{input_filename}] already exists "
-                    f"as [{output_srt_file}] (use --force to overwrite)."
+                    f"as [{output_file}] (use --force to overwrite)."
                 )
                 continue
+            yield input_filename
 
-            print(f"PROCESSING: {input_filename} -> {output_srt_file}...")
-            transcription: dict[str, Any] | None = None
+    def _schedule(self, input_files: list[Path]) -> list[Path]:
+        """
+        Order the given input files by our scheduling policy, probing their durations, and report how long
+        we expect them to take (in hours of audio and, when our state database has seen this model at work,
+        in wall clock hours).
+        """
+        durations = self.media_index.durations(input_files)
+        self.media_index.save()
+        scheduled = schedule(input_files, durations, self.order or "path")
+        known = [duration for path in scheduled if (duration := durations.get(path)) is not None]
+        expected = makespan(known, self.jobs) / 3600
+        report = (
+            f"SCHEDULE: {len(scheduled)} files in {self.order} order, {sum(known) / 3600:.2f} hours of audio "
+            f"(durations unknown for {len(scheduled) - len(known)}), expected makespan {expected:.2f} audio-hours "
+            f"on {self.jobs} worker{'s' if self.jobs > 1 else ''}"
+        )
+        realtime_factor = self.state.realtime_factor(self.model) if self.state else None
+        if realtime_factor:
+            report += f" (about {expected * realtime_factor:.2f} hours at a real time factor of {realtime_factor:.3f})"
+        print(report + ".")
+        return scheduled
+
+    def _is_up_to_date(self, input_filename: Path, output_file: Path) -> bool:
+        """
+        Do the given input file's transcripts (in each of our formats) already exist and, when we're keeping
+        state, are they current? Transcripts are stale if their input has changed (size, modification time
+        and, when those differ, its content) or was transcribed with a different model. Failed inputs are retried.
+        """
+        # Trust the scan's directory listing when it saw the transcripts, rather than stat() each of them again.
+        transcripts_exist = input_filename in self.filter.done or all(
+            path.exists() for path in self.output_files(input_filename).values()
+        )
+        if self.state is None:
+            return transcripts_exist
+        record = self.state.get(input_filename)
+        if record is None:
+            if not transcripts_exist:
+                return False
+            # Adopt transcripts written before we kept state (the model they were made with is unknown).
+            self.state.record(input_filename, DONE, model=None)
+            return True
+        if record.status != DONE:
+            print(f"RETRYING: [{input_filename}] failed last time ({record.error}).")
+            return False
+        if not transcripts_exist:
+            return False
+        stat = input_filename.stat()
+        if record.matches(stat) and record.model in (None, self.model):
+            return True
+        if (
+            record.model in (None, self.model)
+            and record.content_hash
+            and record.size == stat.st_size
+            and file_digest(input_filename) == record.content_hash
+        ):
+            # Touched, but not changed.
+            self.state.touch(input_filename, stat)
+            return True
+        print(f"STALE: [{output_file}] is out of date, transcribing [{input_filename}] again.")
+        return False
+
+    def _clean_up(self, input_filename: Path, transcription: dict[str, Any] | None) -> str | None:
+        """
+        Forget what we kept about the given input file while transcribing it, returning the content digest
+        prepare() worked out (if any). Once a transcription has been saved, its checkpoint (if any) is no longer
+        needed either.
+        """
+        if transcription and self.checkpoint_seconds:
+            checkpoint_path(input_filename).unlink(missing_ok=True)
+        return self._digests.pop(input_filename, None)
+
+    def _record_outcome(
+        self,
+        input_filename: Path,
+        transcription: dict[str, Any] | None,
+        seconds: float,
+        error: str | None = None,
+        content_hash: str | None = None,
+    ) -> None:
+        """
+        Record the outcome of transcribing the given input file in our metrics and our state database (if we have one).
+        The file's content digest is the given one, or the one prepare() worked out, and is only computed when we
+        have neither.
+        """
+        content_hash = self._clean_up(input_filename, transcription) or content_hash
+        segments = transcription["segments"] if transcription else []
+        self.metrics.finish(
+            input_filename,
+            DONE if transcription else FAILED,
+            # Only needed when we didn't decode the audio ourselves, e.g. a cache hit.
+            audio_seconds=segments[-1]["end"] if segments else None,
+            segments=len(segments),
+            seconds=seconds,
+        )
+        if self.state is None:
+            return
+        if transcription:
+            self.state.record(
+                input_filename,
+                DONE,
+                model=self.model,
+                content_hash=content_hash or file_digest(input_filename),
+                duration=segments[-1]["end"] if segments else 0.0,
+                seconds=seconds,
+            )
+        else:
+            self.state.record(
+                input_filename, FAILED, model=self.model, seconds=seconds, error=error or "Empty transcribe() result"
+            )
+
+    def _videos_to_text_pipelined(self) -> None:
+        """
+        Transcribe our matching files with a decoder thread preparing (decoding) up to self.prefetch files
+        ahead of the one being transcribed, and a writer thread saving the SRT files, so neither decoding
+        nor writing holds up inference. The bounded look ahead limits how much decoded audio we hold at once.
+        """
+        if self.threads_per_job:
+            _set_torch_threads(self.threads_per_job)
+        files = self._files_to_transcribe()
+        pending: deque[tuple[Path, Path, Future[PreparedInput]]] = deque()
+        with (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="decoder") as decoder,
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="writer") as writer,
+        ):
+
+            def decode_next() -> None:
+                for input_filename, output_file in files:
+                    pending.append((input_filename, output_file, decoder.submit(self.prepare, input_filename)))
+                    return
+
+            # Keep the file being transcribed plus self.prefetch more in the pipeline.
+            for _ in range(self.prefetch + 1):
+                decode_next()
+            while pending:
+                input_filename, output_file, prepared = pending.popleft()
+                print(f"PROCESSING: {input_filename} -> {output_file}...")
+                self.metrics.start(input_filename)
+                started = time.perf_counter()
+                try:
+                    transcription = self.transcribe(input_filename, prepared=prepared)
+                except IndexError as err:
+                    print(f"ERROR: Skipping [{input_filename}] due to [{err}]")
+                    writer.submit(self._record_outcome, input_filename, None, time.perf_counter() - started, str(err))
+                    decode_next()
+                    continue
+                # Only now is there room for another file in the pipeline.
+                decode_next()
+                writer.submit(
+                    self._save_and_record,
+                    input_filename,
+                    transcription,
+                    time.perf_counter() - started,
+                )
+
+    def _videos_to_text_batched(self) -> None:
+        """
+        Transcribe our matching files by packing 30 second windows of their audio into batches of
+        self.batch_size windows, decoded together, rather than running the model once per file.
+        Each file's SRT file is saved as soon as the last of its windows has been decoded.
+        """
+        if self.threads_per_job:
+            _set_torch_threads(self.threads_per_job)
+        # Loaded along with the model once we have audio to decode, so dry runs (and runs with
+        # nothing left to do) never load it.
+        batcher: WindowBatcher | None = None
+        # The files waiting on their windows to be decoded, with their cache key,
+        # speech timeline (with --vad) and when we started on them.
+        waiting: dict[Path, tuple[str | None, Any, float]] = {}
+
+        def save(completed: list[tuple[Any, dict[str, Any]]]) -> None:
+            for input_filename, result in completed:
+                cache_key, timeline, started = waiting.pop(input_filename)
+                if timeline is not None:
+                    result["segments"] = [timeline.remap_segment(segment) for segment in result["segments"]]
+                if self.cache and cache_key:
+                    self.cache.put(cache_key, result)
+                self._save_and_record(input_filename, result, time.perf_counter() - started)
+
+        for input_filename, output_file in self._files_to_transcribe():
+            print(f"PROCESSING: {input_filename} -> {output_file}...")
+            self.metrics.start(input_filename)
+            started = time.perf_counter()
             try:
-                transcription = self.transcribe(input_filename)
-            except IndexError as err:
-                print(f"ERROR: Skipping [{input_filename}] due to [{err}]")
+                cache_key, cached, audio = self.prepare(input_filename)
+            except (FileNotFoundError, ValueError, TypeError) as e:
+                print(f"ERROR: skipping [{input_filename}]: {e}")
+                self._record_outcome(input_filename, None, time.perf_counter() - started, str(e))
                 continue
-            if transcription:
-                # Create a SubRipFile object to hold the subtitles.
-                subs = pysrt.SubRipFile()
-                for i, segment in enumerate(transcription["segments"]):
-                    start_time_ms = int(segment["start"] * 1000)
-                    end_time_ms = int(segment["end"] * 1000)
-                    text = segment["text"].strip()
-
-                    # Create SubRipTime objects.
-                    start_time = pysrt.SubRipTime(milliseconds=start_time_ms)
-                    end_time = pysrt.SubRipTime(milliseconds=end_time_ms)
-
-                    # Create a SubRipItem and add it to the file.
-                    sub = pysrt.SubRipItem(index=i + 1, start=start_time, end=end_time, text=text)
-                    subs.append(sub)
-
-                # Save the SRT file.
-                subs.save(output_srt_file, encoding="utf-8")
-
-                print(f"SUCCESS: Transcription saved to [{output_srt_file}]")
-            else:
+            if cached is not None or audio is None:
+                print(f"CACHED: Reusing the cached transcription of [{input_filename}]")
+                self._save_and_record(input_filename, cached, time.perf_counter() - started)
+                continue
+            timeline = None
+            if self.vad:
+                timeline, audio = self._speech_only(input_filename, audio)
+            batcher = batcher or self._window_batcher()
+            waiting[input_filename] = (cache_key, timeline, started)
+            mels = self._log_mels(input_filename, audio, batcher.model.dims.n_mels)
+            save(batcher.add(input_filename, audio, mels))
+        save(batcher.flush() if batcher else [])
+
+    def _window_batcher(self) -> "WindowBatcher":
+        """
+        Load our model and wrap it in a WindowBatcher, batching windows by our batch size.
+        """
+        from transcriber.batch import WindowBatcher
+
+        # One model serves every file, so loading it is a stage of the run rather than of any file.
+        with self.metrics.timer(None, "load"):
+            model = self.registry.get(self.model, self.device)
+        return WindowBatcher(model, self.batch_size or 1, on_batch=self._on_batch)
+
+    def _log_mels(self, input_file: Path, audio: "np.ndarray", n_mels: int) -> "np.ndarray | None":
+        """
+        The log-mel spectrogram of each 30 second window of the given audio, from our mel cache or computed
+        (and cached) in one pass, or None without a mel cache, leaving the spectrograms to the batcher.
+        """
+        if self.mel_cache is None:
+            return None
+        from transcriber.mel import audio_hash, log_mel_windows
+
+        key = self.mel_cache.key(audio_hash(audio), n_mels)
+        mels = self.mel_cache.get(key)
+        if mels is not None:
+            print(f"CACHED: Reusing the log-mel spectrograms of [{input_file}]")
+            return mels
+        with self.metrics.timer(input_file, "features"):
+            mels = log_mel_windows(audio, n_mels)
+        self.mel_cache.put(key, mels)
+        return mels
+
+    def _on_batch(self, stats: "BatchStats") -> None:
+        """
+        Report on a decoded batch and share the time it took out between its files, by how much audio each contributed.
+        """
+        _report_batch(stats)
+        for input_filename, audio_seconds in stats.file_audio_seconds.items():
+            share = audio_seconds / stats.audio_seconds if stats.audio_seconds else 0.0
+            self.metrics.add(Path(str(input_filename)), "infer", stats.seconds * share)
+
+    def _speech_only(self, input_filename: Path, audio: "np.ndarray") -> tuple[Any, "np.ndarray"]:
+        """
+        Cut the silent stretches out of the given audio, returning the speech timeline (to map segment
+        times back onto the original audio) along with the remaining audio.
+        """
+        from transcriber.vad import SpeechTimeline, detect_speech
+
+        timeline = SpeechTimeline(detect_speech(audio))
+        self._report_skipped(input_filename, len(audio) - timeline.speech_samples, len(audio))
+        return timeline, timeline.gather(audio) if timeline.regions else audio[:0]
+
+    def _save_and_record(self, input_filename: Path, transcription: dict[str, Any] | None, seconds: float) -> None:
+        """
+        Save a transcription result in our output formats and record the outcome, used by our writer thread.
+        """
+        with self.metrics.timer(input_filename, "write"):
+            self._save_transcription(input_filename, transcription)
+        self._record_outcome(input_filename, transcription, seconds)
+
+    def _videos_to_text_in_parallel(self) -> None:
+        """
+        Transcribe our matching files using a pool of self.jobs worker processes. Workers are handed
+        file paths (rather than audio) and hand back their transcription results for us to save.
+        """
+        # Spawn (rather than fork) so every worker starts with a clean torch thread pool.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=self.jobs,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.args, self.threads_per_job),
+        ) as executor:
+            futures: dict[Future[tuple[dict[str, Any] | None, FileMetrics, str | None]], Path] = {}
+            for input_filename, output_file in self._files_to_transcribe():
+                print(f"PROCESSING: {input_filename} -> {output_file}...")
+                futures[executor.submit(_transcribe_in_worker, input_filename)] = input_filename
+            for future in as_completed(futures):
+                input_filename = futures[future]
+                try:
+                    transcription, file_metrics, content_hash = future.result()
+                except IndexError as err:
+                    print(f"ERROR: Skipping [{input_filename}] due to [{err}]")
+                    self._record_outcome(input_filename, None, 0.0, str(err))
+                    continue
+                self.metrics.merge(file_metrics)
+                with self.metrics.timer(input_filename, "write"):
+                    self._save_transcription(input_filename, transcription)
+                self._record_outcome(input_filename, transcription, file_metrics.seconds, content_hash=content_hash)
+
+    def _stream_transcription(self, input_filename: Path) -> dict[str, Any] | None:
+        """
+        Transcribe the given file window by window, writing each segment to our transcripts as soon as
+        it is transcribed (rather than holding them all until the end).
+        Returns the transcription result, or None on failure.
+        """
+        outputs = self.output_files(input_filename)
+        with TranscriptWriter(outputs) as writer:
+
+            def write_segment(segment: dict[str, Any]) -> None:
+                with self.metrics.timer(input_filename, "write"):
+                    writer.write_segment(segment)
+
+            transcription = self.transcribe(input_filename, on_segment=write_segment)
+            if not transcription:
+                writer.discard()
                 print(f"ERROR: Empty transcribe() return value: [{input_filename}]")
+                return None
+            writer.finish(transcription)
+        print(f"SUCCESS: Transcription saved to [{', '.join(map(str, outputs.values()))}]")
+        return transcription
 
-        print("Transcription completed for all files.")
+    def _save_transcription(self, input_filename: Path, transcription: dict[str, Any] | None) -> None:
+        """
+        Save a transcription result in each of our output formats, reporting on our success or failure.
+        """
+        if transcription:
+            outputs = self.output_files(input_filename)
+            with TranscriptWriter(outputs) as writer:
+                writer.write_transcription(transcription)
+            print(f"SUCCESS: Transcription saved to [{', '.join(map(str, outputs.values()))}]")
+        else:
+            print(f"ERROR: Empty transcribe() return value: [{input_filename}]")
+
+    def output_files(self, input_filename: Path) -> dict[str, Path]:
+        """
+        The transcript file of each of our output formats for the given input file.
+        """
+        return output_files(input_filename, self.formats)
+
+    def convert_from_json(self) -> None:
+        """
+        Regenerate our output formats for each matching input file from its JSON transcript (as written
+        by --formats json) or, failing that, its cached transcription result, without running the model.
+        """
+        for input_filename in self.filter.get_matching_files():
+            transcription = self._stored_transcription(input_filename)
+            if transcription is None:
+                print(f"ERROR: No JSON transcript or cached transcription of [{input_filename}] to convert.")
+                continue
+            if self.dry_run:
+                print(f"DRY RUN ENABLED, skipping actual conversion of [{input_filename}]")
+                continue
+            self._save_transcription(input_filename, transcription)
+        print("Conversion completed for all files.")
+
+    def _stored_transcription(self, input_filename: Path) -> dict[str, Any] | None:
+        """
+        The given input file's transcription result from its JSON transcript or our cache, None if we have neither.
+        """
+        json_file = input_filename.with_suffix(".json")
+        if json_file.is_file():
+            transcription: dict[str, Any] = json.loads(json_file.read_text(encoding="utf-8"))
+            return transcription
+        if self.cache:
+            return self.cache.get(self.cache.key(file_digest(input_filename), self.model, self.decoding_options()))
+        return None
+
+
+class WorkerNotInitialisedError(RuntimeError):
+    """
+    Raised when a worker process is asked to transcribe before _init_worker() has run.
+    """
+
+    def __init__(self, message: str = "Worker process not initialised. Use _init_worker() as the pool initializer."):
+        super().__init__(message)
+
+
+# Each worker process gets its own Transcriber (and therefore its own warm model).
+_WORKER_TRANSCRIBER: Transcriber | None = None
+
+
+def _set_torch_threads(threads: int) -> None:
+    """
+    Limit the number of intra-op threads torch uses, so that jobs x threads doesn't oversubscribe our CPUs.
+    """
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def _report_batch(stats: "BatchStats") -> None:
+    """
+    Report the throughput of a batch of windows decoded by a WindowBatcher.
+    """
+    print(
+        f"BATCH: Decoded {stats.windows} windows from {stats.files} files "
+        f"({stats.audio_seconds:.1f}s of audio) in {stats.seconds:.2f}s, "
+        f"{stats.audio_seconds / max(stats.seconds, 1e-9):.1f}x real time"
+    )
+
+
+def _init_worker(args: argparse.Namespace, threads: int | None) -> None:
+    """
+    Process pool initializer, limits torch's threads and loads the model once at worker startup.
+    """
+    global _WORKER_TRANSCRIBER
+    if threads:
+        _set_torch_threads(threads)
+    # Only the parent process records outcomes in the state database.
+    _WORKER_TRANSCRIBER = Transcriber(argparse.Namespace(**{**vars(args), "state_db": None}))
+    _WORKER_TRANSCRIBER.registry.get(_WORKER_TRANSCRIBER.model, _WORKER_TRANSCRIBER.device)
+
+
+def _transcribe_in_worker(input_file: Path) -> tuple[dict[str, Any] | None, FileMetrics, str | None]:
+    """
+    Transcribe a single file inside a worker process using the worker's warm model,
+    returning the result along with the file's metrics (including how many seconds it took)
+    and its content digest, when the worker worked it out.
+    """
+    if _WORKER_TRANSCRIBER is None:
+        raise WorkerNotInitialisedError
+    _WORKER_TRANSCRIBER.metrics.start(input_file)
+    result = _WORKER_TRANSCRIBER.transcribe(input_file)
+    return result, _WORKER_TRANSCRIBER.metrics.pop(input_file), _WORKER_TRANSCRIBER._digests.pop(input_file, None)
 
 
 def validate_dot_suffix(value: str) -> str:
@@ -288,6 +1424,88 @@ def validate_dot_suffix(value: str) -> str:
     return value
 
 
+def validate_positive_int(value: str) -> int:
+    """
+    A custom argparse type that ensures the value is a positive (non-zero) integer.
+
+    Args:
+        value: The input string to validate.
+
+    Returns:
+        The validated integer.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is invalid.
+    """
+    if not value.isdigit() or int(value) < 1:
+        print(f"invalid count: '{value}' (must be a positive integer)")
+        raise argparse.ArgumentTypeError()
+    return int(value)
+
+
+def validate_formats(value: str) -> list[str]:
+    """
+    A custom argparse type that ensures the value is a comma separated list of transcript formats.
+
+    Args:
+        value: The input string to validate, e.g. "srt,vtt,json".
+
+    Returns:
+        The validated formats, without duplicates, in the order given.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is invalid.
+    """
+    formats = list(dict.fromkeys(fmt.strip().lower() for fmt in value.split(",")))
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        print(f"invalid formats: '{value}' (choose from {', '.join(FORMATS)})")
+        raise argparse.ArgumentTypeError()
+    return formats
+
+
+def validate_listen_address(value: str) -> str:
+    """
+    A custom argparse type that ensures the value is a TCP "HOST:PORT" or a Unix domain socket path.
+
+    Args:
+        value: The input string to validate, e.g. "127.0.0.1:8765" or "unix:/run/transcriber.sock".
+
+    Returns:
+        The validated address.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is invalid.
+    """
+    if value.startswith("unix:") or "/" in value:
+        return value
+    _, separator, port = value.rpartition(":")
+    if not separator or not port.isdigit() or int(port) > 65535:
+        print(f"invalid address: '{value}' (expected HOST:PORT or unix:PATH)")
+        raise argparse.ArgumentTypeError()
+    return value
+
+
+def validate_shard(value: str) -> Shard:
+    """
+    A custom argparse type that ensures the value is a shard "i/N", with 1 <= i <= N.
+
+    Args:
+        value: The input string to validate, e.g. "2/4".
+
+    Returns:
+        The shard.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is invalid.
+    """
+    try:
+        return parse_shard(value)
+    except ValueError:
+        print(f"invalid shard: '{value}' (expected i/N with 1 <= i <= N)")
+        raise argparse.ArgumentTypeError() from None
+
+
 def parse_and_prompt_arguments(args: list[str] | None = None) -> argparse.Namespace:
     """
     Parse command-line arguments and prompt for a subset of missing ones if in interactive mode.
@@ -329,8 +1547,47 @@ def parse_and_prompt_arguments(args: list[str] | None = None) -> argparse.Namesp
     full_parser.add_argument(
         "--suffix", type=validate_dot_suffix, default=".mp4", help="Suffix of audio files to process (default: .mp4)."
     )
-    # List of available Whisper models
-    english_only_models_list = sorted([model for model in whisper._MODELS if model.endswith(".en")])
+    full_parser.add_argument(
+        "--stream-discovery",
+        action="store_true",
+        help=(
+            "Start transcribing files as soon as they're found rather than once the whole input path has "
+            "been scanned (and sorted). The exclusion report is printed once the scan is done."
+        ),
+    )
+    full_parser.add_argument(
+        "--reorder-buffer",
+        type=validate_positive_int,
+        help=(
+            "With --stream-discovery, hold back up to this many files to transcribe them in nearly sorted "
+            "order (default: in the order they're found)."
+        ),
+    )
+    full_parser.add_argument(
+        "--formats",
+        type=validate_formats,
+        default=["srt"],
+        help=(
+            "Comma separated transcript formats to write alongside each input file from a single transcription, "
+            f"any of {', '.join(FORMATS)} (default: srt)."
+        ),
+    )
+    full_parser.add_argument(
+        "--from-json",
+        action="store_true",
+        help=(
+            "Regenerate the --formats transcripts of each matching file from its JSON transcript (or its entry in "
+            "--cache-dir) without running the model."
+        ),
+    )
+    full_parser.add_argument(
+        "--decoder",
+        choices=["auto", "ffmpeg", "pydub"],
+        default="auto",
+        help="Audio decoder to use, auto prefers ffmpeg and falls back to pydub (default: auto).",
+    )
+    # List of available Whisper models (static, so we needn't import whisper just to parse our arguments).
+    english_only_models_list = sorted(ENGLISH_ONLY_MODELS)
     english_only_models_str = ", ".join(english_only_models_list)
     full_parser.add_argument(
         "--model",
@@ -339,6 +1596,206 @@ def parse_and_prompt_arguments(args: list[str] | None = None) -> argparse.Namesp
         choices=english_only_models_list,
         help=f"Pre-trained model to use (default: base.en, available {english_only_models_str}).",
     )
+    full_parser.add_argument(
+        "--window-seconds",
+        type=validate_positive_int,
+        help=(
+            "Stream audio from ffmpeg through the model in windows of this many seconds, keeping memory use "
+            "constant for very long recordings (default: transcribe the whole file at once)."
+        ),
+    )
+    full_parser.add_argument(
+        "--checkpoint-seconds",
+        type=validate_positive_int,
+        help=(
+            "With --window-seconds, save each transcription's progress to a hidden sidecar file next to its input "
+            "at most this often, so a restarted run resumes where it left off (default: no checkpoints)."
+        ),
+    )
+    full_parser.add_argument(
+        "--vad",
+        action="store_true",
+        help="Skip silent stretches of audio (found by a cheap energy based detector) rather than transcribe them.",
+    )
+    full_parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help=(
+            "Cache transcription results in this directory, keyed by each file's content, the model and "
+            "decoding options, so renamed, moved or copied videos aren't transcribed again (default: no cache)."
+        ),
+    )
+    full_parser.add_argument(
+        "--cache-size",
+        type=validate_positive_int,
+        default=1024,
+        help="Evict the least recently used cached results beyond this many megabytes (default: 1024).",
+    )
+    full_parser.add_argument(
+        "--audio-cache-dir",
+        type=str,
+        help=(
+            "Cache each file's decoded 16kHz audio in this directory as .npy files, keyed by its content, so "
+            "re-runs (with any model) skip decoding and memory map it instead (default: no cache)."
+        ),
+    )
+    full_parser.add_argument(
+        "--audio-cache-size",
+        type=validate_positive_int,
+        default=10240,
+        help="Evict the least recently used decoded audio beyond this many megabytes (default: 10240).",
+    )
+    full_parser.add_argument(
+        "--mel-cache-dir",
+        type=str,
+        help=(
+            "With --batch-size, cache the log-mel spectrograms fed to the model in this directory, keyed by the "
+            "audio, so re-runs with any model of the same mel size skip computing them (default: no cache)."
+        ),
+    )
+    full_parser.add_argument(
+        "--mel-cache-size",
+        type=validate_positive_int,
+        default=10240,
+        help="Evict the least recently used spectrograms beyond this many megabytes (default: 10240).",
+    )
+    full_parser.add_argument(
+        "--state-db",
+        type=str,
+        help=(
+            "Record each input file's size, modification time, content hash, model and outcome in this SQLite "
+            "database so re-runs only transcribe new, changed or failed files (default: just check for SRT files)."
+        ),
+    )
+    full_parser.add_argument(
+        "--order",
+        choices=ORDERS,
+        help=(
+            "Probe each file's duration with ffprobe and transcribe the longest first (shortest overall time "
+            "with --jobs), the shortest first (least waiting) or in path order, reporting the expected "
+            "makespan (default: path order, without probing)."
+        ),
+    )
+    full_parser.add_argument(
+        "--media-index",
+        type=str,
+        help="Keep the durations --order probes in this JSON file so re-runs only probe new or changed files.",
+    )
+    full_parser.add_argument(
+        "--shard",
+        type=validate_shard,
+        help=(
+            "Only transcribe shard i of N of the matching files, e.g. 2/4, to spread one archive over several "
+            "hosts. Files are assigned by a stable hash of their path relative to the input path (default: all files)."
+        ),
+    )
+    full_parser.add_argument(
+        "--balance-shards",
+        action="store_true",
+        help=(
+            "With --shard, deal the matching files out so each shard holds about as much audio, by probed duration "
+            "(see --media-index). Every host must match the same files. Watch mode always shards by hash."
+        ),
+    )
+    full_parser.add_argument(
+        "--verify-shards",
+        action="store_true",
+        help="Check that the --shard count's shards cover the matching files exactly once, then exit.",
+    )
+    full_parser.add_argument(
+        "--scan-cache",
+        type=str,
+        help=(
+            "Keep the input folder's directory listings in this JSON file, keyed by each directory's modification "
+            "time, so re-runs only list the directories which changed (default: list every directory)."
+        ),
+    )
+    full_parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help="Ignore the listings in the --scan-cache file and list every directory again.",
+    )
+    full_parser.add_argument(
+        "--prefetch",
+        type=validate_positive_int,
+        help=(
+            "Decode the audio of this many upcoming files in a background thread while the current file is "
+            "transcribed, and write SRT files in another (default: decode and write each file in turn)."
+        ),
+    )
+    full_parser.add_argument(
+        "--batch-size",
+        type=validate_positive_int,
+        help=(
+            "Decode 30 second windows of audio from several files together in batches of this many, much faster "
+            "for folders of short clips (default: transcribe one file at a time)."
+        ),
+    )
+    full_parser.add_argument(
+        "--metrics",
+        type=str,
+        help=(
+            "Append each file's metrics (audio duration, seconds per stage, real time factor, segments and peak "
+            "memory) and a run summary to this JSON Lines file."
+        ),
+    )
+    full_parser.add_argument(
+        "--prometheus-file",
+        type=str,
+        help="Write the run's aggregate metrics to this file for the Prometheus node exporter's textfile collector.",
+    )
+    full_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Keep running with the model loaded, polling the input folder and transcribing new or changed files "
+            "as they land (one at a time) instead of exiting once the existing files are done."
+        ),
+    )
+    full_parser.add_argument(
+        "--poll-seconds",
+        type=validate_positive_int,
+        help=f"How often --watch looks for new files, in seconds (default: {DEFAULT_POLL_SECONDS}).",
+    )
+    full_parser.add_argument(
+        "--settle-seconds",
+        type=validate_positive_int,
+        help=(
+            "How long a new file's size must stay the same before --watch transcribes it, so files still being "
+            f"copied or recorded are left alone (default: {DEFAULT_SETTLE_SECONDS})."
+        ),
+    )
+    full_parser.add_argument(
+        "--idle-timeout",
+        type=validate_positive_int,
+        help="Unload the model after --watch has had nothing to transcribe for this many seconds (default: never).",
+    )
+    full_parser.add_argument(
+        "--serve",
+        action="store_true",
+        help=(
+            "Run as a local transcription service with --jobs warm model workers, taking jobs for files under "
+            "--input-path over HTTP (see --listen) and serving their status and transcripts."
+        ),
+    )
+    full_parser.add_argument(
+        "--listen",
+        type=validate_listen_address,
+        default=DEFAULT_LISTEN_ADDRESS,
+        help=f"Where --serve listens, HOST:PORT or unix:PATH for a Unix socket (default: {DEFAULT_LISTEN_ADDRESS}).",
+    )
+    full_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=validate_positive_int,
+        default=1,
+        help="Number of worker processes transcribing in parallel, each with its own model (default: 1).",
+    )
+    full_parser.add_argument(
+        "--threads-per-job",
+        type=validate_positive_int,
+        help="Torch threads used by each job (default: the number of CPUs divided by --jobs).",
+    )
     full_parser.add_argument(
         "--interactive", action="store_true", help="Run in interactive mode, prompting for missing arguments."
     )
@@ -447,8 +1904,21 @@ def main(args: list[str] | None = None) -> None:
     parsed_args: argparse.Namespace = parse_and_prompt_arguments(args)
     # Create a Transcriber instance and run the transcription.
     transcriber: Transcriber = Transcriber(parsed_args)
-    # Start the transcription process.
-    transcriber.videos_to_text()
+    # Start the transcription (or conversion) process.
+    if getattr(parsed_args, "from_json", False):
+        transcriber.convert_from_json()
+    elif getattr(parsed_args, "verify_shards", False):
+        if not transcriber.verify_shards():
+            sys.exit(1)
+    elif getattr(parsed_args, "watch", False):
+        transcriber.watch()
+    elif getattr(parsed_args, "serve", False):
+        # The server builds on our Transcriber, so it's imported only when needed.
+        from transcriber.server import serve
+
+        serve(parsed_args)
+    else:
+        transcriber.videos_to_text()
 
 
 # Entry point for script execution.
@@ -0,0 +1,125 @@
+"""
+A cheap, energy based voice activity detector used to skip long silent stretches of audio
+(common in screen recordings) before they reach the Whisper model.
+
+The audio is split into short frames and any frame louder than a threshold counts as
+speech. Nearby speech frames are merged into padded speech regions, only those regions are
+sent to the model (back to back) and the timestamps of the resulting segments are mapped
+back onto the original timeline.
+
+**Requirements:** *(see pyproject.toml for versions)*:
+
+- numpy
+"""
+
+from typing import Any
+
+import numpy as np
+
+from transcriber.audio import SAMPLE_RATE
+
+# Frames quieter than this (in dB relative to full scale) count as silence.
+DEFAULT_THRESHOLD_DB = -45.0
+# The length of the frames we measure the energy of.
+FRAME_SECONDS = 0.03
+# Gaps between speech shorter than this are kept, so we only skip silences worth skipping.
+MIN_SILENCE_SECONDS = 1.0
+# Keep this much audio either side of each speech region so we don't clip the edges of words.
+PADDING_SECONDS = 0.2
+
+
+def detect_speech(audio: np.ndarray, threshold_db: float = DEFAULT_THRESHOLD_DB) -> list[tuple[int, int]]:
+    """
+    Find the regions of the given audio which contain speech (or at least, sound).
+
+    Args:
+        audio: 16kHz mono float32 samples.
+        threshold_db: Frames quieter than this (in dBFS) count as silence.
+
+    Returns:
+        A sorted list of non-overlapping (start, end) sample ranges.
+    """
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    whole = len(audio) // frame
+    # View the audio as whole frames and measure the mean power of each, without copying or squaring a copy
+    # of the whole recording, then add any final partial frame.
+    frames = audio[: whole * frame].reshape(whole, frame)
+    power = np.einsum("ij,ij->i", frames, frames) / frame
+    tail = audio[whole * frame :]
+    if len(tail):
+        power = np.append(power, np.dot(tail, tail) / len(tail))
+    voiced = 10 * np.log10(power + 1e-10) > threshold_db
+    # Where runs of voiced frames start and stop.
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+    padding = round(PADDING_SECONDS * SAMPLE_RATE)
+    min_silence = round(MIN_SILENCE_SECONDS * SAMPLE_RATE)
+    regions: list[tuple[int, int]] = []
+    for first, stop in zip(edges[::2], edges[1::2], strict=True):
+        start = max(0, int(first) * frame - padding)
+        end = min(len(audio), int(stop) * frame + padding)
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+class SpeechTimeline:
+    """
+    Maps between the original timeline of some audio and the compacted timeline of just its speech regions.
+
+    Examples:
+        >>> timeline = SpeechTimeline(detect_speech(audio))
+        >>> result = model.transcribe(timeline.gather(audio))
+        >>> segments = [timeline.remap_segment(segment) for segment in result["segments"]]
+
+    Args:
+        regions (list[tuple[int, int]]): The speech regions as returned by detect_speech().
+    """
+
+    def __init__(self, regions: list[tuple[int, int]]) -> None:
+        self.regions = regions
+        lengths = [end - start for start, end in regions]
+        # Where each region starts on the compacted timeline.
+        self._compact_starts = np.cumsum([0, *lengths[:-1]])
+        self.speech_samples = sum(lengths)
+
+    def gather(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Return just the speech regions of the given audio, back to back.
+        """
+        return np.concatenate([audio[start:end] for start, end in self.regions])
+
+    def to_original(self, seconds: float, end: bool = False) -> float:
+        """
+        Map a time on the compacted timeline back onto the original timeline.
+
+        Args:
+            seconds: The time on the compacted timeline.
+            end: Is this the end of a segment? A time exactly between two regions then maps to the
+                end of the first region rather than the start of the second.
+
+        Returns:
+            The time on the original timeline.
+        """
+        sample = round(seconds * SAMPLE_RATE)
+        index = max(0, int(np.searchsorted(self._compact_starts, sample, side="left" if end else "right")) - 1)
+        start, stop = self.regions[index]
+        return min(stop, start + sample - int(self._compact_starts[index])) / SAMPLE_RATE
+
+    def remap_segment(self, segment: dict[str, Any]) -> dict[str, Any]:
+        """
+        Return a copy of the given transcription segment (and its words, if any) with its times mapped
+        onto the original timeline.
+        """
+        remapped = {
+            **segment,
+            "start": self.to_original(segment["start"]),
+            "end": self.to_original(segment["end"], end=True),
+        }
+        if "words" in segment:
+            remapped["words"] = [
+                {**word, "start": self.to_original(word["start"]), "end": self.to_original(word["end"], end=True)}
+                for word in segment["words"]
+            ]
+        return remapped
@@ -0,0 +1,108 @@
+"""
+Spotting new and changed input files for watch mode.
+
+Rather than being run from cron (paying for importing torch, loading the model and scanning the
+whole tree on every run) the transcriber can keep running, polling the input folder for files.
+A file may still be being copied or recorded when we first see it, so it is only handed over
+for transcription once its size and modification time have stayed the same for a while. Files
+which change after being handed over are handed over again, flagged as changed, so they can be
+transcribed again even though a transcript of their old contents exists.
+
+**Requirements:** *(none beyond the Python standard library)*
+"""
+
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+
+class FileSnapshot(NamedTuple):
+    """
+    What a file looked like when we last polled it.
+    """
+
+    size: int
+    mtime_ns: int
+
+
+class _Candidate(NamedTuple):
+    """
+    A file we're keeping an eye on: how it last looked, since when it has looked like that,
+    whether we've already handed it over in that state and whether it changed after we had
+    handed over an earlier state.
+    """
+
+    snapshot: FileSnapshot
+    since: float
+    reported: bool
+    changed: bool = False
+
+
+class StabilityTracker:
+    """
+    Tracks the files seen by successive polls, reporting each new or changed file once it has stopped
+    changing, i.e. its size and modification time have stayed the same for settle_seconds. Each file is
+    reported once per change, files which disappear are forgotten and files we can't stat() are ignored.
+    After each update, changed holds the settled files we had already reported before they changed
+    (rather than new files), whose existing transcripts are out of date.
+
+    Examples:
+        >>> tracker = StabilityTracker(settle_seconds=5)
+        >>> while True:
+        ...     for path in tracker.update(filter.poll()):
+        ...         transcribe(path, force=path in tracker.changed)
+        ...     time.sleep(2)
+
+    Args:
+        settle_seconds (float): How long a file must stay unchanged before we report it.
+        clock (Callable[[], float]): Where to get the time from, time.monotonic() by default.
+    """
+
+    def __init__(self, settle_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.settle_seconds = settle_seconds
+        self.clock = clock
+        self._candidates: dict[Path, _Candidate] = {}
+        self.changed: set[Path] = set()
+
+    def update(self, paths: Iterable[Path]) -> list[Path]:
+        """
+        Take note of the files found by the latest poll.
+
+        Args:
+            paths: Every matching file the poll found.
+
+        Returns:
+            The sorted files which have newly settled since the last poll.
+        """
+        now = self.clock()
+        candidates: dict[Path, _Candidate] = {}
+        settled = []
+        changed = set()
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot = FileSnapshot(stat.st_size, stat.st_mtime_ns)
+            candidate = self._candidates.get(path)
+            if candidate is None:
+                candidate = _Candidate(snapshot, now, False)
+            elif candidate.snapshot != snapshot:
+                candidate = _Candidate(snapshot, now, False, changed=candidate.reported or candidate.changed)
+            if not candidate.reported and now - candidate.since >= self.settle_seconds:
+                candidate = candidate._replace(reported=True)
+                settled.append(path)
+                if candidate.changed:
+                    changed.add(path)
+            candidates[path] = candidate
+        self._candidates = candidates
+        self.changed = changed
+        return sorted(settled)
+
+    @property
+    def pending(self) -> int:
+        """
+        How many files we've seen which haven't settled yet.
+        """
+        return sum(not candidate.reported for candidate in self._candidates.values())
@@ -0,0 +1,94 @@
+"""
+Helpers shared by our benchmarks: timing, deterministic synthetic audio and a stub model.
+"""
+
+import gc
+import time
+import wave
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+# Our synthetic "recordings" are sampled like a typical video's audio track.
+SOURCE_SAMPLE_RATE = 48000
+# Differences smaller than this many seconds are timing noise, not regressions.
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def best_of(function: Callable[[], Any], repeats: int = 5) -> float:
+    """
+    Time the given function, returning its fastest time in seconds (the least disturbed by other activity).
+    Like timeit, the garbage collector is paused while we time it, so its pauses don't land in random runs.
+    """
+    timings = []
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+    finally:
+        if collecting:
+            gc.enable()
+    return min(timings)
+
+
+def synthetic_speech(seconds: float, sample_rate: int = SAMPLE_RATE, channels: int = 1) -> np.ndarray:
+    """
+    Deterministic, speech-like audio: bursts of harmonics modulated at a syllable-like rate, separated
+    by stretches of near silence, as float32 samples of shape (samples, channels).
+    """
+    rng = np.random.default_rng(20250916)
+    count = int(seconds * sample_rate)
+    t = np.arange(count) / sample_rate
+    voice = sum(np.sin(2 * np.pi * 140 * harmonic * t) / harmonic for harmonic in range(1, 6))
+    syllables = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    # Talk for 8 seconds, pause for 4.
+    talking = (t % 12) < 8
+    audio = 0.2 * voice * syllables * talking + rng.normal(0, 1e-3, count)
+    return np.repeat(audio.astype(np.float32)[:, None], channels, axis=1)
+
+
+def write_wav(path: Path, audio: np.ndarray, sample_rate: int) -> Path:
+    """
+    Write float32 samples of shape (samples, channels) as a 16 bit PCM WAV file.
+    """
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(audio.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes())
+    return path
+
+
+class StubModel:
+    """
+    A stand-in for a Whisper model whose transcribe() costs next to nothing, so benchmarks using it
+    measure our own overheads. It returns one segment for every five seconds of audio.
+    """
+
+    is_multilingual = False
+
+    def transcribe(self, audio: np.ndarray, **options: Any) -> dict[str, Any]:
+        seconds = len(audio) / SAMPLE_RATE
+        segments = [
+            {"id": index, "start": start, "end": min(start + 5.0, seconds), "text": f" Segment {index}."}
+            for index, start in enumerate(np.arange(0, seconds, 5.0).tolist())
+        ]
+        return {"text": "".join(segment["text"] for segment in segments), "segments": segments, "language": "en"}
+
+
+class StubRegistry:
+    """
+    Serves the given model whatever model name is asked for, in place of a ModelRegistry.
+    """
+
+    def __init__(self, model: Any) -> None:
+        self.model = model
+
+    def get(self, name: str, device: str | None = None) -> Any:
+        return self.model
@@ -0,0 +1,156 @@
+"""
+Fixtures for our stage level benchmarks: deterministic synthetic audio and video, a stub model
+(and the real tiny.en model, when whisper can load it) and a recorder which compares each stage's
+timing with its stored baseline.
+
+Run them with "make benchmark" and re-record the baselines (on your benchmarking machine) with
+"make benchmark-baseline". The gating threshold may be changed with the BENCHMARK_THRESHOLD
+environment variable, e.g. BENCHMARK_THRESHOLD=0.25 fails any stage more than 25% slower than
+its baseline.
+
+Timings only compare with timings taken on the same machine, so the baselines record the machine
+they were taken on and only gate runs on a machine like it. Elsewhere (e.g. on CI) each stage is
+reported against its baseline without failing, unless BENCHMARK_STRICT=1. Stages which can't run
+on the recording machine (the ffmpeg and real whisper stages need ffmpeg and the tiny.en checkpoint)
+have no baseline and are only reported until they're recorded on a machine which can run them.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any
+
+import pytest
+from benchmark_helpers import NOISE_FLOOR_SECONDS, SOURCE_SAMPLE_RATE, StubModel, synthetic_speech, write_wav
+
+BASELINES_FILE = Path(__file__).with_name("baselines.json")
+# How much slower than its baseline a stage may get before we fail it.
+DEFAULT_THRESHOLD = 0.5
+
+
+def this_machine() -> dict[str, Any]:
+    """
+    What we know about the machine we're running on that its timings depend on.
+    """
+    processor = platform.processor()
+    cpuinfo = Path("/proc/cpuinfo")
+    if cpuinfo.exists():
+        names = [line.partition(":")[2].strip() for line in cpuinfo.read_text().splitlines() if "model name" in line]
+        processor = names[0] if names else processor
+    return {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": processor,
+        "cpus": os.cpu_count(),
+        "python": ".".join(platform.python_version_tuple()[:2]),
+    }
+
+
+class StageRecorder:
+    """
+    Records how long each benchmarked stage took and, when gating, fails any stage which has regressed
+    beyond the threshold compared with its stored baseline.
+    """
+
+    def __init__(self, baselines: dict[str, float], threshold: float, gating: bool = True) -> None:
+        self.baselines = baselines
+        self.threshold = threshold
+        self.gating = gating
+        self.results: dict[str, float] = {}
+
+    def check(self, stage: str, value: float, unit: str = "s", noise_floor: float = NOISE_FLOOR_SECONDS) -> None:
+        """
+        Record the stage's measurement (lower is better) and compare it with its baseline, ignoring
+        differences within the noise floor (in the measurement's units).
+        """
+        self.results[stage] = value
+        baseline = self.baselines.get(stage)
+        if baseline is None:
+            print(f"BENCHMARK: {stage} = {value:.4f}{unit} (no baseline yet, run make benchmark-baseline)")
+            return
+        change = value / baseline - 1 if baseline else 0.0
+        print(f"BENCHMARK: {stage} = {value:.4f}{unit} (baseline {baseline:.4f}{unit}, {change:+.0%})")
+        if self.gating and change > self.threshold and value - baseline > noise_floor:
+            pytest.fail(
+                f"{stage} regressed: {value:.4f}{unit} is {change:.0%} slower than its baseline of "
+                f"{baseline:.4f}{unit} (threshold {self.threshold:.0%})"
+            )
+
+
+@pytest.fixture(scope="session")
+def stage_recorder():
+    """
+    The session's stage recorder, gating only on the machine the baselines were recorded on (or with
+    BENCHMARK_STRICT=1). With BENCHMARK_UPDATE=1 the baselines are replaced by this session's results,
+    recorded as this machine's.
+    """
+    recorded = json.loads(BASELINES_FILE.read_text()) if BASELINES_FILE.exists() else {}
+    baselines = recorded.get("stages", {})
+    threshold = float(os.environ.get("BENCHMARK_THRESHOLD", DEFAULT_THRESHOLD))
+    updating = os.environ.get("BENCHMARK_UPDATE") == "1"
+    machine = this_machine()
+    gating = recorded.get("machine") == machine or os.environ.get("BENCHMARK_STRICT") == "1"
+    if not (gating or updating):
+        print(
+            f"BENCHMARK: Reporting without gating, the baselines were recorded on {recorded.get('machine')} "
+            f"rather than this {machine} (BENCHMARK_STRICT=1 gates anyway)."
+        )
+    recorder = StageRecorder({} if updating else baselines, threshold, gating)
+    yield recorder
+    if updating and recorder.results:
+        results = {stage: float(f"{value:.6g}") for stage, value in recorder.results.items()}
+        # Baselines from another machine don't compare with ours, so they're only kept along with
+        # our own when we couldn't run their stages.
+        stages = {**(baselines if gating else {}), **results}
+        BASELINES_FILE.write_text(json.dumps({"machine": machine, "stages": stages}, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(scope="session")
+def ffmpeg():
+    """
+    Skip benchmarks which need ffmpeg when it isn't installed.
+    """
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        pytest.skip("ffmpeg and ffprobe are needed to build and decode our synthetic videos")
+
+
+@pytest.fixture(scope="session")
+def synthetic_videos(ffmpeg, tmp_path_factory) -> list[Path]:
+    """
+    Three short synthetic videos (a static picture with a 48kHz stereo AAC soundtrack) built with ffmpeg.
+    """
+    directory = tmp_path_factory.mktemp("videos")
+    videos = []
+    for number, seconds in enumerate((30, 45, 60)):
+        wav = write_wav(
+            directory / f"audio {number}.wav", synthetic_speech(seconds, SOURCE_SAMPLE_RATE, 2), SOURCE_SAMPLE_RATE
+        )
+        video = directory / f"video {number}.mp4"
+        # fmt: off
+        command = [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"color=c=black:s=320x240:r=5:d={seconds}", "-i", str(wav),
+            "-shortest", "-c:v", "mpeg4", "-c:a", "aac", str(video),
+        ]
+        # fmt: on
+        subprocess.run(command, check=True)  # noqa: S603
+        wav.unlink()
+        videos.append(video)
+    return videos
+
+
+@pytest.fixture(params=["stub", "tiny.en"])
+def model(request) -> tuple[str, Any]:
+    """
+    The (name, model) to benchmark with, our stub model and the real tiny.en model (when whisper can load it).
+    """
+    if request.param == "stub":
+        return "stub", StubModel()
+    whisper = pytest.importorskip("whisper")
+    try:
+        return "tiny.en", whisper.load_model("tiny.en", device="cpu")
+    except Exception as err:  # The checkpoint may not be downloadable here.
+        pytest.skip(f"tiny.en could not be loaded: {err}")
@@ -0,0 +1,147 @@
+import argparse
+import array
+from pathlib import Path
+
+import numpy as np
+import pytest
+from benchmark_helpers import NOISE_FLOOR_SECONDS, SOURCE_SAMPLE_RATE, StubRegistry, best_of, synthetic_speech
+
+from transcriber.audio import load_audio_ffmpeg
+from transcriber.transcribe import FileFilter, ModelRegistry, Transcriber, TranscriptWriter
+from transcriber.vad import detect_speech
+
+pytestmark = pytest.mark.benchmark
+
+
+def benchmark_args(input_path: Path, **overrides) -> argparse.Namespace:
+    """
+    The arguments of a plain (forced) run over the given directory, with any overrides.
+    """
+    return argparse.Namespace(**{
+        "dry_run": False,
+        "include": None,
+        "exclude": None,
+        "force": True,
+        "input_path": str(input_path),
+        "suffix": ".mp4",
+        "model": "tiny.en",
+        "interactive": False,
+        "version": False,
+        **overrides,
+    })
+
+
+class TestStages:
+    """
+    Benchmarks of each stage of Transcriber.transcribe() and videos_to_text().
+    """
+
+    def test_decode(self, stage_recorder, synthetic_videos: list[Path]):
+        """
+        Decoding (and resampling, inside ffmpeg) a minute of 48kHz stereo AAC.
+        """
+        seconds = best_of(lambda: load_audio_ffmpeg(synthetic_videos[-1]))
+        stage_recorder.check("decode_ffmpeg_60s", seconds)
+
+    def test_resample(self, stage_recorder):
+        """
+        Resampling a minute of 48kHz stereo audio to 16kHz mono in process, as our pydub fallback does.
+        """
+        from pydub import AudioSegment
+
+        samples = (synthetic_speech(60, SOURCE_SAMPLE_RATE, 2) * 32767).astype(np.int16)
+        segment = AudioSegment(samples.tobytes(), frame_rate=SOURCE_SAMPLE_RATE, sample_width=2, channels=2)
+
+        def resample() -> np.ndarray:
+            resampled = segment.set_frame_rate(16000).set_channels(1)
+            return np.frombuffer(array.array("h", resampled.get_array_of_samples()), np.int16) / 32768.0
+
+        stage_recorder.check("resample_pydub_60s", best_of(resample))
+
+    def test_model_load(self, stage_recorder):
+        """
+        Loading the tiny.en checkpoint cold.
+        """
+        pytest.importorskip("whisper")
+        registry = ModelRegistry()
+        try:
+            seconds = best_of(lambda: (registry.clear(), registry.get("tiny.en", "cpu")), repeats=2)
+        except Exception as err:  # The checkpoint may not be downloadable here.
+            pytest.skip(f"tiny.en could not be loaded: {err}")
+        stage_recorder.check("model_load_tiny.en", seconds)
+
+    @pytest.mark.parametrize("vad", (False, True), ids=("all", "vad"))
+    def test_inference(self, stage_recorder, model, vad: bool, tmp_path: Path):
+        """
+        Inference on a minute of audio, reported as a real time factor (seconds taken per second of audio).
+        """
+        name, whisper_model = model
+        audio = synthetic_speech(60)[:, 0]
+        transcriber = Transcriber(benchmark_args(tmp_path, vad=vad))
+        seconds = best_of(lambda: transcriber._infer(whisper_model, audio), repeats=1 if name != "stub" else 3)
+        stage_recorder.check(
+            f"inference_rtf[{name}{'-vad' if vad else ''}]",
+            seconds / 60,
+            unit="x",
+            noise_floor=NOISE_FLOOR_SECONDS / 60,
+        )
+
+    def test_vad(self, stage_recorder):
+        """
+        Finding the speech in an hour of audio.
+        """
+        audio = synthetic_speech(3600)[:, 0]
+        stage_recorder.check("vad_3600s", best_of(lambda: detect_speech(audio)))
+
+    def test_srt_write(self, stage_recorder, tmp_path: Path, capsys):
+        """
+        Writing the SRT file of a twelve hour transcription, all at once and streamed segment by segment.
+        """
+        transcription = {
+            "segments": [
+                {"start": start, "end": start + 4.5, "text": f" This is subtitle number {index}."}
+                for index, start in enumerate(np.arange(0, 43200, 5.0).tolist())
+            ]
+        }
+        transcriber = Transcriber(benchmark_args(tmp_path))
+        srt_file = tmp_path / "video.srt"
+        seconds = best_of(lambda: transcriber._save_transcription(tmp_path / "video.mp4", transcription))
+        capsys.readouterr()
+        stage_recorder.check("srt_write_8640", seconds)
+
+        def stream() -> None:
+            with TranscriptWriter({"srt": srt_file}) as writer:
+                for segment in transcription["segments"]:
+                    writer.write_segment(segment)
+
+        stage_recorder.check("srt_stream_8640", best_of(stream))
+
+    def test_discovery(self, stage_recorder, tmp_path: Path, capsys):
+        """
+        Finding the matching files among 20,000 entries with ten include and exclude patterns.
+        """
+        for folder in range(200):
+            directory = tmp_path / f"course {folder // 20}" / f"lesson {folder}"
+            directory.mkdir(parents=True)
+            for number in range(50):
+                (directory / f"clip {number}.{('mp4', 'mkv', 'srt', 'png')[number % 4]}").touch()
+        file_filter = FileFilter(
+            tmp_path,
+            ".mp4",
+            include_patterns=["**/*.mp4", "**/*.mkv", "**/lesson 1*/*.png", "course 0/**/*.srt", "**/clip 1?.*"],
+            exclude_patterns=["**/course 9/**", "**/clip 7.*", "**/lesson 5/*", "**/*[!a-z].png", "course 1/**"],
+        )
+        seconds = best_of(file_filter.get_matching_files)
+        capsys.readouterr()
+        stage_recorder.check("discovery_20000", seconds)
+
+    def test_videos_to_text(self, stage_recorder, model, synthetic_videos: list[Path], capsys):
+        """
+        Transcribing our synthetic videos end to end (with a warm model).
+        """
+        name, whisper_model = model
+        transcriber = Transcriber(benchmark_args(synthetic_videos[0].parent))
+        transcriber.registry = StubRegistry(whisper_model)
+        seconds = best_of(transcriber.videos_to_text, repeats=1 if name != "stub" else 3)
+        capsys.readouterr()
+        stage_recorder.check(f"videos_to_text[{name}]", seconds)
@@ -1,6 +1,7 @@
 import argparse
 import array
 import builtins
+import io
 import sys
 from pathlib import Path
 
@@ -8,6 +9,8 @@ import numpy as np
 import pytest
 import whisper
 
+from transcriber.transcribe import MODEL_REGISTRY
+
 
 @pytest.fixture(scope="session")  # Or "function", "module", "class"
 def TEST_FILES():
@@ -168,6 +171,54 @@ class MockInputNotInitialisedError(RuntimeError):
         super().__init__(message)
 
 
+class FakePopen:
+    """
+    A stand-in for subprocess.Popen which plays the part of ffmpeg "decoding" to the given bytes.
+
+    Args:
+        stdout (bytes): What ffmpeg writes to its stdout pipe.
+        stderr (bytes): What ffmpeg writes to its stderr pipe.
+        returncode (int): ffmpeg's exit status.
+    """
+
+    def __init__(self, stdout: bytes, stderr: bytes = b"", returncode: int = 0):
+        # A small buffer size makes readinto() hand us the data in dribs and drabs, like a real pipe.
+        self.stdout = io.BufferedReader(io.BytesIO(stdout), buffer_size=7)
+        self.stderr = io.BytesIO(stderr)
+        self.returncode = returncode
+        self.commands: list[list[str]] = []
+
+    def __call__(self, command, stdout, stderr):
+        self.commands.append(command)
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def wait(self):
+        return self.returncode
+
+
+@pytest.fixture
+def fake_ffmpeg(mocker):
+    """
+    Fixture returning a callable which patches subprocess.Popen with a FakePopen "decoding" to the given bytes.
+
+    Example:
+        >>> fake_ffmpeg(samples.tobytes())
+    """
+
+    def _fake_ffmpeg(stdout: bytes, stderr: bytes = b"", returncode: int = 0) -> FakePopen:
+        fake_popen = FakePopen(stdout, stderr, returncode)
+        mocker.patch("subprocess.Popen", fake_popen)
+        return fake_popen
+
+    return _fake_ffmpeg
+
+
 @pytest.fixture
 def file_structure(tmp_path: Path, TEST_FILES: [str]) -> Path:
     """Creates a standard directory and file structure for testing."""
@@ -202,7 +253,27 @@ def help_text(english_only_models_list, english_only_models_str) -> str:
         "usage: transcribe.py [-h] [--dry-run] [--include [INCLUDE ...]]\n"
         "                     [--exclude [EXCLUDE ...]] [--force]\n"
         "                     [--input-path INPUT_PATH] [--suffix SUFFIX]\n"
+        "                     [--stream-discovery] [--reorder-buffer REORDER_BUFFER]\n"
+        "                     [--formats FORMATS] [--from-json]\n"
+        "                     [--decoder {auto,ffmpeg,pydub}]\n"
         f"                     [--model {{{','.join(english_only_models_list)}}}]\n"
+        "                     [--window-seconds WINDOW_SECONDS]\n"
+        "                     [--checkpoint-seconds CHECKPOINT_SECONDS] [--vad]\n"
+        "                     [--cache-dir CACHE_DIR] [--cache-size CACHE_SIZE]\n"
+        "                     [--audio-cache-dir AUDIO_CACHE_DIR]\n"
+        "                     [--audio-cache-size AUDIO_CACHE_SIZE]\n"
+        "                     [--mel-cache-dir MEL_CACHE_DIR]\n"
+        "                     [--mel-cache-size MEL_CACHE_SIZE] [--state-db STATE_DB]\n"
+        "                     [--order {path,longest,shortest}]\n"
+        "                     [--media-index MEDIA_INDEX] [--shard SHARD]\n"
+        "                     [--balance-shards] [--verify-shards]\n"
+        "                     [--scan-cache SCAN_CACHE] [--rescan]\n"
+        "                     [--prefetch PREFETCH] [--batch-size BATCH_SIZE]\n"
+        "                     [--metrics METRICS] [--prometheus-file PROMETHEUS_FILE]\n"
+        "                     [--watch] [--poll-seconds POLL_SECONDS]\n"
+        "                     [--settle-seconds SETTLE_SECONDS]\n"
+        "                     [--idle-timeout IDLE_TIMEOUT] [--serve] [--listen LISTEN]\n"
+        "                     [--jobs JOBS] [--threads-per-job THREADS_PER_JOB]\n"
         "                     [--interactive] [--version]\n"
         "\n"
         "Transcribe audio files using a pre-trained model.\n"
@@ -221,9 +292,132 @@ def help_text(english_only_models_list, english_only_models_str) -> str:
         "                        Directory containing input audio files (required in\n"
         "                        non-interactive mode).\n"
         "  --suffix SUFFIX       Suffix of audio files to process (default: .mp4).\n"
+        "  --stream-discovery    Start transcribing files as soon as they're found\n"
+        "                        rather than once the whole input path has been scanned\n"
+        "                        (and sorted). The exclusion report is printed once the\n"
+        "                        scan is done.\n"
+        "  --reorder-buffer REORDER_BUFFER\n"
+        "                        With --stream-discovery, hold back up to this many\n"
+        "                        files to transcribe them in nearly sorted order\n"
+        "                        (default: in the order they're found).\n"
+        "  --formats FORMATS     Comma separated transcript formats to write alongside\n"
+        "                        each input file from a single transcription, any of\n"
+        "                        srt, vtt, json, txt (default: srt).\n"
+        "  --from-json           Regenerate the --formats transcripts of each matching\n"
+        "                        file from its JSON transcript (or its entry in\n"
+        "                        --cache-dir) without running the model.\n"
+        "  --decoder {auto,ffmpeg,pydub}\n"
+        "                        Audio decoder to use, auto prefers ffmpeg and falls\n"
+        "                        back to pydub (default: auto).\n"
         f"  --model {{{','.join(english_only_models_list)}}}\n"
         "                        Pre-trained model to use (default: base.en, available\n"
         f"                        {english_only_models_str}).\n"
+        "  --window-seconds WINDOW_SECONDS\n"
+        "                        Stream audio from ffmpeg through the model in windows\n"
+        "                        of this many seconds, keeping memory use constant for\n"
+        "                        very long recordings (default: transcribe the whole\n"
+        "                        file at once).\n"
+        "  --checkpoint-seconds CHECKPOINT_SECONDS\n"
+        "                        With --window-seconds, save each transcription's\n"
+        "                        progress to a hidden sidecar file next to its input at\n"
+        "                        most this often, so a restarted run resumes where it\n"
+        "                        left off (default: no checkpoints).\n"
+        "  --vad                 Skip silent stretches of audio (found by a cheap\n"
+        "                        energy based detector) rather than transcribe them.\n"
+        "  --cache-dir CACHE_DIR\n"
+        "                        Cache transcription results in this directory, keyed\n"
+        "                        by each file's content, the model and decoding\n"
+        "                        options, so renamed, moved or copied videos aren't\n"
+        "                        transcribed again (default: no cache).\n"
+        "  --cache-size CACHE_SIZE\n"
+        "                        Evict the least recently used cached results beyond\n"
+        "                        this many megabytes (default: 1024).\n"
+        "  --audio-cache-dir AUDIO_CACHE_DIR\n"
+        "                        Cache each file's decoded 16kHz audio in this\n"
+        "                        directory as .npy files, keyed by its content, so re-\n"
+        "                        runs (with any model) skip decoding and memory map it\n"
+        "                        instead (default: no cache).\n"
+        "  --audio-cache-size AUDIO_CACHE_SIZE\n"
+        "                        Evict the least recently used decoded audio beyond\n"
+        "                        this many megabytes (default: 10240).\n"
+        "  --mel-cache-dir MEL_CACHE_DIR\n"
+        "                        With --batch-size, cache the log-mel spectrograms fed\n"
+        "                        to the model in this directory, keyed by the audio, so\n"
+        "                        re-runs with any model of the same mel size skip\n"
+        "                        computing them (default: no cache).\n"
+        "  --mel-cache-size MEL_CACHE_SIZE\n"
+        "                        Evict the least recently used spectrograms beyond this\n"
+        "                        many megabytes (default: 10240).\n"
+        "  --state-db STATE_DB   Record each input file's size, modification time,\n"
+        "                        content hash, model and outcome in this SQLite\n"
+        "                        database so re-runs only transcribe new, changed or\n"
+        "                        failed files (default: just check for SRT files).\n"
+        "  --order {path,longest,shortest}\n"
+        "                        Probe each file's duration with ffprobe and transcribe\n"
+        "                        the longest first (shortest overall time with --jobs),\n"
+        "                        the shortest first (least waiting) or in path order,\n"
+        "                        reporting the expected makespan (default: path order,\n"
+        "                        without probing).\n"
+        "  --media-index MEDIA_INDEX\n"
+        "                        Keep the durations --order probes in this JSON file so\n"
+        "                        re-runs only probe new or changed files.\n"
+        "  --shard SHARD         Only transcribe shard i of N of the matching files,\n"
+        "                        e.g. 2/4, to spread one archive over several hosts.\n"
+        "                        Files are assigned by a stable hash of their path\n"
+        "                        relative to the input path (default: all files).\n"
+        "  --balance-shards      With --shard, deal the matching files out so each\n"
+        "                        shard holds about as much audio, by probed duration\n"
+        "                        (see --media-index). Every host must match the same\n"
+        "                        files. Watch mode always shards by hash.\n"
+        "  --verify-shards       Check that the --shard count's shards cover the\n"
+        "                        matching files exactly once, then exit.\n"
+        "  --scan-cache SCAN_CACHE\n"
+        "                        Keep the input folder's directory listings in this\n"
+        "                        JSON file, keyed by each directory's modification\n"
+        "                        time, so re-runs only list the directories which\n"
+        "                        changed (default: list every directory).\n"
+        "  --rescan              Ignore the listings in the --scan-cache file and list\n"
+        "                        every directory again.\n"
+        "  --prefetch PREFETCH   Decode the audio of this many upcoming files in a\n"
+        "                        background thread while the current file is\n"
+        "                        transcribed, and write SRT files in another (default:\n"
+        "                        decode and write each file in turn).\n"
+        "  --batch-size BATCH_SIZE\n"
+        "                        Decode 30 second windows of audio from several files\n"
+        "                        together in batches of this many, much faster for\n"
+        "                        folders of short clips (default: transcribe one file\n"
+        "                        at a time).\n"
+        "  --metrics METRICS     Append each file's metrics (audio duration, seconds\n"
+        "                        per stage, real time factor, segments and peak memory)\n"
+        "                        and a run summary to this JSON Lines file.\n"
+        "  --prometheus-file PROMETHEUS_FILE\n"
+        "                        Write the run's aggregate metrics to this file for the\n"
+        "                        Prometheus node exporter's textfile collector.\n"
+        "  --watch               Keep running with the model loaded, polling the input\n"
+        "                        folder and transcribing new or changed files as they\n"
+        "                        land (one at a time) instead of exiting once the\n"
+        "                        existing files are done.\n"
+        "  --poll-seconds POLL_SECONDS\n"
+        "                        How often --watch looks for new files, in seconds\n"
+        "                        (default: 10).\n"
+        "  --settle-seconds SETTLE_SECONDS\n"
+        "                        How long a new file's size must stay the same before\n"
+        "                        --watch transcribes it, so files still being copied or\n"
+        "                        recorded are left alone (default: 30).\n"
+        "  --idle-timeout IDLE_TIMEOUT\n"
+        "                        Unload the model after --watch has had nothing to\n"
+        "                        transcribe for this many seconds (default: never).\n"
+        "  --serve               Run as a local transcription service with --jobs warm\n"
+        "                        model workers, taking jobs for files under --input-\n"
+        "                        path over HTTP (see --listen) and serving their status\n"
+        "                        and transcripts.\n"
+        "  --listen LISTEN       Where --serve listens, HOST:PORT or unix:PATH for a\n"
+        "                        Unix socket (default: 127.0.0.1:8765).\n"
+        "  --jobs, -j JOBS       Number of worker processes transcribing in parallel,\n"
+        "                        each with its own model (default: 1).\n"
+        "  --threads-per-job THREADS_PER_JOB\n"
+        "                        Torch threads used by each job (default: the number of\n"
+        "                        CPUs divided by --jobs).\n"
         "  --interactive         Run in interactive mode, prompting for missing\n"
         "                        arguments.\n"
         "  --version, -v         Show program's version number and exit.\n"
@@ -242,7 +436,41 @@ def mock_args(tmp_path: Path):
         --force: If set to True, existing transcription files will be overwritten.
         --input-path: Path to the directory containing video files to transcribe.
         --suffix: Suffix for the video files to transcribe.
+        --stream-discovery: Start transcribing files as soon as they're found.
+        --reorder-buffer: How many streamed files to hold back to put them in order.
+        --formats: Transcript formats to write (srt, vtt, json and txt).
+        --from-json: Regenerate transcripts from JSON transcripts instead of transcribing.
+        --decoder: Audio decoder to use (auto, ffmpeg or pydub).
+        --window-seconds: Transcribe in windows of this many seconds streamed from ffmpeg.
+        --checkpoint-seconds: Checkpoint windowed transcriptions at most this often.
+        --vad: Skip silent stretches of audio.
+        --cache-dir: Directory to cache transcription results in.
+        --cache-size: Megabytes of transcription results to cache.
+        --audio-cache-dir: Directory to cache decoded audio in.
+        --audio-cache-size: Megabytes of decoded audio to cache.
+        --mel-cache-dir: Directory to cache log-mel spectrograms in.
+        --mel-cache-size: Megabytes of log-mel spectrograms to cache.
+        --state-db: SQLite database recording what happened to each input file.
+        --order: Transcribe files in path, longest first or shortest first order.
+        --media-index: JSON file keeping the durations --order probes.
+        --shard: Only transcribe this shard (i/N) of the matching files.
+        --balance-shards: Balance shards by probed duration.
+        --verify-shards: Check the shards cover the matching files exactly once.
+        --scan-cache: JSON file keeping directory listings between runs.
+        --rescan: Ignore the cached directory listings.
+        --prefetch: How many files to decode ahead of the one being transcribed.
+        --batch-size: How many 30 second windows of audio to decode together.
+        --metrics: JSON Lines file to append per-file metrics and a run summary to.
+        --prometheus-file: Prometheus textfile collector file to write the run's metrics to.
         --model: Whisper model to use for transcription.
+        --watch: Keep running, transcribing new files as they land.
+        --poll-seconds: How often --watch looks for new files.
+        --settle-seconds: How long a new file's size must stay the same before --watch transcribes it.
+        --idle-timeout: Unload the model after --watch has been idle this many seconds.
+        --serve: Run as a local transcription service.
+        --listen: Where --serve listens, HOST:PORT or unix:PATH.
+        --jobs: Number of worker processes transcribing in parallel.
+        --threads-per-job: Torch threads used by each job.
         --interactive: If set to True, enables interactive mode for user prompts.
         --version: If set to True, displays the version information and exit.
     Note: No options triggers interactive mode by default.
@@ -257,7 +485,41 @@ def mock_args(tmp_path: Path):
         force=False,
         input_path=str(tmp_path),
         suffix=".mp4",
+        stream_discovery=False,
+        reorder_buffer=None,
+        formats=["srt"],
+        from_json=False,
+        decoder="auto",
+        window_seconds=None,
+        checkpoint_seconds=None,
+        vad=False,
+        cache_dir=None,
+        cache_size=1024,
+        audio_cache_dir=None,
+        audio_cache_size=10240,
+        mel_cache_dir=None,
+        mel_cache_size=10240,
+        state_db=None,
+        order=None,
+        media_index=None,
+        shard=None,
+        balance_shards=False,
+        verify_shards=False,
+        scan_cache=None,
+        rescan=False,
+        prefetch=None,
+        batch_size=None,
+        metrics=None,
+        prometheus_file=None,
         model="base.en",
+        watch=False,
+        poll_seconds=None,
+        settle_seconds=None,
+        idle_timeout=None,
+        serve=False,
+        listen="127.0.0.1:8765",
+        jobs=1,
+        threads_per_job=None,
         interactive=False,
         version=False,
     )
@@ -336,12 +598,24 @@ def mock_input(monkeypatch):
     monkeypatch.setattr(builtins, "input", original_input)
 
 
+@pytest.fixture(autouse=True)
+def clear_model_registry():
+    """
+    Ensure no (mock) model loaded by one test is served warm to the next.
+    """
+    MODEL_REGISTRY.clear()
+    yield
+    MODEL_REGISTRY.clear()
+
+
 @pytest.fixture
 def mock_transcription_deps(mocker, monkeypatch):
     """
     Fixture to mock the primary dependencies for the transcription process:
     pydub.AudioSegment.from_file and whisper.load_model.
     """
+    # Hide ffmpeg so the "auto" decoder falls back to our mocked pydub.
+    mocker.patch("shutil.which", return_value=None)
     # sample int16 data
     samples = np.array([0, 1000, -1000, 32767, -32768], dtype=np.int16)
     arr = array.array("h", samples.tolist())  # 'h' = signed short (int16)
@@ -0,0 +1,187 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from transcriber import audio
+from transcriber.audio import (
+    AudioDecodeError,
+    AudioWindowReader,
+    ffmpeg_command,
+    load_audio,
+    load_audio_ffmpeg,
+    probe_duration,
+)
+
+
+class TestFfmpegDecoder:
+    """
+    Tests for decoding audio by piping ffmpeg's float32 output into a preallocated buffer.
+    """
+
+    def test_ffmpeg_command_requests_16khz_mono_float32_without_video(self):
+        """
+        Test that we ask ffmpeg for exactly what Whisper wants and nothing else.
+        """
+        command = ffmpeg_command(Path("video.mp4"))
+        assert command[:2] == ["ffmpeg", "-nostdin"]
+        assert command[command.index("-i") + 1] == "video.mp4"
+        for flag in ("-vn", "-sn", "-dn"):
+            assert flag in command
+        assert command[command.index("-ac") + 1] == "1"
+        assert command[command.index("-ar") + 1] == "16000"
+        assert command[-3:] == ["-f", "f32le", "-"]
+        assert "-ss" not in command
+        command = ffmpeg_command(Path("video.mp4"), start_seconds=90.5)
+        assert command[command.index("-ss") + 1] == "90.500"
+        assert command.index("-ss") < command.index("-i")
+
+    @pytest.mark.parametrize("probed_duration", (10.0, 0.0001, None))
+    def test_load_audio_ffmpeg(self, mocker, fake_ffmpeg, probed_duration):
+        """
+        Test that the samples are read correctly whether the probed duration is right, too short or unknown.
+        """
+        samples = np.linspace(-1.0, 1.0, 3 * audio.SAMPLE_RATE + 5, dtype=np.float32)
+        mocker.patch.object(audio, "probe_duration", return_value=probed_duration)
+        fake_ffmpeg(samples.tobytes())
+        decoded = load_audio_ffmpeg(Path("video.mp4"))
+        assert decoded.dtype == np.float32
+        np.testing.assert_array_equal(decoded, samples)
+
+    def test_load_audio_ffmpeg_failure(self, mocker, fake_ffmpeg):
+        """
+        Test that an ffmpeg failure is raised as an AudioDecodeError (a ValueError).
+        """
+        mocker.patch.object(audio, "probe_duration", return_value=None)
+        fake_ffmpeg(b"", b"video.mp4: Invalid data found\n", returncode=1)
+        with pytest.raises(ValueError, match=r"ffmpeg could not decode \[video.mp4\]: video.mp4: Invalid data found$"):
+            load_audio_ffmpeg(Path("video.mp4"))
+        assert issubclass(AudioDecodeError, ValueError)
+
+    @pytest.mark.parametrize("returncode", (0, 1))
+    def test_chatty_ffmpeg_does_not_hang(self, mocker, returncode: int):
+        """
+        Test that an ffmpeg writing far more to stderr than a pipe holds, before any audio, neither blocks
+        us nor itself, and that only the end of what it said explains a failure.
+        """
+        samples = np.linspace(-1.0, 1.0, audio.SAMPLE_RATE, dtype=np.float32)
+        script = (
+            "import sys\n"
+            "for number in range(4000):\n"
+            "    sys.stderr.write(f'warning {number}: corrupt frame, concealing errors\\n')\n"
+            "sys.stderr.flush()\n"
+            f"sys.stdout.buffer.write(bytes.fromhex('{samples.tobytes().hex()}'))\n"
+            f"sys.exit({returncode})\n"
+        )
+        mocker.patch.object(audio, "probe_duration", return_value=None)
+        mocker.patch.object(audio, "ffmpeg_command", return_value=[sys.executable, "-c", script])
+        outcome: dict[str, object] = {}
+
+        def decode() -> None:
+            try:
+                outcome["audio"] = load_audio_ffmpeg(Path("video.mp4"))
+            except AudioDecodeError as error:
+                outcome["error"] = str(error)
+
+        thread = threading.Thread(target=decode, daemon=True)
+        thread.start()
+        thread.join(timeout=20)
+        assert not thread.is_alive(), "Decoding hung on ffmpeg's stderr"
+        if returncode:
+            assert str(outcome["error"]).endswith("warning 3999: corrupt frame, concealing errors")
+            assert len(str(outcome["error"])) < audio.STDERR_TAIL_BYTES + 100
+        else:
+            np.testing.assert_array_equal(outcome["audio"], samples)
+
+    def test_probe_duration(self, mocker):
+        """
+        Test that ffprobe's duration is parsed, and that we cope without ffprobe or a duration.
+        """
+        mocker.patch("shutil.which", return_value="/usr/bin/ffprobe")
+        mock_run = mocker.patch("subprocess.run")
+        mock_run.return_value.stdout = "12.345000\n"
+        assert probe_duration(Path("video.mp4")) == pytest.approx(12.345)
+        mock_run.return_value.stdout = "N/A\n"
+        assert probe_duration(Path("video.mp4")) is None
+        mocker.patch("shutil.which", return_value=None)
+        assert probe_duration(Path("video.mp4")) is None
+
+    @pytest.mark.parametrize(
+        ("decoder", "ffmpeg_path", "expected"),
+        (
+            ("auto", "/usr/bin/ffmpeg", "ffmpeg"),
+            ("auto", None, "pydub"),
+            ("ffmpeg", None, "ffmpeg"),
+            ("pydub", "/usr/bin/ffmpeg", "pydub"),
+        ),
+    )
+    def test_load_audio_chooses_decoder(self, mocker, decoder, ffmpeg_path, expected):
+        """
+        Test that "auto" prefers ffmpeg and that an explicit decoder choice is honoured.
+        """
+        mocker.patch("shutil.which", return_value=ffmpeg_path)
+        mock_ffmpeg = mocker.patch.object(audio, "load_audio_ffmpeg", return_value="ffmpeg")
+        mock_pydub = mocker.patch.object(audio, "load_audio_pydub", return_value="pydub")
+        assert load_audio(Path("video.mp4"), decoder) == expected
+        assert mock_ffmpeg.called == (expected == "ffmpeg")
+        assert mock_pydub.called == (expected == "pydub")
+
+
+class TestAudioWindowReader:
+    """
+    Tests for reading audio from an ffmpeg pipe in fixed size windows.
+    """
+
+    samples = np.arange(int(2.5 * audio.SAMPLE_RATE), dtype=np.float32)
+
+    def test_windows_cover_the_audio(self, fake_ffmpeg):
+        """
+        Test that consuming each window in full walks through all of the audio in window sized steps.
+        """
+        fake_ffmpeg(self.samples.tobytes())
+        with AudioWindowReader(Path("video.mp4"), window_seconds=1) as reader:
+            starts, windows = [], []
+            window = reader.next_window()
+            while window is not None:
+                starts.append(reader.start_seconds)
+                windows.append(window.copy())
+                window = reader.next_window()
+        assert starts == [0.0, 1.0, 2.0]
+        assert [len(window) for window in windows] == [16000, 16000, 8000]
+        np.testing.assert_array_equal(np.concatenate(windows), self.samples)
+
+    def test_unconsumed_tail_is_carried_forward(self, fake_ffmpeg):
+        """
+        Test that the unconsumed tail of a window starts the next window.
+        """
+        fake_ffmpeg(self.samples.tobytes())
+        with AudioWindowReader(Path("video.mp4"), window_seconds=1) as reader:
+            reader.next_window()
+            window = reader.next_window(keep_from=12000)
+            assert reader.start_seconds == 0.75
+            np.testing.assert_array_equal(window, self.samples[12000:28000])
+            # The reader reuses the one buffer for every window.
+            assert np.shares_memory(window, reader.buffer)
+
+    def test_start_seconds_seeks_ffmpeg(self, fake_ffmpeg):
+        """
+        Test that starting part way in asks ffmpeg to seek and offsets our window positions.
+        """
+        fake_popen = fake_ffmpeg(self.samples.tobytes())
+        with AudioWindowReader(Path("video.mp4"), window_seconds=1, start_seconds=30) as reader:
+            reader.next_window()
+            assert reader.start_seconds == 30.0
+        assert fake_popen.commands[0][fake_popen.commands[0].index("-ss") + 1] == "30.000"
+
+    def test_ffmpeg_failure(self, fake_ffmpeg):
+        """
+        Test that ffmpeg failing is reported once we've read everything it gave us.
+        """
+        fake_ffmpeg(b"", b"moov atom not found\n", returncode=1)
+        with (
+            pytest.raises(AudioDecodeError, match="moov atom not found"),
+            AudioWindowReader(Path("video.mp4"), window_seconds=1) as reader,
+        ):
+            assert reader.next_window() is None
@@ -0,0 +1,91 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from transcriber.audio_cache import AudioCache, MelCache
+
+
+class TestAudioCache:
+    """
+    Tests for the on-disk cache of decoded audio.
+    """
+
+    def test_key_depends_on_content_and_decoder(self, mocker):
+        """
+        Test that a different content hash or decoder gives a different key, "auto" meaning whichever it picks.
+        """
+        mocker.patch("shutil.which", return_value=None)
+        key = AudioCache.key("abc", "pydub")
+        assert key == AudioCache.key("abc", "auto")
+        assert key != AudioCache.key("abd", "pydub")
+        assert key != AudioCache.key("abc", "ffmpeg")
+
+    def test_put_and_get(self, tmp_path: Path):
+        """
+        Test that audio survives a round trip, coming back memory mapped read only, and that hits and misses are counted.
+        """
+        audio = np.linspace(-1, 1, 16000, dtype=np.float32)
+        cache = AudioCache(tmp_path / "cache", max_bytes=1024 * 1024)
+        assert cache.get("0123") is None
+        cache.put("0123", audio)
+        cached = cache.get("0123")
+        assert isinstance(cached, np.memmap)
+        assert cached.dtype == np.float32
+        assert not cached.flags.writeable
+        np.testing.assert_array_equal(cached, audio)
+        assert (cache.hits, cache.misses) == (1, 1)
+        # A new cache over the same directory sees the same entries.
+        assert AudioCache(tmp_path / "cache", max_bytes=1024 * 1024).get("0123") is not None
+
+    def test_corrupt_entries_are_misses(self, tmp_path: Path):
+        """
+        Test that an unreadable entry (e.g. left by a crash) is treated as a miss.
+        """
+        cache = AudioCache(tmp_path, max_bytes=1024 * 1024)
+        (tmp_path / "01").mkdir()
+        (tmp_path / "01" / "0123.npy").write_bytes(b"not numpy")
+        assert cache.get("0123") is None
+        assert cache.misses == 1
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path: Path):
+        """
+        Test that going over budget evicts the least recently used audio.
+        """
+        audio = np.zeros(16000, dtype=np.float32)
+        cache = AudioCache(tmp_path, max_bytes=1024 * 1024)
+        for key in ("aa01", "bb02"):
+            cache.put(key, audio)
+        entry_size = (tmp_path / "aa" / "aa01.npy").stat().st_size
+        # Make aa01 the least recently written, then use it so bb02 becomes the least recently used.
+        os.utime(tmp_path / "aa" / "aa01.npy", ns=(1, 1))
+        os.utime(tmp_path / "bb" / "bb02.npy", ns=(2, 2))
+        assert cache.get("aa01") is not None
+        cache.max_bytes = 2 * entry_size
+        cache.put("cc03", audio)
+        assert cache.get("bb02") is None
+        assert cache.get("aa01") is not None
+        assert cache.get("cc03") is not None
+
+
+class TestMelCache:
+    """
+    Tests for the on-disk cache of log-mel spectrograms.
+    """
+
+    def test_shares_a_directory_with_audio(self, tmp_path: Path):
+        """
+        Test that spectrograms (keyed by the audio and mel size) and audio can be cached in the same directory.
+        """
+        key = MelCache.key("abc", 80)
+        assert key not in (MelCache.key("abd", 80), MelCache.key("abc", 128))
+        mels = np.ones((2, 80, 3000), dtype=np.float32)
+        cache = MelCache(tmp_path, max_bytes=4 * 1024 * 1024)
+        cache.put(key, mels)
+        audio_cache = AudioCache(tmp_path, max_bytes=1024)
+        audio_cache.put("0123", np.zeros(16000, dtype=np.float32))
+        # The audio cache is over budget, but only evicts its own entries.
+        assert audio_cache.get("0123") is None
+        cached = cache.get(key)
+        assert cached is not None
+        np.testing.assert_array_equal(cached, mels)
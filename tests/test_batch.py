@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from transcriber.batch import BatchStats, WindowBatcher, segments_from_tokens, window_segments
+
+SAMPLE_RATE = 16000
+# <|0.00|>, the first of whisper's timestamp tokens for English-only models.
+TIMESTAMP_BEGIN = 50363
+
+
+def decode(tokens: list[int]) -> str:
+    return "".join(f" {token}" for token in tokens)
+
+
+class TestSegmentsFromTokens:
+    """
+    Tests for splitting a window's decoded tokens into timed segments.
+    """
+
+    def test_timestamps_delimit_segments(self):
+        """
+        Test that timestamp tokens give each run of text tokens its start and end.
+        """
+        tokens = [TIMESTAMP_BEGIN, 1, 2, TIMESTAMP_BEGIN + 100, TIMESTAMP_BEGIN + 100, 3, TIMESTAMP_BEGIN + 200, 4]
+        assert segments_from_tokens(tokens, TIMESTAMP_BEGIN, decode, duration=25.0) == [
+            {"start": 0.0, "end": 2.0, "text": " 1 2", "tokens": [1, 2]},
+            {"start": 2.0, "end": 4.0, "text": " 3", "tokens": [3]},
+            # An unterminated segment runs to the end of the window.
+            {"start": 4.0, "end": 25.0, "text": " 4", "tokens": [4]},
+        ]
+
+    def test_no_tokens(self):
+        """
+        Test that a window with nothing said has no segments.
+        """
+        assert segments_from_tokens([TIMESTAMP_BEGIN], TIMESTAMP_BEGIN, decode, duration=30.0) == []
+
+
+class TestWindowSegments:
+    """
+    Tests for turning whisper's decoding result for a window into segments.
+    """
+
+    @staticmethod
+    def result(**overrides) -> SimpleNamespace:
+        """
+        A stand in for whisper's DecodingResult.
+        """
+        fields = {
+            "tokens": [TIMESTAMP_BEGIN, 1, 2, TIMESTAMP_BEGIN + 100],
+            "temperature": 0.0,
+            "avg_logprob": -0.25,
+            "compression_ratio": 1.5,
+            "no_speech_prob": 0.125,
+        }
+        return SimpleNamespace(**{**fields, **overrides})
+
+    def test_segments_carry_the_window_statistics(self):
+        """
+        Test that each segment carries its window's decoding statistics, as whisper's transcribe() segments do.
+        """
+        assert window_segments(self.result(), TIMESTAMP_BEGIN, decode, duration=30.0) == [
+            {
+                "start": 0.0,
+                "end": 2.0,
+                "text": " 1 2",
+                "tokens": [1, 2],
+                "temperature": 0.0,
+                "avg_logprob": -0.25,
+                "compression_ratio": 1.5,
+                "no_speech_prob": 0.125,
+            }
+        ]
+
+    def test_silent_windows(self):
+        """
+        Test that a window the model is confident holds no speech has no segments.
+        """
+        silent = self.result(no_speech_prob=0.9, avg_logprob=-1.5)
+        assert window_segments(silent, TIMESTAMP_BEGIN, decode, duration=30.0) == []
+
+
+class TestWindowBatcher:
+    """
+    Tests for packing windows from several files into batches.
+    """
+
+    @pytest.fixture
+    def decode_windows(self, mocker):
+        """
+        Decode each window into one segment saying how long the window is.
+        """
+        return mocker.patch(
+            "transcriber.batch._decode_windows",
+            side_effect=lambda model, windows, mels: [
+                [{"start": 1.0, "end": 2.0, "text": f" {len(window) / SAMPLE_RATE:g}s"}] for window in windows
+            ],
+        )
+
+    def test_windows_from_several_files_share_batches(self, mocker, decode_windows):
+        """
+        Test that windows are decoded batch_size at a time and results are routed back to their files.
+        """
+        on_batch = mocker.Mock()
+        batcher = WindowBatcher(mocker.Mock(is_multilingual=False), batch_size=2, on_batch=on_batch)
+        # 70 seconds is three windows, one of which waits for the next file.
+        assert batcher.add("first", np.zeros(70 * SAMPLE_RATE, np.float32)) == []
+        assert batcher.add("second", np.zeros(40 * SAMPLE_RATE, np.float32)) == [
+            (
+                "first",
+                {
+                    "text": " 30s 30s 10s",
+                    "segments": [
+                        {"id": 0, "seek": 0, "start": 1.0, "end": 2.0, "text": " 30s"},
+                        {"id": 1, "seek": 480000, "start": 31.0, "end": 32.0, "text": " 30s"},
+                        {"id": 2, "seek": 960000, "start": 61.0, "end": 62.0, "text": " 10s"},
+                    ],
+                    "language": "en",
+                },
+            )
+        ]
+        assert [len(call.args[1]) for call in decode_windows.call_args_list] == [2, 2]
+        assert on_batch.call_args.args[0]._replace(seconds=0) == BatchStats(
+            windows=2, files=2, audio_seconds=40.0, seconds=0, file_audio_seconds={"first": 10.0, "second": 30.0}
+        )
+        completed = batcher.flush()
+        assert [key for key, _ in completed] == ["second"]
+        assert completed[0][1]["segments"] == [
+            {"id": 0, "seek": 0, "start": 1.0, "end": 2.0, "text": " 30s"},
+            {"id": 1, "seek": 480000, "start": 31.0, "end": 32.0, "text": " 10s"},
+        ]
+        assert decode_windows.call_count == 3
+
+    def test_empty_audio_completes_immediately(self, mocker, decode_windows):
+        """
+        Test that a file without audio (e.g. all silence with --vad) completes without being decoded.
+        """
+        batcher = WindowBatcher(mocker.Mock(is_multilingual=False), batch_size=8)
+        assert batcher.add("silent", np.zeros(0, np.float32)) == [
+            ("silent", {"text": "", "segments": [], "language": "en"})
+        ]
+        decode_windows.assert_not_called()
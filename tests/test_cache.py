@@ -0,0 +1,64 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from transcriber.cache import TranscriptionCache, file_digest
+
+RESULT = {"text": " Hello.", "segments": [{"start": 0.0, "end": 1.5, "text": " Hello."}], "language": "en"}
+
+
+class TestTranscriptionCache:
+    """
+    Tests for the content-addressed transcription cache.
+    """
+
+    def test_file_digest(self, tmp_path: Path):
+        """
+        Test that files are hashed by content alone.
+        """
+        first, second = tmp_path / "first.mp4", tmp_path / "second.mp4"
+        first.write_bytes(b"abc")
+        second.write_bytes(b"abc")
+        assert file_digest(first) == file_digest(second)
+        assert file_digest(first) == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+
+    def test_key_depends_on_content_model_and_options(self):
+        """
+        Test that a different content hash, model or decoding option gives a different key.
+        """
+        key = TranscriptionCache.key("abc", "base.en", {"fp16": False})
+        assert key == TranscriptionCache.key("abc", "base.en", {"fp16": False})
+        assert key != TranscriptionCache.key("abd", "base.en", {"fp16": False})
+        assert key != TranscriptionCache.key("abc", "tiny.en", {"fp16": False})
+        assert key != TranscriptionCache.key("abc", "base.en", {"fp16": True})
+
+    def test_put_and_get(self, tmp_path: Path):
+        """
+        Test that results survive a round trip (numpy values included) and that hits and misses are counted.
+        """
+        cache = TranscriptionCache(tmp_path / "cache", max_bytes=1024 * 1024)
+        assert cache.get("0123") is None
+        cache.put("0123", {**RESULT, "tokens": np.array([1, 2, 3]), "avg_logprob": np.float32(-0.5)})
+        assert cache.get("0123") == {**RESULT, "tokens": [1, 2, 3], "avg_logprob": -0.5}
+        assert (cache.hits, cache.misses) == (1, 1)
+        # A new cache over the same directory sees the same entries.
+        assert TranscriptionCache(tmp_path / "cache", max_bytes=1024 * 1024).get("0123") is not None
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path: Path):
+        """
+        Test that going over budget evicts the least recently used entries.
+        """
+        cache = TranscriptionCache(tmp_path, max_bytes=1024 * 1024)
+        for key in ("aa01", "bb02"):
+            cache.put(key, RESULT)
+        entry_size = (tmp_path / "aa" / "aa01.json").stat().st_size
+        # Make aa01 the least recently written, then use it so bb02 becomes the least recently used.
+        os.utime(tmp_path / "aa" / "aa01.json", ns=(1, 1))
+        os.utime(tmp_path / "bb" / "bb02.json", ns=(2, 2))
+        assert cache.get("aa01") is not None
+        cache.max_bytes = 2 * entry_size
+        cache.put("cc03", RESULT)
+        assert cache.get("bb02") is None
+        assert cache.get("aa01") is not None
+        assert cache.get("cc03") is not None
@@ -0,0 +1,64 @@
+import numpy as np
+
+from transcriber.mel import N_FFT, N_FRAMES, audio_hash, log_mel_windows
+
+SAMPLE_RATE = 16000
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+
+def reference_log_mel(window: np.ndarray, filters: np.ndarray) -> np.ndarray:
+    """
+    Whisper's log_mel_spectrogram() of a (30 second) window, one frame at a time.
+    """
+    padded = np.pad(window, N_FFT // 2, mode="reflect")
+    hann = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)
+    power = np.stack([
+        np.abs(np.fft.rfft(padded[frame * 160 : frame * 160 + N_FFT] * hann)) ** 2 for frame in range(N_FRAMES)
+    ])
+    log_spec = np.log10(np.maximum(filters @ power.T, 1e-10))
+    log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+
+class TestLogMelWindows:
+    """
+    Tests for computing the log-mel spectrograms of every window of a file at once.
+    """
+
+    def test_matches_whisper_per_window(self, mocker):
+        """
+        Test that each window's spectrogram is computed (and normalised) as whisper would for the window on its own,
+        however many windows we transform at once, with the last window padded with silence.
+        """
+        mocker.patch("transcriber.mel.CHUNK_WINDOWS", 2)
+        rng = np.random.default_rng(0)
+        filters = rng.random((8, N_FFT // 2 + 1)).astype(np.float32)
+        audio = np.concatenate([
+            rng.normal(0, 0.1, WINDOW_SAMPLES),
+            rng.normal(0, 0.5, WINDOW_SAMPLES),
+            np.zeros(WINDOW_SAMPLES),
+            rng.normal(0, 0.3, SAMPLE_RATE),
+        ]).astype(np.float32)
+        mels = log_mel_windows(audio, n_mels=8, filters=filters)
+        assert mels.shape == (4, 8, N_FRAMES)
+        assert mels.dtype == np.float32
+        for number, mel in enumerate(mels):
+            window = np.zeros(WINDOW_SAMPLES, np.float32)
+            samples = audio[number * WINDOW_SAMPLES : (number + 1) * WINDOW_SAMPLES]
+            window[: len(samples)] = samples
+            np.testing.assert_allclose(mel, reference_log_mel(window, filters), atol=1e-4)
+
+    def test_no_audio(self):
+        """
+        Test that audio without any samples has no windows.
+        """
+        assert log_mel_windows(np.zeros(0, np.float32), n_mels=8, filters=np.ones((8, 201))).shape == (0, 8, N_FRAMES)
+
+    def test_audio_hash(self):
+        """
+        Test that audio is hashed by its samples alone.
+        """
+        audio = np.linspace(-1, 1, 1000, dtype=np.float32)
+        assert audio_hash(audio) == audio_hash(audio.copy())
+        assert audio_hash(audio[::2]) == audio_hash(audio[::2].copy())
+        assert audio_hash(audio) != audio_hash(audio[::-1])
@@ -0,0 +1,98 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from transcriber.metrics import FileMetrics, MetricsRecorder, format_summary
+
+
+class TestMetricsRecorder:
+    """
+    Tests for the per-file and per-stage metrics recorder.
+    """
+
+    def test_stages_are_recorded_per_file(self):
+        """
+        Test that stage timings accumulate per file and the real time factor is worked out from inference.
+        """
+        metrics = MetricsRecorder()
+        video = Path("video.mp4")
+        metrics.start(video)
+        metrics.add(video, "decode", 1.0)
+        metrics.add(video, "infer", 3.0)
+        metrics.add(video, "infer", 2.0)
+        metrics.set_audio_seconds(video, 50.0)
+        with metrics.timer(video, "write"):
+            pass
+        metrics.add(None, "load", 4.0)
+        file_metrics = metrics.finish(video, "done", audio_seconds=99.0, segments=7, seconds=6.5)
+        assert file_metrics.stages["infer"] == 5.0
+        assert "write" in file_metrics.stages
+        # The decoded duration wins over the fallback.
+        assert file_metrics.audio_seconds == 50.0
+        assert file_metrics.realtime_factor == pytest.approx(0.1)
+        assert (file_metrics.segments, file_metrics.seconds) == (7, 6.5)
+        assert metrics.run_stages == {"load": 4.0}
+
+    def test_summary(self):
+        """
+        Test that the summary aggregates every file and the run level stages.
+        """
+        metrics = MetricsRecorder()
+        metrics.add(Path("a.mp4"), "infer", 2.0)
+        metrics.finish(Path("a.mp4"), "done", audio_seconds=20.0, segments=3)
+        metrics.finish(Path("b.mp4"), "failed")
+        metrics.add(None, "load", 1.0)
+        summary = metrics.summary()
+        assert (summary["files"], summary["done"], summary["failed"], summary["segments"]) == (2, 1, 1, 3)
+        assert summary["stages"] == {"infer": 2.0, "load": 1.0}
+        assert summary["realtime_factor"] == pytest.approx(0.1)
+        assert summary["audio_hours_per_wall_hour"] > 0
+        assert format_summary(summary).startswith("SUMMARY: 2 files (1 done, 1 failed), 0.01 hours of audio in ")
+
+    def test_merge_worker_metrics(self):
+        """
+        Test that metrics handed back by a worker process are taken over by the parent.
+        """
+        worker = MetricsRecorder()
+        worker.start(Path("video.mp4"))
+        worker.add(Path("video.mp4"), "infer", 2.0)
+        worker.set_audio_seconds(Path("video.mp4"), 10.0)
+        file_metrics = worker.pop(Path("video.mp4"))
+        assert file_metrics.process_peak_rss_bytes
+        parent = MetricsRecorder()
+        parent.merge(file_metrics)
+        parent.add(Path("video.mp4"), "write", 0.5)
+        merged = parent.finish(Path("video.mp4"), "done", seconds=file_metrics.seconds)
+        assert merged.stages == {"infer": 2.0, "write": 0.5}
+        assert (merged.audio_seconds, merged.process_peak_rss_bytes) == (10.0, file_metrics.process_peak_rss_bytes)
+
+    def test_write_jsonl_and_prometheus(self, tmp_path: Path):
+        """
+        Test that the JSON Lines file gets a line per file plus a summary and the Prometheus file is complete.
+        """
+        metrics = MetricsRecorder()
+        metrics.add(Path("video.mp4"), "infer", 1.5)
+        metrics.finish(Path("video.mp4"), "done", audio_seconds=30.0, segments=2)
+        jsonl = tmp_path / "metrics" / "run.jsonl"
+        metrics.write_jsonl(jsonl)
+        metrics.write_jsonl(jsonl)
+        lines = [json.loads(line) for line in jsonl.read_text().splitlines()]
+        assert [line["type"] for line in lines] == ["file", "summary", "file", "summary"]
+        assert lines[0]["path"] == "video.mp4"
+        assert lines[0]["realtime_factor"] == pytest.approx(0.05)
+        # The peak is the process', so it's never below that of the files it transcribed.
+        assert lines[1]["peak_rss_bytes"] >= lines[0]["process_peak_rss_bytes"]
+        prom = tmp_path / "transcriber.prom"
+        metrics.write_prometheus(prom)
+        text = prom.read_text()
+        assert 'transcriber_files{status="done"} 1' in text
+        assert 'transcriber_stage_seconds{stage="infer"} 1.5' in text
+        assert "transcriber_audio_seconds 30.0" in text
+        assert list(tmp_path.glob(".transcriber.prom.*")) == []
+
+    def test_unknown_duration_has_no_realtime_factor(self):
+        """
+        Test that a file whose audio duration is unknown has no real time factor.
+        """
+        assert FileMetrics("video.mp4", stages={"infer": 1.0}).realtime_factor is None
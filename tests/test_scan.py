@@ -0,0 +1,265 @@
+import fnmatch
+import os
+import re
+import warnings
+from pathlib import Path
+
+import pytest
+
+from transcriber.scan import ScanCache, compile_globs, glob_to_regex, iter_tree, reorder, scan_tree
+
+
+def glob_files(root: Path, patterns: list[str]) -> set[Path]:
+    """
+    The files Path.glob() finds for the given patterns, the way FileFilter used to find them.
+    """
+    return {path for pattern in patterns for path in root.glob(pattern) if path.is_file()}
+
+
+class TestScan:
+    """
+    Tests for the single pass directory scanner behind FileFilter.
+    """
+
+    @pytest.mark.parametrize(
+        ("pattern", "path", "matches"),
+        [
+            ("**/*.mp4", "video.mp4", True),
+            ("**/*.mp4", "a/b/c/video.mp4", True),
+            ("**/*.mp4", "a/video.mp4.srt", False),
+            ("*.mp4", "a/video.mp4", False),
+            ("a/*/c.mkv", "a/b/c.mkv", True),
+            ("a/*/c.mkv", "a/b/x/c.mkv", False),
+            ("**/_Model/**/*.mkv", "x/_Model/c.mkv", True),
+            ("video?.mp4", "video1.mp4", True),
+            ("video?.mp4", "video12.mp4", False),
+            ("video[0-9].mp4", "video7.mp4", True),
+            ("video[!0-9].mp4", "video7.mp4", False),
+            ("video[!0-9].mp4", "videoX.mp4", True),
+            ("video[^].mp4", "video^.mp4", True),
+            ("video[.mp4", "video[.mp4", True),
+            ("(final) video+.mp4", "(final) video+.mp4", True),
+            ("build/**", "build/a/b.mp4", True),
+            ("**", "anything/at/all.mp4", True),
+        ],
+    )
+    def test_glob_to_regex(self, pattern: str, path: str, matches: bool):
+        """
+        Test that glob patterns translate to regular expressions matching what Path.glob() would.
+        """
+        assert (re.match(glob_to_regex(pattern), path) is not None) == matches
+
+    @pytest.mark.parametrize(
+        "pattern", ["[[]x]", "[a[]x", "[]]x", "[!]]x", "[![]x", "[^a]x", "[\\]x", "[&&a]x", "[~~|]x", "[a-c]x"]
+    )
+    def test_sets_match_fnmatch(self, pattern: str):
+        """
+        Test that sets holding characters special to regular expressions match just what fnmatch would match,
+        without the regular expression warning about them.
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            regex = re.compile(glob_to_regex(pattern))
+        for name in ("[x", "ax", "bx", "]x", "!x", "^x", "\\x", "&x", "~x", "|x", "x", "[]x"):
+            assert (regex.match(name) is not None) == fnmatch.fnmatchcase(name, pattern), name
+
+    def test_no_patterns(self):
+        """
+        Test that no patterns compile to nothing at all.
+        """
+        assert compile_globs([]) is None
+
+    @pytest.mark.parametrize(
+        ("include", "exclude"),
+        [
+            (["**/*.mp4"], []),
+            (["**/*.mkv", "**/*.mp4"], ["**/final video.mp4"]),
+            (["**/_Model/Animation/*.mkv"], []),
+            (["**/*"], ["**/*.mp4"]),
+            (["Bonsai_Tutorials/*/*.mp4"], ["**/0[0-4]*/*"]),
+        ],
+    )
+    def test_matches_path_glob(self, file_structure: Path, include: list[str], exclude: list[str]):
+        """
+        Test that one scan finds exactly the files a Path.glob() per pattern did.
+        """
+        (file_structure / "Bonsai_Tutorials" / "folder.mp4").mkdir()
+        (file_structure / "Bonsai_Tutorials" / ".hidden.mp4").touch()
+        matching, excluded, _ = scan_tree(file_structure, include, exclude)
+        excluded_files = glob_files(file_structure, exclude)
+        assert matching == sorted(glob_files(file_structure, include) - excluded_files)
+        assert excluded == sorted(excluded_files)
+
+    def test_excluded_directories_are_pruned(self, mocker, file_structure: Path):
+        """
+        Test that directories an exclude pattern excludes entirely are reported but never scanned.
+        """
+        scandir = mocker.spy(os, "scandir")
+        matching, excluded, _ = scan_tree(file_structure, ["**/*.mkv"], ["**/_Model/**"])
+        model = file_structure / "Bonsai_Tutorials" / "_Model"
+        assert matching == []
+        assert excluded == [model]
+        scanned = {Path(call.args[0]) for call in scandir.call_args_list}
+        assert file_structure / "Bonsai_Tutorials" in scanned
+        assert not any(path.is_relative_to(model) for path in scanned)
+
+    def test_unreadable_directories_are_skipped(self, mocker, file_structure: Path):
+        """
+        Test that a directory we can't read is skipped, as Path.glob() skips it.
+        """
+        real_scandir = os.scandir
+
+        def scandir(path):
+            if Path(path).name == "_Model":
+                raise PermissionError(path)
+            return real_scandir(path)
+
+        mocker.patch("os.scandir", side_effect=scandir)
+        matching, *_ = scan_tree(file_structure, ["**/*.mkv", "**/*.mp4"], [])
+        assert matching
+        assert not any("_Model" in path.parts for path in matching)
+
+    def test_iter_tree_streams_the_same_files(self, file_structure: Path):
+        """
+        Test that streaming the scan finds the same files as scanning it all at once.
+        """
+        include, exclude = ["**/*.mp4", "**/*.mkv"], ["**/0[0-4]*/*", "**/jpgs/**"]
+        found = list(iter_tree(file_structure, include, exclude))
+        matching, excluded, _ = scan_tree(file_structure, include, exclude)
+        assert sorted(entry.path for entry in found if not entry.excluded) == matching
+        assert sorted(entry.path for entry in found if entry.excluded) == excluded
+
+    def test_outputs_are_paired_from_the_listing(self, tmp_path: Path):
+        """
+        Test that files whose outputs were all listed alongside them are done, without any other files being.
+        """
+        (tmp_path / "lesson").mkdir()
+        for name in ["both.mp4", "both.srt", "both.vtt", "srt only.mp4", "srt only.srt", "none.mp4"]:
+            (tmp_path / "lesson" / name).touch()
+        # A directory named like an output isn't one.
+        (tmp_path / "lesson" / "folder.mp4").touch()
+        (tmp_path / "lesson" / "folder.srt").mkdir()
+        (tmp_path / "elsewhere.srt").touch()
+        (tmp_path / "elsewhere.mp4").touch()
+        result = scan_tree(tmp_path, ["**/*.mp4"], [], (".srt", ".vtt"))
+        assert len(result.matching) == 5
+        assert result.done == {tmp_path / "lesson" / "both.mp4"}
+        assert scan_tree(tmp_path, ["**/*.mp4"], [], (".srt",)).done == {
+            tmp_path / "elsewhere.mp4",
+            tmp_path / "lesson" / "both.mp4",
+            tmp_path / "lesson" / "srt only.mp4",
+        }
+        assert scan_tree(tmp_path, ["**/*.mp4"], []).done == set()
+
+    @pytest.mark.parametrize(
+        ("buffer_size", "expected"),
+        [
+            (0, ["c", "a", "b", "f", "d", "e"]),
+            (1, ["a", "b", "c", "d", "e", "f"]),
+            (2, ["a", "b", "c", "d", "e", "f"]),
+            (10, ["a", "b", "c", "d", "e", "f"]),
+        ],
+    )
+    def test_reorder(self, buffer_size: int, expected: list[str]):
+        """
+        Test that the reorder buffer sorts paths arriving within buffer_size places of their sorted position.
+        """
+        paths = [Path(name) for name in ["c", "a", "b", "f", "d", "e"]]
+        assert [path.name for path in reorder(paths, buffer_size)] == expected
+
+    def test_reorder_is_bounded(self):
+        """
+        Test that a small reorder buffer only nearly sorts paths arriving far from their sorted position.
+        """
+        paths = [Path(name) for name in ["d", "e", "f", "a", "b", "c"]]
+        assert [path.name for path in reorder(paths, 1)] == ["d", "e", "a", "b", "c", "f"]
+
+
+class TestScanCache:
+    """
+    Tests for keeping directory listings between scans, keyed by each directory's modification time.
+    """
+
+    @pytest.fixture
+    def settled_tree(self, file_structure: Path) -> Path:
+        """
+        Our file structure, with every directory last modified long enough ago for its listing to be cached.
+        """
+        for directory in [file_structure, *(path for path in file_structure.rglob("*") if path.is_dir())]:
+            os.utime(directory, (1_700_000_000, 1_700_000_000))
+        return file_structure
+
+    def scanned(self, scandir) -> set[Path]:
+        """
+        The directories the given os.scandir spy listed.
+        """
+        return {Path(call.args[0]) for call in scandir.call_args_list}
+
+    @pytest.fixture
+    def cache_file(self, tmp_path_factory) -> Path:
+        """
+        A cache file outside the tree we scan, so saving it doesn't modify the tree.
+        """
+        return tmp_path_factory.mktemp("scan-cache") / "scan.json"
+
+    def test_unchanged_directories_are_not_listed_again(self, mocker, settled_tree: Path, cache_file: Path):
+        """
+        Test that a second scan reuses every listing, finding the same files, until a directory changes.
+        """
+        include, exclude = ["**/*.mp4", "**/*.mkv"], ["**/jpgs/**"]
+        cache = ScanCache(cache_file)
+        expected = scan_tree(settled_tree, include, exclude, (".srt",), cache)
+        cache.save()
+        assert cache.hits == 0
+        assert cache.misses > 0
+
+        scandir = mocker.spy(os, "scandir")
+        cache = ScanCache(cache_file)
+        assert scan_tree(settled_tree, include, exclude, (".srt",), cache) == expected
+        assert scandir.call_count == 0
+        assert cache.misses == 0
+        cache.save()
+
+        # Only the directory we added a transcript to is listed again.
+        video = expected.matching[0]
+        video.with_suffix(".srt").touch()
+        cache = ScanCache(cache_file)
+        result = scan_tree(settled_tree, include, exclude, (".srt",), cache)
+        assert self.scanned(scandir) == {video.parent}
+        assert result.done == {video}
+
+    def test_rescan_lists_every_directory(self, mocker, settled_tree: Path, cache_file: Path):
+        """
+        Test that a rescan ignores the cached listings.
+        """
+        cache = ScanCache(cache_file)
+        scan_tree(settled_tree, ["**/*.mp4"], [], cache=cache)
+        cache.save()
+        scandir = mocker.spy(os, "scandir")
+        cache = ScanCache(cache_file, rescan=True)
+        scan_tree(settled_tree, ["**/*.mp4"], [], cache=cache)
+        assert cache.hits == 0
+        assert settled_tree in self.scanned(scandir)
+
+    def test_recently_modified_directories_are_not_cached(self, file_structure: Path, cache_file: Path):
+        """
+        Test that directories modified too recently to trust their modification time are listed again next time.
+        """
+        cache = ScanCache(cache_file)
+        scan_tree(file_structure, ["**/*.mp4"], [], cache=cache)
+        cache.save()
+        cache = ScanCache(cache_file)
+        scan_tree(file_structure, ["**/*.mp4"], [], cache=cache)
+        assert cache.hits == 0
+
+    @pytest.mark.parametrize("content", ["not json", '{"version": 0, "directories": {}}', '{"version": 1}', "[]"])
+    def test_unusable_caches_are_ignored(self, settled_tree: Path, cache_file: Path, content: str):
+        """
+        Test that a corrupt or out of date cache file just means listing everything again.
+        """
+        cache_file.write_text(content)
+        cache = ScanCache(cache_file)
+        assert scan_tree(settled_tree, ["**/*.mp4"], [], cache=cache) == scan_tree(settled_tree, ["**/*.mp4"], [])
+        assert cache.hits == 0
+        cache.save()
+        assert ScanCache(cache_file)._listings
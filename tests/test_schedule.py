@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import pytest
+
+from transcriber.schedule import MediaIndex, makespan, schedule
+
+
+@pytest.fixture
+def videos(tmp_path: Path) -> dict[Path, float | None]:
+    """
+    Some videos and their durations (None when they can't be probed).
+    """
+    durations = {"a.mp4": 60.0, "b.mp4": 3 * 3600.0, "c.mp4": 5.0, "d.mp4": None, "e.mp4": 60.0}
+    for name in durations:
+        (tmp_path / name).write_bytes(b"video")
+    return {tmp_path / name: duration for name, duration in durations.items()}
+
+
+class TestMediaIndex:
+    """
+    Tests for probing (and remembering) media durations.
+    """
+
+    def test_files_are_only_probed_again_when_they_change(self, mocker, tmp_path: Path, videos):
+        """
+        Test that durations are kept between runs and files are only probed again once they've changed.
+        """
+        probe = mocker.Mock(side_effect=videos.get)
+        index_file = tmp_path / "index" / "media.json"
+        index = MediaIndex(index_file, probe)
+        assert index.durations([*videos, tmp_path / "missing.mp4"]) == videos
+        assert index.probed == len(videos)
+        index.save()
+
+        index = MediaIndex(index_file, probe)
+        assert index.durations(videos) == videos
+        assert index.probed == 0
+        changed = tmp_path / "c.mp4"
+        changed.write_bytes(b"a longer video")
+        probe.reset_mock()
+        assert index.durations(videos) == videos
+        probe.assert_called_once_with(changed)
+
+    @pytest.mark.parametrize("content", ["not json", '{"version": 0, "files": {}}', "[]"])
+    def test_unusable_indexes_are_ignored(self, mocker, tmp_path: Path, videos, content: str):
+        """
+        Test that a corrupt or out of date index just means probing everything again.
+        """
+        index_file = tmp_path / "media.json"
+        index_file.write_text(content)
+        index = MediaIndex(index_file, mocker.Mock(side_effect=videos.get))
+        assert index.durations(videos) == videos
+        assert index.probed == len(videos)
+
+    def test_ffprobe_by_default(self, mocker, videos):
+        """
+        Test that files are probed with ffprobe unless we're told otherwise, without keeping an index file.
+        """
+        probe_duration = mocker.patch("transcriber.audio.probe_duration", return_value=42.0)
+        index = MediaIndex()
+        assert set(index.durations(videos).values()) == {42.0}
+        assert probe_duration.call_count == len(videos)
+        index.save()
+
+
+class TestSchedule:
+    """
+    Tests for ordering our work by duration.
+    """
+
+    @pytest.mark.parametrize(
+        ("order", "expected"),
+        [
+            ("path", ["a", "b", "c", "d", "e"]),
+            ("longest", ["b", "a", "e", "c", "d"]),
+            ("shortest", ["c", "a", "e", "b", "d"]),
+        ],
+    )
+    def test_orders(self, videos, order: str, expected: list[str]):
+        """
+        Test each policy, with unknown durations last and ties in path order.
+        """
+        shuffled = sorted(videos, reverse=True)
+        assert [path.stem for path in schedule(shuffled, videos, order)] == expected
+
+    def test_longest_first_shortens_the_makespan(self):
+        """
+        Test that taking the longest jobs first leaves no long job running on its own at the end.
+        """
+        durations = [60.0] * 8 + [240.0]
+        assert makespan(durations, 3) == 360.0
+        assert makespan(sorted(durations, reverse=True), 3) == 240.0
+        assert makespan(durations, 1) == sum(durations)
+        assert makespan([], 4) == 0.0
@@ -0,0 +1,302 @@
+import argparse
+import http.client
+import json
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from transcriber.server import TranscriptionService, make_server
+from transcriber.transcribe import Transcriber, main
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    An HTTP connection over a Unix domain socket.
+    """
+
+    def __init__(self, socket_path: str) -> None:
+        super().__init__("localhost")
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class Client:
+    """
+    Talks JSON (mostly) to a running server.
+    """
+
+    def __init__(self, connect) -> None:
+        self.connect = connect
+
+    def request(self, method: str, path: str, body: bytes | None = None) -> tuple[int, str, bytes]:
+        connection = self.connect()
+        try:
+            connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            return response.status, response.getheader("Content-Type"), response.read()
+        finally:
+            connection.close()
+
+    def json(self, method: str, path: str, body: dict | None = None) -> tuple[int, dict]:
+        status, _, content = self.request(method, path, None if body is None else json.dumps(body).encode())
+        return status, json.loads(content)
+
+    def wait_for(self, job_id: str, timeout: float = 10.0) -> dict:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            _, job = self.json("GET", f"/jobs/{job_id}")
+            if job["status"] in ("done", "failed"):
+                return job
+            time.sleep(0.01)
+        pytest.fail(f"Job {job_id} didn't finish")
+
+
+@pytest.fixture
+def video(tmp_path: Path) -> Path:
+    """
+    A (mock decoded) video for the service to transcribe.
+    """
+    path = tmp_path / "videos" / "demo.mp4"
+    path.parent.mkdir()
+    path.touch()
+    return path
+
+
+@pytest.fixture
+def service(mock_args: argparse.Namespace, mock_transcription_deps, video: Path):
+    """
+    A running service with two workers, transcribing files under our videos folder with a stub model.
+    """
+    mock_args.input_path = str(video.parent)
+    service = TranscriptionService(mock_args, workers=2)
+    service.start()
+    yield service
+    service.stop()
+
+
+def serving(server) -> threading.Thread:
+    """
+    Serve requests in the background until the server is shut down.
+    """
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def client(service: TranscriptionService):
+    """
+    A client of our service, served over HTTP on a free localhost port.
+    """
+    server = make_server("127.0.0.1:0", service)
+    serving(server)
+    host, port = server.server_address[:2]
+    yield Client(lambda: http.client.HTTPConnection(str(host), port, timeout=10))
+    server.shutdown()
+    server.server_close()
+
+
+class TestTranscriptionService:
+    """
+    Tests for the local transcription service (--serve).
+    """
+
+    def test_jobs_are_transcribed_by_warm_workers(self, capsys, client: Client, service, video: Path):
+        """
+        Test that submitted jobs are transcribed by workers whose models were loaded up front.
+        """
+        import whisper
+
+        assert whisper.load_model.call_count == 2
+        assert client.json("GET", "/health") == (200, {"status": "ok"})
+        status, job = client.json("POST", "/jobs", {"path": str(video)})
+        assert status == 202
+        assert job["status"] in ("queued", "running", "done")
+        assert job["path"] == str(video)
+        job = client.wait_for(job["id"])
+        assert job["status"] == "done"
+        assert job["metrics"]["segments"] == 2
+        assert "result" not in job
+        # No more models were loaded.
+        assert whisper.load_model.call_count == 2
+        assert client.json("GET", "/queue") == (200, {"queued": 0, "running": 0, "workers": 2})
+        assert "LOADING: Warming up the base.en model for worker 2 of 2." in capsys.readouterr().out
+
+    @pytest.mark.parametrize(
+        ("fmt", "content_type", "expected"),
+        [
+            ("srt", "application/x-subrip", "1\n00:00:00,000 --> 00:00:05,000\nThis is a test transcription.\n\n"),
+            ("vtt", "text/vtt", "WEBVTT\n\n00:00:00.000 --> 00:00:05.000\nThis is a test transcription.\n\n"),
+            ("txt", "text/plain", "This is a test transcription.\nThe transcription should be realistic.\n"),
+        ],
+    )
+    def test_results_in_each_format(self, client: Client, video: Path, fmt: str, content_type: str, expected: str):
+        """
+        Test that a finished job's result can be collected in each of our formats.
+        """
+        _, job = client.json("POST", "/jobs", {"path": str(video)})
+        client.wait_for(job["id"])
+        status, received_type, content = client.request("GET", f"/jobs/{job['id']}/result?format={fmt}")
+        assert status == 200
+        assert received_type.startswith(content_type)
+        assert content.decode().startswith(expected)
+        status, result = client.json("GET", f"/jobs/{job['id']}/result")
+        assert status == 200
+        assert [segment["text"] for segment in result["segments"]] == [
+            "This is a test transcription.",
+            "The transcription should be realistic.",
+        ]
+
+    def test_failed_jobs(self, mocker, client: Client, service, video: Path):
+        """
+        Test that a job whose transcription fails is reported as failed, without taking its worker down.
+        """
+        mocker.patch("transcriber.transcribe.Transcriber.transcribe", side_effect=RuntimeError("corrupt audio"))
+        _, job = client.json("POST", "/jobs", {"path": str(video)})
+        job = client.wait_for(job["id"])
+        assert job["status"] == "failed"
+        assert job["error"] == "RuntimeError: corrupt audio"
+        status, result = client.json("GET", f"/jobs/{job['id']}/result")
+        assert status == 409
+        assert result["error"] == "RuntimeError: corrupt audio"
+        assert client.json("GET", "/queue")[1]["workers"] == 2
+
+    def test_bad_requests(self, client: Client, video: Path, tmp_path: Path):
+        """
+        Test that bad requests are refused with a helpful error.
+        """
+        (tmp_path / "elsewhere.mp4").touch()
+        assert client.json("POST", "/jobs", {"path": str(tmp_path / "elsewhere.mp4")})[0] == 403
+        assert client.json("POST", "/jobs", {"path": str(video.parent / "missing.mp4")})[0] == 404
+        assert client.json("POST", "/jobs", {"file": str(video)})[0] == 400
+        assert client.request("POST", "/jobs", b"not json")[0] == 400
+        assert client.json("POST", "/elsewhere", {"path": str(video)})[0] == 404
+        assert client.json("GET", "/jobs/unknown")[0] == 404
+        assert client.json("GET", "/jobs/unknown/result")[0] == 404
+        assert client.json("GET", "/nowhere")[0] == 404
+        _, job = client.json("POST", "/jobs", {"path": str(video)})
+        assert client.json("GET", f"/jobs/{job['id']}/result?format=doc")[0] == 400
+
+    def test_unfinished_jobs_have_no_result(self, mock_args: argparse.Namespace, video: Path):
+        """
+        Test that queued jobs are counted and their results can't be collected yet.
+        """
+        mock_args.input_path = str(video.parent)
+        # Without any workers, nothing gets done.
+        service = TranscriptionService(mock_args, workers=0)
+        server = make_server("127.0.0.1:0", service)
+        serving(server)
+        host, port = server.server_address[:2]
+        client = Client(lambda: http.client.HTTPConnection(str(host), port, timeout=10))
+        try:
+            _, job = client.json("POST", "/jobs", {"path": str(video)})
+            client.json("POST", "/jobs", {"path": str(video)})
+            assert client.json("GET", "/queue") == (200, {"queued": 2, "running": 0, "workers": 0})
+            status, result = client.json("GET", f"/jobs/{job['id']}/result?format=srt")
+            assert status == 409
+            assert result["error"] == f"Job [{job['id']}] is queued"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_unix_socket(self, service: TranscriptionService, video: Path, tmp_path_factory):
+        """
+        Test that the service can be reached over a Unix domain socket, replacing any stale socket.
+        """
+        socket_path = tmp_path_factory.mktemp("socket") / "transcriber.sock"
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(socket_path))
+        stale.close()
+        server = make_server(f"unix:{socket_path}", service)
+        serving(server)
+        client = Client(lambda: UnixHTTPConnection(str(socket_path)))
+        try:
+            _, job = client.json("POST", "/jobs", {"path": str(video)})
+            assert client.wait_for(job["id"])["status"] == "done"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_old_jobs_are_forgotten(self, mocker, mock_args: argparse.Namespace, video: Path):
+        """
+        Test that we only keep so many finished jobs.
+        """
+        mock_args.input_path = str(video.parent)
+        mocker.patch("transcriber.server.MAX_FINISHED_JOBS", 2)
+        transcriber = mocker.Mock()
+        transcriber.transcribe.return_value = {"segments": []}
+        service = TranscriptionService(mock_args)
+        jobs = [service.submit(video) for _ in range(4)]
+        for job in jobs:
+            service._run(transcriber, job)
+        assert list(service.jobs) == [job.id for job in jobs[2:]]
+
+    def test_stopping_abandons_queued_jobs(self, mocker, mock_args: argparse.Namespace, mock_transcription_deps, video):
+        """
+        Test that stopping lets the running job finish but fails the jobs queued behind it rather than running them.
+        """
+        mock_args.input_path = str(video.parent)
+        running, release = threading.Event(), threading.Event()
+
+        def slow_transcribe(path: Path) -> dict:
+            running.set()
+            release.wait(10)
+            return {"segments": []}
+
+        transcribe = mocker.patch("transcriber.transcribe.Transcriber.transcribe", side_effect=slow_transcribe)
+        service = TranscriptionService(mock_args)
+        service.start()
+        first, *queued = (service.submit(video) for _ in range(4))
+        assert running.wait(10)
+        # Let the running job finish once stop() has taken the others off the queue.
+        threading.Timer(0.2, release.set).start()
+        service.stop()
+        transcribe.assert_called_once()
+        assert first.status == "done"
+        assert [(job.status, job.error) for job in queued] == [
+            ("failed", "Abandoned, the service stopped before the job started")
+        ] * 3
+
+    def test_jobs_clean_up_after_themselves(
+        self, mock_args: argparse.Namespace, mock_transcription_deps, video: Path, tmp_path: Path
+    ):
+        """
+        Test that a job forgets the content digest it worked out for our cache and removes its checkpoint once done.
+        """
+        mock_args.input_path = str(video.parent)
+        mock_args.cache_dir = str(tmp_path / "cache")
+        mock_args.checkpoint_seconds = 60
+        checkpoint = video.with_name(f".{video.name}.checkpoint.json")
+        checkpoint.write_text("{}")
+        service = TranscriptionService(mock_args)
+        transcriber = Transcriber(mock_args)
+        job = service.submit(video)
+        service._run(transcriber, job)
+        assert job.status == "done"
+        assert transcriber._digests == {}
+        assert not checkpoint.exists()
+
+    def test_main_serves(self, mocker, video: Path):
+        """
+        Test that --serve runs the service, listening where we asked, rather than a single pass.
+        """
+        serve = mocker.patch("transcriber.server.serve")
+        videos_to_text = mocker.patch("transcriber.transcribe.Transcriber.videos_to_text")
+        main(["--input-path", str(video.parent), "--serve", "--listen", "unix:/tmp/transcriber.sock", "--jobs", "2"])
+        assert serve.call_args.args[0].listen == "unix:/tmp/transcriber.sock"
+        videos_to_text.assert_not_called()
+
+    @pytest.mark.parametrize("address", ["localhost", "localhost:http", "127.0.0.1:70000"])
+    def test_invalid_listen_addresses(self, capsys, video: Path, address: str):
+        """
+        Test that --listen only accepts HOST:PORT or a Unix socket path.
+        """
+        with pytest.raises(SystemExit):
+            main(["--input-path", str(video.parent), "--serve", "--listen", address])
+        assert f"invalid address: '{address}'" in capsys.readouterr().out
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import pytest
+
+from transcriber.shard import Shard, balanced_shards, hash_shard, parse_shard, select_shard, verify_shards
+
+
+@pytest.fixture
+def archive() -> list[Path]:
+    """
+    The paths of a hundred videos in an archive mounted at /mnt/archive.
+    """
+    return [Path("/mnt/archive") / f"{year}" / f"talk-{number:02}.mp4" for year in (2023, 2024) for number in range(50)]
+
+
+class TestSharding:
+    """
+    Tests for dividing the matching files between hosts.
+    """
+
+    @pytest.mark.parametrize(("value", "expected"), [("1/1", Shard(1, 1)), ("2/4", Shard(2, 4))])
+    def test_parse_shard(self, value: str, expected: Shard):
+        """
+        Test that shards are given as i/N.
+        """
+        assert parse_shard(value) == expected
+        assert str(parse_shard(value)) == value
+
+    @pytest.mark.parametrize("value", ["2", "0/4", "5/4", "a/4", "1/0", "-1/4"])
+    def test_invalid_shards(self, value: str):
+        """
+        Test that anything but i/N, with 1 <= i <= N, is refused.
+        """
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+    def test_hashing_is_relative_to_the_input_path(self, archive: list[Path]):
+        """
+        Test that a file's shard depends on its path within the archive, not where the archive is mounted.
+        """
+        elsewhere = [Path("/Volumes/archive") / path.relative_to("/mnt/archive") for path in archive]
+        assert [hash_shard(path, Path("/mnt/archive"), 4) for path in archive] == [
+            hash_shard(path, Path("/Volumes/archive"), 4) for path in elsewhere
+        ]
+        # The hash spreads the files over every shard.
+        assert {hash_shard(path, Path("/mnt/archive"), 4) for path in archive} == {1, 2, 3, 4}
+
+    def test_adding_files_moves_no_others(self, archive: list[Path]):
+        """
+        Test that hashed shards are stable as the archive grows.
+        """
+        root = Path("/mnt/archive")
+        before = select_shard(archive, root, Shard(3, 4))
+        after = select_shard([*archive, root / "2025" / "talk-00.mp4"], root, Shard(3, 4))
+        assert after[: len(before)] == before
+
+    def test_balanced_shards(self, archive: list[Path]):
+        """
+        Test that balancing deals the longest files out first, to the shard with the least audio so far,
+        with files of unknown duration hashed.
+        """
+        root = Path("/mnt/archive")
+        durations: dict[Path, float | None] = dict.fromkeys(archive, 60.0)
+        durations[archive[0]] = 3 * 3600.0
+        durations[archive[1]] = None
+        assignment = balanced_shards(archive, root, 2, durations)
+        # The long talk gets a shard to itself.
+        assert [path for path in archive if assignment[path] == 1] == [archive[0]]
+        assert assignment[archive[1]] == hash_shard(archive[1], root, 2)
+        # The same files in another order, or mounted elsewhere, are dealt out the same way.
+        assert balanced_shards(reversed(archive), root, 2, durations) == assignment
+
+    @pytest.mark.parametrize("balanced", (False, True), ids=("hashed", "balanced"))
+    def test_verify_shards(self, archive: list[Path], balanced: bool):
+        """
+        Test that verification selects every shard and finds each file in exactly one of them.
+        """
+        durations = {path: float(number) for number, path in enumerate(archive)} if balanced else None
+        check = verify_shards(archive, Path("/mnt/archive"), 3, durations)
+        assert check.ok
+        assert list(check.shards) == [Shard(1, 3), Shard(2, 3), Shard(3, 3)]
+        assert sorted(path for selected in check.shards.values() for path in selected) == sorted(archive)
+        if durations:
+            # Each shard holds about a third of the 4950 seconds of audio.
+            loads = [sum(durations[path] for path in selected) for selected in check.shards.values()]
+            assert max(loads) - min(loads) <= 99
+
+    def test_verify_shards_finds_gaps_and_overlaps(self, mocker, archive: list[Path]):
+        """
+        Test that files in no shard, or in more than one, are reported, e.g. if hosts didn't hash paths the same way.
+        """
+        # The first shard takes the first file, the second shard takes it too, and no shard takes the second file.
+        mocker.patch("transcriber.shard.hash_shard", side_effect=[1, 2, 2, 1])
+        check = verify_shards(archive[:2], Path("/mnt/archive"), 2)
+        assert not check.ok
+        assert check.missing == [archive[1]]
+        assert check.duplicated == [archive[0]]
@@ -0,0 +1,68 @@
+import sqlite3
+from pathlib import Path
+
+from transcriber.state import DONE, FAILED, StateStore
+
+
+class TestStateStore:
+    """
+    Tests for the SQLite run-state database.
+    """
+
+    def test_record_and_get(self, tmp_path: Path):
+        """
+        Test that outcomes are recorded, replaced and survive reopening the database.
+        """
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"video")
+        db_path = tmp_path / "state" / "state.db"
+        with StateStore(db_path) as state:
+            assert state.get(video) is None
+            state.record(video, FAILED, model="base.en", seconds=1.5, error="Boom")
+            state.record(video, DONE, model="base.en", content_hash="abc", duration=61.0, seconds=9.5)
+        with StateStore(db_path) as state:
+            record = state.get(video)
+        assert record.status == DONE
+        assert (record.model, record.content_hash, record.duration, record.seconds) == ("base.en", "abc", 61.0, 9.5)
+        assert record.error is None
+        assert record.matches(video.stat())
+
+    def test_realtime_factor(self, tmp_path: Path):
+        """
+        Test that the real time factor is worked out from the given model's successful transcriptions.
+        """
+        videos = [tmp_path / f"video {number}.mp4" for number in range(4)]
+        for video in videos:
+            video.write_bytes(b"video")
+        with StateStore(tmp_path / "state.db") as state:
+            assert state.realtime_factor("base.en") is None
+            state.record(videos[0], DONE, model="base.en", duration=100.0, seconds=10.0)
+            state.record(videos[1], DONE, model="base.en", duration=300.0, seconds=50.0)
+            state.record(videos[2], FAILED, model="base.en", seconds=99.0, error="Boom")
+            state.record(videos[3], DONE, model="tiny.en", duration=100.0, seconds=1.0)
+            assert state.realtime_factor("base.en") == 0.15
+            assert state.realtime_factor("large") is None
+
+    def test_touch(self, tmp_path: Path):
+        """
+        Test that touching a record updates its size and modification time.
+        """
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"video")
+        with StateStore(tmp_path / "state.db") as state:
+            state.record(video, DONE, model="base.en")
+            video.write_bytes(b"longer video")
+            assert not state.get(video).matches(video.stat())
+            state.touch(video, video.stat())
+            assert state.get(video).matches(video.stat())
+
+    def test_old_schema_is_rebuilt(self, tmp_path: Path):
+        """
+        Test that a database with an unexpected schema version is rebuilt.
+        """
+        db_path = tmp_path / "state.db"
+        with sqlite3.connect(db_path) as connection:
+            connection.execute("CREATE TABLE files (path TEXT PRIMARY KEY)")
+            connection.execute("INSERT INTO files VALUES ('video.mp4')")
+        with StateStore(db_path) as state:
+            assert state.get(Path("video.mp4")) is None
@@ -0,0 +1,104 @@
+import io
+import json
+from pathlib import Path
+
+import pysrt
+import pytest
+
+from transcriber.subtitles import format_footer, format_header, format_segment, srt_block, srt_timestamp
+from transcriber.transcribe import TranscriptWriter
+
+# Segments covering the awkward corners: sub-millisecond times, negative times, times of over
+# a hundred hours, text with surrounding whitespace, embedded newlines, no text and non-ASCII text.
+SEGMENTS = [
+    {"start": 0.0, "end": 5.0, "text": " Hello."},
+    {"start": 5.0019999, "end": 9.9999, "text": "  Padded text.  "},
+    {"start": -0.5, "end": 1.001, "text": " Before the start."},
+    {"start": 59.999, "end": 3599.9995, "text": " Two\nlines."},
+    {"start": 3725.5, "end": 3725.5, "text": ""},
+    {"start": 7200.123, "end": 7201.0, "text": "   "},
+    {"start": 360000.0, "end": 360001.25, "text": " Über naïve café ☕."},
+]
+
+
+def pysrt_subtitles(segments: list[dict], eol: str | None = None) -> pysrt.SubRipFile:
+    """
+    The given segments as pysrt subtitles, built the way we used to build them.
+    """
+    subs = pysrt.SubRipFile(eol=eol)
+    for index, segment in enumerate(segments, 1):
+        subs.append(
+            pysrt.SubRipItem(
+                index=index,
+                start=pysrt.SubRipTime(milliseconds=int(segment["start"] * 1000)),
+                end=pysrt.SubRipTime(milliseconds=int(segment["end"] * 1000)),
+                text=segment["text"].strip(),
+            )
+        )
+    return subs
+
+
+class TestSubtitles:
+    """
+    Tests for our native SRT formatting, which must match pysrt byte for byte.
+    """
+
+    @pytest.mark.parametrize(
+        ("seconds", "expected"),
+        [
+            (0.0, "00:00:00,000"),
+            (0.0019, "00:00:00,001"),
+            (3725.5, "01:02:05,500"),
+            (-3.0, "00:00:00,000"),
+            (360000.25, "100:00:00,250"),
+        ],
+    )
+    def test_srt_timestamp(self, seconds: float, expected: str):
+        """
+        Test that timestamps truncate to milliseconds and clamp negative times to zero, as pysrt does.
+        """
+        assert srt_timestamp(seconds) == expected
+        assert srt_timestamp(seconds) == str(pysrt.SubRipTime(milliseconds=int(seconds * 1000)))
+
+    @pytest.mark.parametrize("eol", ["\n", "\r\n"], ids=["lf", "crlf"])
+    def test_blocks_match_pysrt(self, eol: str):
+        """
+        Test that our subtitles are exactly what pysrt writes, whichever line endings are used.
+        """
+        ours = "".join(srt_block(index, segment, eol) for index, segment in enumerate(SEGMENTS, 1))
+        reference = io.StringIO()
+        pysrt_subtitles(SEGMENTS, eol).write_into(reference)
+        assert ours == reference.getvalue()
+
+    def test_files_match_pysrt(self, tmp_path: Path):
+        """
+        Test that the files we save, all at once or streamed segment by segment, match pysrt's saved file.
+        """
+        reference = tmp_path / "reference.srt"
+        subs = pysrt_subtitles(SEGMENTS)
+        subs.save(str(reference), encoding="utf-8")
+        with TranscriptWriter({"srt": tmp_path / "all.srt"}) as writer:
+            writer.write_transcription({"segments": SEGMENTS})
+        with TranscriptWriter({"srt": tmp_path / "streamed.srt"}) as writer:
+            for segment in SEGMENTS:
+                writer.write_segment(segment)
+        assert (tmp_path / "all.srt").read_bytes() == reference.read_bytes()
+        assert (tmp_path / "streamed.srt").read_bytes() == reference.read_bytes()
+        # And pysrt reads our files back just as it wrote them.
+        assert [(item.index, item.text) for item in pysrt.open(str(tmp_path / "all.srt"))] == [
+            (item.index, item.text) for item in subs
+        ]
+
+    def test_other_formats(self):
+        """
+        Test the WebVTT, plain text and JSON formats, including the blank lines which would end a WebVTT cue early.
+        """
+        segment = {"start": -1.0, "end": 3725.5, "text": " First line.\n\nSecond line. ", "avg_logprob": -0.25}
+        assert format_header("vtt", "\n") == "WEBVTT\n\n"
+        assert format_segment("vtt", 1, segment, "\n") == "00:00:00.000 --> 01:02:05.500\nFirst line.\nSecond line.\n\n"
+        assert format_segment("txt", 1, segment, "\n") == "First line.\n\nSecond line.\n"
+        assert format_segment("txt", 2, {**segment, "text": " "}, "\n") == ""
+        assert format_segment("json", 1, segment, "\n") == ""
+        transcription = {"text": segment["text"], "segments": [segment], "language": "en"}
+        assert json.loads(format_footer("json", transcription)) == transcription
+        assert format_footer("srt", transcription) == ""
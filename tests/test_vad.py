@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from transcriber.vad import SpeechTimeline, detect_speech
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds: float) -> np.ndarray:
+    """
+    A loud 440Hz tone lasting the given number of seconds.
+    """
+    return (0.5 * np.sin(2 * np.pi * 440 * np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    """
+    Near silence (faint noise) lasting the given number of seconds.
+    """
+    return np.random.default_rng(0).normal(0, 1e-4, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+class TestDetectSpeech:
+    """
+    Tests for the energy based voice activity detector.
+    """
+
+    def test_speech_regions_are_padded_and_merged(self):
+        """
+        Test that loud regions are found, padded and merged across short gaps but not long silences.
+        """
+        audio = np.concatenate([silence(2), tone(1), silence(3), tone(1), silence(0.5), tone(0.5), silence(1)])
+        regions = detect_speech(audio)
+        assert len(regions) == 2
+        (first_start, first_end), (second_start, second_end) = regions
+        assert first_start == pytest.approx(1.8 * SAMPLE_RATE, abs=0.03 * SAMPLE_RATE)
+        assert first_end == pytest.approx(3.2 * SAMPLE_RATE, abs=0.03 * SAMPLE_RATE)
+        assert second_start == pytest.approx(5.8 * SAMPLE_RATE, abs=0.03 * SAMPLE_RATE)
+        assert second_end == pytest.approx(8.2 * SAMPLE_RATE, abs=0.03 * SAMPLE_RATE)
+
+    @pytest.mark.parametrize("audio", (silence(5), np.zeros(0, np.float32)), ids=("silence", "empty"))
+    def test_no_speech(self, audio: np.ndarray):
+        """
+        Test that silence (or no audio at all) has no speech regions.
+        """
+        assert detect_speech(audio) == []
+
+    def test_regions_are_clipped_to_the_audio(self):
+        """
+        Test that padding never takes a region beyond the ends of the audio.
+        """
+        assert detect_speech(tone(1.01)) == [(0, int(1.01 * SAMPLE_RATE))]
+
+
+class TestSpeechTimeline:
+    """
+    Tests for mapping the compacted speech timeline back onto the original one.
+    """
+
+    def test_gather_and_remap(self):
+        """
+        Test that speech regions are gathered back to back and segment times mapped back onto the original timeline.
+        """
+        timeline = SpeechTimeline([(1 * SAMPLE_RATE, 3 * SAMPLE_RATE), (10 * SAMPLE_RATE, 11 * SAMPLE_RATE)])
+        audio = np.arange(12 * SAMPLE_RATE, dtype=np.float32)
+        gathered = timeline.gather(audio)
+        assert len(gathered) == timeline.speech_samples == 3 * SAMPLE_RATE
+        assert gathered[2 * SAMPLE_RATE] == 10 * SAMPLE_RATE
+        segment = {"start": 0.5, "end": 2.0, "text": " Hi.", "words": [{"start": 2.0, "end": 2.5, "word": "Hi."}]}
+        assert timeline.remap_segment(segment) == {
+            "start": 1.5,
+            # A time between two regions ends the first region or starts the second.
+            "end": 3.0,
+            "text": " Hi.",
+            "words": [{"start": 10.0, "end": 10.5, "word": "Hi."}],
+        }
+        # Times beyond the end of the speech stay within the last region.
+        assert timeline.to_original(3.5, end=True) == 11.0
@@ -0,0 +1,83 @@
+import os
+from pathlib import Path
+
+from transcriber.watch import StabilityTracker
+
+
+class FakeClock:
+    """
+    A clock which only moves when we say so.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestStabilityTracker:
+    """
+    Tests for spotting new and changed files once they've stopped changing.
+    """
+
+    def test_files_are_reported_once_settled(self, tmp_path: Path):
+        """
+        Test that a file is only reported once its size has stayed the same for the settle time, and only once.
+        """
+        clock = FakeClock()
+        tracker = StabilityTracker(settle_seconds=5, clock=clock)
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"a")
+        assert tracker.update([video]) == []
+        assert tracker.pending == 1
+        clock.now = 3
+        # Still being copied, so we start waiting again.
+        video.write_bytes(b"ab")
+        assert tracker.update([video]) == []
+        clock.now = 7
+        assert tracker.update([video]) == []
+        clock.now = 8
+        assert tracker.update([video]) == [video]
+        assert tracker.pending == 0
+        clock.now = 100
+        assert tracker.update([video]) == []
+
+    def test_changed_files_are_reported_again(self, tmp_path: Path):
+        """
+        Test that a file which changes after being reported is reported again once it settles.
+        """
+        clock = FakeClock()
+        tracker = StabilityTracker(settle_seconds=5, clock=clock)
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"a")
+        tracker.update([video])
+        clock.now = 5
+        assert tracker.update([video]) == [video]
+        assert tracker.changed == set()
+        os.utime(video, ns=(0, 1_000_000_000))
+        clock.now = 6
+        assert tracker.update([video]) == []
+        # Changing again before it settles still counts as a change to what we reported.
+        video.write_bytes(b"ab")
+        clock.now = 7
+        assert tracker.update([video]) == []
+        clock.now = 12
+        assert tracker.update([video]) == [video]
+        assert tracker.changed == {video}
+        clock.now = 13
+        assert tracker.update([video]) == []
+        assert tracker.changed == set()
+
+    def test_vanished_files_are_forgotten(self, tmp_path: Path):
+        """
+        Test that files which disappear (or were never there) are dropped, and reported afresh if they come back.
+        """
+        clock = FakeClock()
+        tracker = StabilityTracker(settle_seconds=0, clock=clock)
+        videos = [tmp_path / "b.mp4", tmp_path / "a.mp4"]
+        for video in videos:
+            video.touch()
+        assert tracker.update([*videos, tmp_path / "missing.mp4"]) == sorted(videos)
+        assert tracker.update(videos[:1]) == []
+        assert tracker.update(videos) == [videos[1]]